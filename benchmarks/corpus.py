@@ -0,0 +1,136 @@
+# benchmarks/corpus.py
+"""Synthetic, reproducible paper corpus: Crossref-style works, PDFs and bib files."""
+import os
+import random
+import shutil
+
+import fitz  # PyMuPDF
+
+_WORDS = (
+    "adaptive learning deep neural networks graph inventory supply chain optimization "
+    "stochastic robust bayesian inference reinforcement control policy gradient convex analysis "
+    "scheduling routing vehicle demand forecasting uncertainty sparse representation "
+    "transformer attention language models survey multi agent systems distributed estimation "
+    "causal effects survival clinical risk prediction federated privacy efficient scalable "
+    "approximation dynamic programming markov decision processes kernel methods manifold "
+    "embedding contrastive generative adversarial diffusion variational"
+).split()
+_GLUE = ("for", "of", "in", "with", "via", "under", "and")
+_SURNAMES = ("Smith", "Nguyen", "Garcia", "Müller", "Rossi", "Kim", "Patel", "Ivanova", "Okafor",
+             "Chen", "Dubois", "Silva", "Haddad", "Novak", "Tanaka", "O'Brien", "Larsen",
+             "Kowalski")
+_GIVEN = ("Ana", "Ben", "Chloe", "Dmitri", "Emeka", "Fatima", "Gil", "Hana", "Ivo", "Jun", "Lena",
+          "Omar")
+_JOURNALS = ("Journal of Operations Research", "Machine Learning", "Management Science",
+             "IEEE Transactions on Neural Networks", "Annals of Statistics",
+             "Computers & Operations Research")
+
+
+def _title(rng: random.Random) -> str:
+    words = []
+    for i in range(rng.randint(5, 12)):
+        if i and rng.random() < 0.25:
+            words.append(rng.choice(_GLUE))
+        words.append(rng.choice(_WORDS))
+    title = " ".join(words).capitalize()
+    if rng.random() < 0.3:
+        title += ": " + " ".join(rng.choice(_WORDS) for _ in range(rng.randint(2, 4)))
+    return title
+
+def make_works(n: int, seed: int = 0, start: int = 0) -> list[dict]:
+    """``n`` distinct Crossref-style work records (DOI, title, authors, venue, year)."""
+    rng = random.Random(seed)
+    works, seen = [], set()
+    i = start
+    while len(works) < n:
+        title = _title(rng)
+        if title.lower() in seen:
+            continue
+        seen.add(title.lower())
+        year = rng.randint(1995, 2024)
+        first_page = rng.randint(1, 900)
+        works.append({
+            "DOI": f"10.5555/bench.{i}",
+            "type": "journal-article",
+            "title": [title],
+            "author": [{"given": rng.choice(_GIVEN), "family": rng.choice(_SURNAMES)}
+                       for _ in range(rng.randint(1, 5))],
+            "issued": {"date-parts": [[year]]},
+            "container-title": [rng.choice(_JOURNALS)],
+            "volume": str(rng.randint(1, 80)),
+            "page": f"{first_page}-{first_page + rng.randint(8, 30)}",
+            "publisher": "Bench Press",
+        })
+        i += 1
+    return works
+
+def _write_pdf(path: str, work: dict, rng: random.Random, print_doi: bool):
+    """One-page paper: running header, large title (may wrap), authors, abstract, footer."""
+    doc = fitz.open()
+    page = doc.new_page(width=612, height=792)
+    year = work["issued"]["date-parts"][0][0]
+    header = f"{work['container-title'][0]}, Vol. {work['volume']} ({year}) {work['page']}"
+    page.insert_text((54, 40), header, fontsize=8)
+    page.insert_textbox(fitz.Rect(54, 80, 558, 170), work["title"][0], fontsize=17, fontname="hebo")
+    authors = ", ".join(f"{a['given']} {a['family']}" for a in work["author"])
+    page.insert_textbox(fitz.Rect(54, 175, 558, 205), authors, fontsize=11)
+    affiliation = "Department of Industrial Engineering, Example University"
+    page.insert_text((54, 220), affiliation, fontsize=9)
+    abstract = "Abstract. " + " ".join(rng.choice(_WORDS) for _ in range(160))
+    page.insert_textbox(fitz.Rect(54, 240, 558, 520), abstract, fontsize=10)
+    body = " ".join(rng.choice(_WORDS + list(_GLUE)) for _ in range(250))
+    page.insert_textbox(fitz.Rect(54, 530, 558, 740), body, fontsize=10)
+    footer = f"© {year} Bench Press. All rights reserved."
+    if print_doi:
+        footer += f" https://doi.org/{work['DOI']}"
+    page.insert_text((54, 770), footer, fontsize=8)
+    # Metadata as found in the wild: usually empty or a word-processor file name
+    junk = rng.choice(["", "", "Microsoft Word - draft_final.docx", "untitled"])
+    doc.set_metadata({"title": junk, "author": ""})
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+
+def _filename(rng: random.Random, i: int) -> str:
+    return rng.choice((
+        f"1-s2.0-S0{rng.randint(10**9, 10**10 - 1)}-main.pdf",
+        f"{rng.randint(1000, 2499)}.{rng.randint(10000, 99999)}v{rng.randint(1, 3)}.pdf",
+        f"paper_{i}.pdf",
+        f"download ({i}).pdf",
+    ))
+
+def make_pdf_folder(folder: str, works: list[dict], duplicate_rate: float = 0.1,
+                    doi_rate: float = 0.5, seed: int = 0) -> dict:
+    """Write one PDF per work into ``folder`` plus byte-identical copies of some.
+
+    ``doi_rate`` of the papers print their DOI in the footer; the rest must be
+    found by title. Returns counts of what was written.
+    """
+    rng = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i, work in enumerate(works):
+        path = os.path.join(folder, _filename(rng, i))
+        while os.path.exists(path):
+            path = path[:-4] + "_x.pdf"
+        _write_pdf(path, work, rng, rng.random() < doi_rate)
+        paths.append(path)
+    duplicates = rng.sample(paths, int(len(paths) * duplicate_rate))
+    for j, src in enumerate(duplicates):
+        shutil.copyfile(src, os.path.join(folder, f"copy_{j}_{os.path.basename(src)}"))
+    return {"papers": len(paths), "duplicates": len(duplicates)}
+
+def _bib_value(text: str) -> str:
+    return text.replace("{", "").replace("}", "")
+
+def write_bib(path: str, works: list[dict]):
+    """A library .bib with one entry (and a linked file name) per work."""
+    with open(path, "w", encoding="utf-8") as f:
+        for i, w in enumerate(works):
+            first = w["author"][0]["family"].replace("'", "")
+            year = w["issued"]["date-parts"][0][0]
+            key = f"{first}{year}B{i}"
+            authors = " and ".join(f"{a['family']}, {a['given']}" for a in w["author"])
+            f.write(f"@article{{{key},\n  title = {{{_bib_value(w['title'][0])}}},\n"
+                    f"  author = {{{authors}}},\n"
+                    f"  journal = {{{w['container-title'][0]}}},\n  year = {{{year}}},\n"
+                    f"  doi = {{{w['DOI']}}},\n  file = {{:{key}.pdf:PDF}}\n}}\n\n")
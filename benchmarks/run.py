@@ -0,0 +1,272 @@
+# benchmarks/run.py
+"""Run refsync benchmark scenarios against the local provider stand-in.
+
+    python -m benchmarks.run                               # all scenarios
+    python -m benchmarks.run throughput --pdfs 500 --jobs 1,8 --latency-ms 100
+    python -m benchmarks.run bib_scaling --bib-sizes 1000,10000
+    python -m benchmarks.run startup --startup-runs 20
+    python -m benchmarks.run --compare benchmarks/results/baseline.json
+
+Results are written as JSON (``--out``); ``--compare`` prints the change
+against an earlier result file and exits with status 1 on a regression
+beyond ``--tolerance``.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from .corpus import make_pdf_folder, make_works, write_bib
+from .standin import StandIn
+
+SCENARIOS = ("throughput", "bib_scaling", "startup")
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Dependencies that short runs (--help, --rebuild-tracker, no-op) should never import
+_HEAVY = ("fitz", "pymupdf", "requests", "tenacity", "bibtexparser", "tkinter")
+
+
+def _run_folder(refsync, folder: str, jobs: int) -> tuple[float, dict]:
+    """Wall time and refsync.metrics snapshot (stages, counters) of one process_folder run."""
+    core, ref_client, metrics = refsync
+    ref_client.configure_cache(None)  # cold in-memory response cache for every run
+    metrics.reset()
+    metrics.configure_metrics(True)
+    with redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        core.process_folder(folder, jobs=jobs)
+        elapsed = time.perf_counter() - start
+    return elapsed, metrics.snapshot()
+
+def _outcomes(snap: dict) -> dict:
+    return {k[len("pdf."):]: v for k, v in snap["counters"].items() if k.startswith("pdf.")}
+
+def _requests_since(standin: StandIn, before: dict) -> dict:
+    now = standin.stats()
+    return {kind: {k: v - before[kind].get(k, 0) for k, v in now[kind].items()
+                   if v - before[kind].get(k, 0)}
+            for kind in now}
+
+def throughput(refsync, standin: StandIn, args, workdir: str) -> dict:
+    """Files/sec and per-stage latency of process_folder for each --jobs value."""
+    corpus = os.path.join(workdir, "corpus")
+    counts = make_pdf_folder(corpus, args.works, duplicate_rate=args.duplicate_rate,
+                             doi_rate=args.doi_rate, seed=args.seed)
+    files = len([n for n in os.listdir(corpus) if n.endswith(".pdf")])
+    runs = {}
+    for jobs in args.jobs:
+        folder = os.path.join(workdir, f"throughput-j{jobs}")
+        shutil.copytree(corpus, folder)
+        before = standin.stats()
+        elapsed, snap = _run_folder(refsync, folder, jobs)
+        requests = _requests_since(standin, before)
+        # Second pass: everything is tracked now, so this measures the skip path
+        rerun, _ = _run_folder(refsync, folder, jobs)
+        runs[f"jobs={jobs}"] = {
+            "seconds": round(elapsed, 4),
+            "files_per_sec": round(files / elapsed, 3),
+            "rerun_seconds": round(rerun, 4),
+            "outcomes": _outcomes(snap),
+            "stages": snap["stages"],
+            "counters": snap["counters"],
+            "provider": requests,
+        }
+        print(f"[throughput] jobs={jobs}: {files / elapsed:.1f} files/s, rerun {rerun:.3f}s",
+              file=sys.stderr)
+    return {"files": files, **counts, "runs": runs}
+
+def bib_scaling(refsync, standin: StandIn, args, workdir: str) -> dict:
+    """Cost of loading a library and filing new PDFs as the bib grows."""
+    from refsync.bib_utils import BibLibrary
+    new = args.works[:args.scaling_pdfs]
+    corpus = os.path.join(workdir, "scaling-corpus")
+    make_pdf_folder(corpus, new, duplicate_rate=0.0, doi_rate=args.doi_rate, seed=args.seed)
+    runs = {}
+    for size in args.bib_sizes:
+        folder = os.path.join(workdir, f"bib-{size}")
+        shutil.copytree(corpus, folder)
+        bib_path = os.path.join(folder, "library.bib")
+        write_bib(bib_path, make_works(size, seed=args.seed + 1, start=10 ** 7))
+        start = time.perf_counter()
+        BibLibrary(bib_path)
+        load = time.perf_counter() - start
+        elapsed, snap = _run_folder(refsync, folder, args.scaling_jobs)
+        runs[f"entries={size}"] = {
+            "bib_bytes": os.path.getsize(bib_path),
+            "load_seconds": round(load, 4),
+            "seconds": round(elapsed, 4),
+            "files_per_sec": round(len(new) / elapsed, 3),
+            "outcomes": _outcomes(snap),
+            "stages": snap["stages"],
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        }
+        print(f"[bib_scaling] {size} entries: load {load:.3f}s, {len(new) / elapsed:.1f} files/s",
+              file=sys.stderr)
+        shutil.rmtree(folder)
+    return {"pdfs": len(new), "jobs": args.scaling_jobs, "runs": runs}
+
+def _imported_modules(argv: list[str]) -> set[str]:
+    """Modules a fresh interpreter imports for ``argv``, from -X importtime."""
+    out = subprocess.run([sys.executable, "-X", "importtime"] + argv, capture_output=True,
+                         text=True, cwd=_ROOT)
+    return {line.rsplit("|", 1)[-1].strip() for line in out.stderr.splitlines()
+            if line.startswith("import time:")}
+
+def startup(refsync, standin: StandIn, args, workdir: str) -> dict:
+    """Process start-to-exit time of short CLI runs, and which heavy dependencies they import."""
+    folder = os.path.join(workdir, "filed")
+    make_pdf_folder(folder, args.works[:5], duplicate_rate=0.0, doi_rate=1.0, seed=args.seed)
+    _run_folder(refsync, folder, 1)  # file everything once so the timed runs have nothing to do
+    cache = ["--cache-dir", os.path.join(workdir, "cache")]
+    cases = {
+        "import": ["-c", "import refsync.cli"],
+        "help": ["-m", "refsync.cli", "--help"],
+        "rebuild_tracker": ["-m", "refsync.cli", folder, "--rebuild-tracker"] + cache,
+        "noop": ["-m", "refsync.cli", folder] + cache,
+    }
+    runs = {}
+    for name, argv in cases.items():
+        times = []
+        for _ in range(args.startup_runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable] + argv, capture_output=True, cwd=_ROOT, check=True)
+            times.append(time.perf_counter() - start)
+        heavy = sorted({m.split(".")[0] for m in _imported_modules(argv)} & set(_HEAVY))
+        runs[name] = {
+            "seconds": round(statistics.median(times), 4),
+            "min_seconds": round(min(times), 4),
+            "heavy_imports": heavy,
+        }
+        print(f"[startup] {name}: {statistics.median(times) * 1000:.0f} ms"
+              + (f", imports {', '.join(heavy)}" if heavy else ""), file=sys.stderr)
+    return {"runs": runs}
+
+
+def _flatten(data, prefix: str = "") -> dict[str, float]:
+    out = {}
+    for k, v in data.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict):
+            out.update(_flatten(v, key + "."))
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            out[key] = float(v)
+    return out
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list[str]:
+    """Print metric changes against ``baseline``; return the regressed metric names."""
+    old, new = _flatten(baseline.get("scenarios", {})), _flatten(current.get("scenarios", {}))
+    regressions = []
+    for key in sorted(old.keys() & new.keys()):
+        higher_is_better = key.endswith("files_per_sec")
+        # Wall times, and the tail latency of each stage
+        timed = key.endswith("seconds") or key.endswith(".p95_ms")
+        if not (higher_is_better or timed) or not old[key]:
+            continue
+        change = (new[key] - old[key]) / old[key]
+        worse = -change if higher_is_better else change
+        mark = "  REGRESSION" if worse > tolerance else ""
+        if mark:
+            regressions.append(key)
+        print(f"{key:60s} {old[key]:12.4f} -> {new[key]:12.4f} ({change:+.1%}){mark}")
+    return regressions
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=_ROOT, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+def _ints(text: str) -> list[int]:
+    return [int(x) for x in text.split(",") if x.strip()]
+
+def build_parser():
+    p = argparse.ArgumentParser(prog="python -m benchmarks.run",
+                                description=__doc__.split("\n\n")[0])
+    p.add_argument("scenarios", nargs="*", metavar="SCENARIO",
+                   help=f"Scenarios to run: {', '.join(SCENARIOS)} (default: all)")
+    p.add_argument("--pdfs", type=int, default=200,
+                   help="Papers in the throughput corpus (default: 200)")
+    p.add_argument("--duplicate-rate", type=float, default=0.1,
+                   help="Share of papers copied once (default: 0.1)")
+    p.add_argument("--doi-rate", type=float, default=0.5,
+                   help="Share of papers printing their DOI (default: 0.5)")
+    p.add_argument("--distractors", type=int, default=5000,
+                   help="Extra works the stand-in knows, so searches return near misses "
+                        "(default: 5000)")
+    p.add_argument("--jobs", type=_ints, default=[1, 4, 8],
+                   help="Comma-separated --jobs values (default: 1,4,8)")
+    p.add_argument("--bib-sizes", type=_ints, default=[1000, 10000, 100000],
+                   help="Comma-separated bib entry counts (default: 1000,10000,100000)")
+    p.add_argument("--scaling-pdfs", type=int, default=20,
+                   help="New PDFs filed per bib size (default: 20)")
+    p.add_argument("--scaling-jobs", type=int, default=4,
+                   help="--jobs for the bib scaling runs (default: 4)")
+    p.add_argument("--startup-runs", type=int, default=10,
+                   help="Timed runs per startup case (default: 10)")
+    p.add_argument("--latency-ms", type=float, default=50.0,
+                   help="Stand-in latency per request (default: 50)")
+    p.add_argument("--rate", type=float, default=50.0,
+                   help="Stand-in requests/second per provider before answering 429 "
+                        "(default: 50; 0 = unlimited)")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out", default=None,
+                   help="Result file (default: benchmarks/results/<UTC time>.json)")
+    p.add_argument("--compare", default=None, metavar="BASELINE",
+                   help="Earlier result file to compare against")
+    p.add_argument("--tolerance", type=float, default=0.1,
+                   help="Relative slowdown reported as a regression (default: 0.1)")
+    return p
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    unknown = [s for s in args.scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    scenarios = args.scenarios or list(SCENARIOS)
+    if "refsync.config" in sys.modules:
+        raise SystemExit("run the benchmarks in a fresh interpreter: "
+                         "provider URLs are read at import")
+    works = make_works(args.pdfs + args.distractors, seed=args.seed)
+    args.works = works[:args.pdfs]
+    standin = StandIn(works, latency=args.latency_ms / 1000.0, rate=args.rate or None)
+    results = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("works", "out", "compare")},
+        },
+        "scenarios": {},
+    }
+    with standin, tempfile.TemporaryDirectory(prefix="refsync-bench-") as workdir:
+        os.environ.update(standin.env())
+        from refsync import core, metrics, ref_client
+        for name in scenarios:
+            results["scenarios"][name] = globals()[name]((core, ref_client, metrics), standin, args,
+                                                         os.path.join(workdir, name))
+    out = args.out or os.path.join(os.path.dirname(os.path.abspath(__file__)), "results",
+                                   results["meta"]["time"].replace(":", "") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"[bench] results written to {out}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            if compare(json.load(f), results, args.tolerance):
+                return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+# benchmarks/standin.py
+"""Local stand-in for Crossref, Semantic Scholar, OpenAlex and doi.org.
+
+Serves a fixed set of Crossref-style works over HTTP on 127.0.0.1 with a
+configurable per-request latency and per-provider rate limit (429 with
+Retry-After once the limit is exceeded; Crossref-style X-Rate-Limit-*
+headers on every answer). ``env()`` returns the REFSYNC_*_URL variables
+that point refsync at it; set them before refsync is imported.
+"""
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+_TOKEN = re.compile(r"\w+")
+
+
+def _tokens(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class _Window:
+    """Fixed one-second window counter per provider."""
+
+    def __init__(self, rate: float | None):
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._second = 0
+        self._count = 0
+
+    def allow(self) -> bool:
+        if not self.rate:
+            return True
+        with self._lock:
+            now = int(time.monotonic())
+            if now != self._second:
+                self._second, self._count = now, 0
+            self._count += 1
+            return self._count <= self.rate
+
+
+class StandIn:
+    """Threaded HTTP server answering refsync's provider requests from ``works``."""
+
+    def __init__(self, works: list[dict], latency: float = 0.05, rate: float | None = None):
+        self.works = {w["DOI"].lower(): w for w in works}
+        self.latency = latency
+        self.rate = rate
+        self._postings: dict[str, list[str]] = {}
+        for doi, w in self.works.items():
+            for tok in set(_tokens(w["title"][0])):
+                self._postings.setdefault(tok, []).append(doi)
+        self._windows = {name: _Window(rate) for name in ("crossref", "s2", "openalex", "doi")}
+        self.requests: Counter = Counter()
+        self.rejected: Counter = Counter()
+        handler = type("Handler", (_Handler,), {"standin": self})
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> dict[str, str]:
+        return {
+            "REFSYNC_CROSSREF_URL": f"{self.url}/crossref/works",
+            "REFSYNC_S2_SEARCH_URL": f"{self.url}/s2/graph/v1/paper/search",
+            "REFSYNC_S2_PAPER_URL": self.url + "/s2/graph/v1/paper/{paper_id}",
+            "REFSYNC_OPENALEX_URL": f"{self.url}/openalex/works",
+            "REFSYNC_DOI_URL": self.url + "/doi/{doi}",
+        }
+
+    def start(self) -> "StandIn":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def search(self, query: str, rows: int) -> list[dict]:
+        """Works sharing the most title words with ``query``."""
+        hits: Counter = Counter()
+        for tok in set(_tokens(query)):
+            for doi in self._postings.get(tok, ()):
+                hits[doi] += 1
+        return [self.works[doi] for doi, _ in hits.most_common(rows)]
+
+    def stats(self) -> dict:
+        return {"requests": dict(self.requests), "rejected": dict(self.rejected)}
+
+
+def _s2_paper(work: dict) -> dict:
+    return {
+        "title": work["title"][0],
+        "authors": [{"name": f"{a['given']} {a['family']}"} for a in work["author"]],
+        "year": work["issued"]["date-parts"][0][0],
+        "externalIds": {"DOI": work["DOI"]},
+        "url": f"https://example.org/{work['DOI']}",
+    }
+
+def _openalex_work(work: dict) -> dict:
+    return {
+        "id": f"https://openalex.org/{work['DOI']}",
+        "doi": f"https://doi.org/{work['DOI']}",
+        "title": work["title"][0],
+        "publication_year": work["issued"]["date-parts"][0][0],
+        "authorships": [{"author": {"display_name": f"{a['given']} {a['family']}"}}
+                        for a in work["author"]],
+    }
+
+def _bibtex(work: dict) -> str:
+    authors = " and ".join(f"{a['family']}, {a['given']}" for a in work["author"])
+    year = work["issued"]["date-parts"][0][0]
+    return (f"@article{{{work['author'][0]['family']}_{year},\n\ttitle = {{{work['title'][0]}}},\n"
+            f"\tauthor = {{{authors}}},\n\tyear = {{{year}}},\n\tdoi = {{{work['DOI']}}}\n}}")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    standin: StandIn
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body, content_type: str = "application/json",
+              headers: dict | None = None):
+        data = (json.dumps(body) if content_type == "application/json" else body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        st = self.standin
+        parts = urlsplit(self.path)
+        provider, _, rest = parts.path.lstrip("/").partition("/")
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        if provider not in st._windows:
+            return self._send(404, {"error": "unknown provider"})
+        st.requests[provider] += 1
+        limits = {}
+        if st.rate:
+            limits = {"X-Rate-Limit-Limit": str(int(st.rate)), "X-Rate-Limit-Interval": "1s"}
+        if not st._windows[provider].allow():
+            st.rejected[provider] += 1
+            return self._send(429, {"error": "rate limited"},
+                              headers={"Retry-After": "1", **limits})
+        if st.latency:
+            time.sleep(st.latency)
+        rows = int(query.get("rows") or query.get("limit") or query.get("per-page") or 5)
+        if provider == "crossref":
+            if rest.startswith("works/"):
+                work = st.works.get(unquote(rest[len("works/"):]).lower())
+                if work is None:
+                    return self._send(404, "Resource not found.", "text/plain", limits)
+                return self._send(200, {"status": "ok", "message": work}, headers=limits)
+            if "filter" in query:
+                return self._send(200, {"status": "ok", "message": {"items": []}}, headers=limits)
+            items = st.search(query.get("query.bibliographic", ""), rows)
+            return self._send(200, {"status": "ok", "message": {"items": items}}, headers=limits)
+        if provider == "s2":
+            if rest.endswith("/search"):
+                found = st.search(query.get("query", ""), rows)
+                return self._send(200, {"data": [_s2_paper(w) for w in found]})
+            paper_id = unquote(rest.rsplit("/", 1)[-1])
+            work = None
+            if paper_id.upper().startswith("DOI:"):
+                work = st.works.get(paper_id.split(":", 1)[-1].lower())
+            if work is None:
+                return self._send(404, {"error": "not found"})
+            return self._send(200, _s2_paper(work))
+        if provider == "openalex":
+            found = st.search(query.get("search", ""), rows)
+            return self._send(200, {"results": [_openalex_work(w) for w in found]})
+        work = st.works.get(unquote(rest).lower())
+        if work is None:
+            return self._send(404, "DOI not found", "text/plain")
+        return self._send(200, _bibtex(work), "application/x-bibtex")
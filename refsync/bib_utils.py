@@ -1,35 +1,151 @@
+import bisect
+import html
+import io
+import itertools
 import os
 import re
-import bibtexparser
+import threading
+import time
+from .ref_client import normalize_title
+from .file_utils import atomic_write_bytes
+from .config import NEAR_DUP_THRESHOLD
+from .near_dup import NearDuplicateIndex
+from .metrics import stage, timed
 STOPWORDS = {"a", "an", "the", "of", "in", "on", "for", "and", "to", "at", "by", "with", "from"}
 
 
 def parse_bibtex_to_entry(bib_str: str):
+    import bibtexparser
     db = bibtexparser.loads(bib_str)
     if not db.entries:
         return None
     return db.entries[0]
 
-def upsert_bib_entry(bib_path: str, new_entry: dict, dry_run=False):
-    db = bibtexparser.loads("")
-    if os.path.exists(bib_path):
-        with open(bib_path, "r", encoding="utf-8") as f:
-            db = bibtexparser.load(f)
-
-    doi_new = (new_entry.get("doi") or "").lower().strip()
-    replaced = False
-    for e in db.entries:
-        if (e.get("doi") or "").lower().strip() == doi_new and doi_new:
-            e.update(new_entry)
-            replaced = True
+def upsert_bib_entry(bib_path: str, new_entry: dict, dry_run=False,
+                     library: "BibLibrary | None" = None):
+    if library is None:
+        library = BibLibrary(bib_path)
+    library.upsert(new_entry)
+    if not dry_run:
+        library.maybe_flush()
+
+# Crossref work types -> BibTeX entry types (as chosen by doi.org content negotiation)
+CROSSREF_ENTRY_TYPES = {
+    "journal-article": "article",
+    "proceedings-article": "inproceedings",
+    "book-chapter": "incollection",
+    "book-section": "incollection",
+    "book-part": "incollection",
+    "reference-entry": "incollection",
+    "book": "book",
+    "monograph": "book",
+    "edited-book": "book",
+    "reference-book": "book",
+    "report": "techreport",
+    "dissertation": "phdthesis",
+}
+MONTHS = ["January", "February", "March", "April", "May", "June", "July",
+          "August", "September", "October", "November", "December"]
+# Braces become commands rather than \{ \}: BibTeX counts escaped braces
+# too, so a lone one would unbalance the field
+_LATEX_SPECIALS = {
+    "&": r"\&", "%": r"\%", "$": r"\$", "#": r"\#", "_": r"\_",
+    "{": r"\textbraceleft{}", "}": r"\textbraceright{}", "~": r"\textasciitilde{}",
+    "^": r"\textasciicircum{}", "\\": r"\textbackslash{}",
+}
+_LATEX_SPECIALS_RE = re.compile(r"[&%$#_{}~^\\]")
+
+def latex_escape(text: str) -> str:
+    """Plain text from a Crossref field -> BibTeX-safe value.
+
+    JATS tags and HTML entities are removed; LaTeX special characters,
+    braces and backslashes included, come out as literal text.
+    """
+    text = re.sub(r"<[^>]+>", "", text or "")
+    text = html.unescape(text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return _LATEX_SPECIALS_RE.sub(lambda m: _LATEX_SPECIALS[m.group()], text)
+
+def _crossref_people(people: list) -> str:
+    names = []
+    for a in people or []:
+        if a.get("family"):
+            names.append(latex_escape(f"{a['family']}, {a.get('given', '')}".strip(", ")))
+        elif a.get("name"):
+            names.append("{" + latex_escape(a["name"]) + "}")
+    return " and ".join(names)
+
+def _first(value) -> str:
+    if isinstance(value, list):
+        return value[0] if value else ""
+    return value or ""
+
+def entry_from_crossref(item: dict) -> dict | None:
+    """Render a Crossref work record as a BibTeX entry dict, like doi.org would.
+
+    Returns None when ``item`` is not a full Crossref record (e.g. a Semantic
+    Scholar result), so callers can fall back to doi.org.
+    """
+    doi = item.get("DOI")
+    title = _first(item.get("title"))
+    if not doi or not title or "type" not in item:
+        return None
+    etype = CROSSREF_ENTRY_TYPES.get(item["type"], "misc")
+    entry = {"ENTRYTYPE": etype, "title": latex_escape(title), "doi": doi,
+             "url": f"http://dx.doi.org/{doi}"}
+    subtitle = _first(item.get("subtitle"))
+    if subtitle and subtitle.lower() not in title.lower():
+        entry["title"] += ": " + latex_escape(subtitle)
+
+    authors = _crossref_people(item.get("author"))
+    if authors:
+        entry["author"] = authors
+    editors = _crossref_people(item.get("editor"))
+    if editors:
+        entry["editor"] = editors
+
+    parts = []
+    for k in ("published-print", "published-online", "issued"):
+        v = item.get(k)
+        if v and v.get("date-parts") and v["date-parts"][0] and v["date-parts"][0][0]:
+            parts = v["date-parts"][0]
             break
+    if parts:
+        entry["year"] = str(parts[0])
+        if len(parts) > 1 and parts[1] and 1 <= int(parts[1]) <= 12:
+            entry["month"] = MONTHS[int(parts[1]) - 1]
 
-    if not replaced:
-        db.entries.append(new_entry)
+    container = latex_escape(_first(item.get("container-title")))
+    if container:
+        if etype == "article":
+            entry["journal"] = container
+        elif etype in ("inproceedings", "incollection"):
+            entry["booktitle"] = container
+        elif etype == "book":
+            entry["series"] = container
+    for src, dst in (("volume", "volume"), ("issue", "number")):
+        if item.get(src):
+            entry[dst] = latex_escape(str(item[src]))
+    if item.get("page"):
+        entry["pages"] = re.sub(r"\s*[-\u2013\u2014]+\s*", "\u2013", str(item["page"]))
+    if item.get("publisher"):
+        entry["publisher"] = latex_escape(item["publisher"])
+    electronic = [t.get("value") for t in item.get("issn-type") or []
+                  if t.get("type") == "electronic"]
+    if electronic or item.get("ISSN"):
+        entry["issn"] = electronic[0] if electronic else _first(item["ISSN"])
+    if item.get("ISBN") and etype in ("book", "incollection"):
+        entry["isbn"] = _first(item["ISBN"])
+    if etype == "phdthesis" and item.get("institution"):
+        entry["school"] = latex_escape(_first(item["institution"]).get("name", ""))
 
-    if not dry_run:
-        with open(bib_path, "w", encoding="utf-8") as f:
-            bibtexparser.dump(db, f)
+    family = ""
+    for a in item.get("author") or item.get("editor") or []:
+        family = a.get("family") or a.get("name") or ""
+        break
+    key = re.sub(r"[^A-Za-z0-9]+", "_", f"{family}_{entry.get('year', '')}").strip("_")
+    entry["ID"] = key or "unnamed"
+    return entry
 
 def safe_bib_key(entry: dict) -> str:
     year = entry.get("year", "")
@@ -59,42 +175,388 @@ def safe_bib_key(entry: dict) -> str:
 def add_or_update_file_field(entry: dict, pdf_rel_path: str):
     entry["file"] = "{:" + pdf_rel_path.replace("\\", "/") + ":PDF}"
 
-def get_linked_pdf_basenames(bib_path: str) -> set[str]:
-    linked = set()
-    if not os.path.exists(bib_path):
-        return linked
-    with open(bib_path, "r", encoding="utf-8") as f:
-        db = bibtexparser.load(f)
-    for e in db.entries:
-        fval = e.get("file")
-        if not fval:
+def entry_file_basenames(entry: dict) -> list[str]:
+    """Lowercased PDF basenames referenced by an entry's JabRef ``file`` field."""
+    bases = []
+    fval = entry.get("file")
+    if not fval:
+        return bases
+    parts = [p.strip() for p in fval.split(';') if p.strip()]
+    for part in parts:
+        pv = part.strip()
+        if pv.startswith("{") and pv.endswith("}"):
+            pv = pv[1:-1]
+        chunks = pv.split(':')
+        if len(chunks) >= 2:
+            path = chunks[-2].strip()
+            if path:
+                base = os.path.basename(path)
+                if base.lower().endswith(".pdf"):
+                    bases.append(base.lower())
+    return bases
+
+def normalize_doi(doi: str) -> str:
+    doi = (doi or "").strip().lower()
+    for prefix in ("https://doi.org/", "http://doi.org/", "https://dx.doi.org/",
+                   "http://dx.doi.org/", "doi:"):
+        if doi.startswith(prefix):
+            doi = doi[len(prefix):]
+    return doi.strip()
+
+def title_author_key(title: str, author: str) -> tuple[str, str]:
+    return normalize_title(title or ""), (author or "").strip().lower()
+
+
+# Streaming scanner: works on raw bytes (entry syntax is ASCII, so UTF-8 text
+# never produces false braces) and decodes only the requested field values.
+SCAN_FIELDS = ("doi", "file", "title", "author")
+_SCAN_HEAD_RE = re.compile(rb"@[ \t\r\n]*(\w+)[ \t\r\n]*\{")
+# Start of the next entry, where an entry missing its closing brace is cut off
+_SCAN_NEXT_RE = re.compile(rb"\n[ \t]*@[ \t]*\w+[ \t\r\n]*\{")
+_SCAN_BRACE_RE = re.compile(rb"[{}]")
+_SCAN_QUOTED_RE = re.compile(rb'[{}"]')
+_SCAN_FIELD_RE = re.compile(rb"\s*([A-Za-z][\w\-:.+]*)\s*=\s*")
+_SCAN_BARE_RE = re.compile(rb"[^,#}\s]*")
+_SCAN_SPACE_RE = re.compile(rb"\s*")
+_SCAN_SKIP = (b"comment", b"string", b"preamble")
+_STRING_HEAD_RE = re.compile(rb"@[ \t\r\n]*string[ \t\r\n]*\{", re.I)
+
+
+def _closing_brace(buf: bytes, open_brace: int, limit: int | None = None) -> int | None:
+    """Index just past the brace closing the one at ``open_brace``, or None if not in ``buf``."""
+    depth = 0
+    for m in _SCAN_BRACE_RE.finditer(buf, open_brace, len(buf) if limit is None else limit):
+        depth += 1 if m.group() == b"{" else -1
+        if depth == 0:
+            return m.end()
+    return None
+
+def _scan_value(body: bytes, pos: int) -> tuple[bytes, int]:
+    """One field value (braced, quoted, bare, or joined with ``#``) and the index after it."""
+    n = len(body)
+    parts = []
+    while pos < n:
+        c = body[pos:pos + 1]
+        if c == b"{":
+            end = _closing_brace(body, pos) or n
+            parts.append(body[pos + 1:end - 1])
+        elif c == b'"':
+            depth, end = 0, n
+            for m in _SCAN_QUOTED_RE.finditer(body, pos + 1):
+                ch = m.group()
+                if ch == b'"' and depth == 0:
+                    end = m.end()
+                    break
+                depth += 1 if ch == b"{" else -1 if ch == b"}" else 0
+            parts.append(body[pos + 1:end - 1])
+        else:
+            end = _SCAN_BARE_RE.match(body, pos).end()
+            parts.append(body[pos:end])
+        pos = _SCAN_SPACE_RE.match(body, end).end()
+        if body[pos:pos + 1] != b"#":
+            break
+        pos = _SCAN_SPACE_RE.match(body, pos + 1).end()
+    return b"".join(parts), pos
+
+def _scan_entry(body: bytes, wanted: set[bytes]) -> dict:
+    comma = body.find(b",")
+    key = body[:comma if comma != -1 else len(body)]
+    rec = {"ID": key.strip().decode("utf-8", "replace")}
+    pos = comma + 1 if comma != -1 else len(body)
+    n = len(body)
+    while pos < n:
+        m = _SCAN_FIELD_RE.match(body, pos)
+        if m is None:
+            break
+        value, pos = _scan_value(body, m.end())
+        name = m.group(1).lower()
+        if name in wanted:
+            rec[name.decode("ascii")] = " ".join(value.decode("utf-8", "replace").split())
+        comma = body.find(b",", pos)
+        if comma == -1:
+            break
+        pos = comma + 1
+    return rec
+
+def scan_bib(bib_path: str, fields=SCAN_FIELDS, chunk_size: int = 1 << 20):
+    """Yield lightweight records for the entries of a .bib file without parsing all of it.
+
+    The file is read in chunks; only the current entry is held in memory.
+    Each record has ``ID``, ``ENTRYTYPE``, the requested ``fields`` that are
+    present (outer braces/quotes removed, whitespace collapsed) and the byte
+    offsets ``start``/``end`` of the entry. @comment, @string and @preamble
+    blocks are skipped; string macros are not expanded. An entry missing its
+    closing brace ends where the next ``@type{`` line starts.
+    """
+    with open(bib_path, "rb") as f:
+        yield from _scan_stream(f, fields, chunk_size)
+
+def _scan_stream(f, fields, chunk_size: int):
+    wanted = {f.lower().encode("ascii") for f in fields}
+    buf, base, pos, eof = b"", 0, 0, False
+    while True:
+        m = _SCAN_HEAD_RE.search(buf, pos)
+        end = nxt = None
+        if m is not None:
+            nxt = _SCAN_NEXT_RE.search(buf, m.end())
+            end = _closing_brace(buf, m.end() - 1, nxt.start() if nxt else None)
+        if end is None and nxt is None and not eof:
+            # Need more input: keep from the entry (or a possibly cut-off "@") onwards
+            keep = m.start() if m is not None else buf.rfind(b"@", pos)
+            keep = len(buf) if keep == -1 else keep
+            base, buf, pos = base + keep, buf[keep:], 0
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf += chunk
             continue
-        parts = [p.strip() for p in fval.split(';') if p.strip()]
-        for part in parts:
-            pv = part.strip()
-            if pv.startswith("{") and pv.endswith("}"):
-                pv = pv[1:-1]
-            chunks = pv.split(':')
-            if len(chunks) >= 2:
-                path = chunks[-2].strip()
-                if path:
-                    base = os.path.basename(path)
-                    if base.lower().endswith(".pdf"):
-                        linked.add(base.lower())
-    return linked
-
-def bib_has_doi_with_file(bib_path: str, doi: str) -> tuple[bool, str]:
-    if not os.path.exists(bib_path) or not doi:
+        if m is None:
+            return
+        closed = end is not None
+        if not closed:  # unterminated: stop at the next entry or the end of the file
+            end = nxt.start() if nxt else len(buf)
+        etype = m.group(1).lower()
+        if etype not in _SCAN_SKIP:
+            rec = _scan_entry(buf[m.end():end - 1 if closed else end], wanted)
+            rec.update(ENTRYTYPE=etype.decode("ascii"), start=base + m.start(), end=base + end)
+            yield rec
+        pos = end
+
+def entry_spans(data: bytes) -> list[tuple[str, str, int, int]]:
+    """(entry type, key, start, end) for each entry in BibTeX bytes, as byte offsets."""
+    return [(rec["ENTRYTYPE"], rec["ID"], rec["start"], rec["end"])
+            for rec in _scan_stream(io.BytesIO(data), (), 1 << 20)]
+
+def render_bib_entry(entry: dict) -> str:
+    from bibtexparser.bibdatabase import BibDatabase
+    from bibtexparser.bwriter import BibTexWriter
+    db = BibDatabase()
+    db.entries = [entry]
+    return BibTexWriter().write(db)
+
+
+class BibLibrary:
+    """In-memory view of a .bib file, scanned once and indexed for lookups.
+
+    Indexes are keyed by normalized DOI, by (normalized title, author) and by
+    linked PDF basename, and are kept in sync by ``upsert``. They are built
+    from ``scan_bib`` records (ID, type, DOI, file, title, author and byte
+    offsets); an existing entry is parsed with bibtexparser only when it is
+    updated.
+
+    Writes are write-behind: ``upsert`` only records the change, and
+    ``maybe_flush`` writes once ``flush_every`` changes are pending or
+    ``flush_interval`` seconds have passed since the last write. A flush
+    rewrites only the changed entries in the original text, appends new ones
+    and replaces the file atomically. Writes are serialized by a lock, so a
+    tracker can flush the library from another thread before it saves.
+    """
+
+    def __init__(self, bib_path: str, flush_every: int = 1, flush_interval: float | None = None,
+                 near_dup_threshold: float = NEAR_DUP_THRESHOLD):
+        self.bib_path = bib_path
+        self.near_dup_threshold = near_dup_threshold
+        self._near: NearDuplicateIndex | None = None
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._raw = b""
+        if os.path.exists(bib_path):
+            with open(bib_path, "rb") as f:
+                self._raw = f.read()
+        self._by_doi: dict[str, dict] = {}
+        self._by_title_author: dict[tuple[str, str], dict] = {}
+        self._by_basename: dict[str, dict] = {}
+        self._entries: list[dict] = []
+        # id(entry) -> byte span in the file, for entries already written
+        self._spans: dict[int, tuple[int, int]] = {}
+        # ids of entries holding all their fields (new or parsed), not just scanned ones
+        self._full: set[int] = set()
+        self._string_defs: str | None = None
+        with stage("bib.parse"):
+            for rec in _scan_stream(io.BytesIO(self._raw), SCAN_FIELDS, 1 << 20):
+                self._spans[id(rec)] = (rec.pop("start"), rec.pop("end"))
+                self._entries.append(rec)
+                self._index(rec)
+        self._dirty: dict[int, dict] = {}
+        self._new: list[dict] = []
+        self._last_flush = time.monotonic()
+
+    def _strings(self) -> str:
+        # @string definitions, so a single entry using their macros parses on its own
+        if self._string_defs is None:
+            defs = []
+            for m in _STRING_HEAD_RE.finditer(self._raw):
+                end = _closing_brace(self._raw, m.end() - 1)
+                if end is not None:
+                    defs.append(self._raw[m.start():end].decode("utf-8", "replace"))
+            self._string_defs = "\n".join(defs) + ("\n" if defs else "")
+        return self._string_defs
+
+    def _load_fields(self, entry: dict):
+        """Replace a scanned record's fields with the full parse of its entry text."""
+        start, end = self._spans[id(entry)]
+        text = self._raw[start:end].decode("utf-8", "replace")
+        parsed = parse_bibtex_to_entry(self._strings() + text)
+        if parsed is not None:
+            entry.clear()
+            entry.update(parsed)
+        self._full.add(id(entry))
+
+    @property
+    def entries(self) -> list[dict]:
+        return self._entries
+
+    def _keys(self, entry: dict):
+        doi = normalize_doi(entry.get("doi"))
+        ta = title_author_key(entry.get("title", ""), entry.get("author", ""))
+        return doi, ta, entry_file_basenames(entry)
+
+    def _index(self, entry: dict):
+        doi, ta, bases = self._keys(entry)
+        if doi:
+            self._by_doi.setdefault(doi, entry)
+        if ta[0]:
+            self._by_title_author.setdefault(ta, entry)
+        for b in bases:
+            self._by_basename.setdefault(b, entry)
+        if self._near is not None:
+            self._near.add(id(entry), entry, entry.get("title", ""), entry.get("author", ""))
+
+    def _unindex(self, entry: dict):
+        doi, ta, bases = self._keys(entry)
+        if self._by_doi.get(doi) is entry:
+            del self._by_doi[doi]
+        if self._by_title_author.get(ta) is entry:
+            del self._by_title_author[ta]
+        for b in bases:
+            if self._by_basename.get(b) is entry:
+                del self._by_basename[b]
+        if self._near is not None:
+            self._near.remove(id(entry))
+
+    def find_by_doi(self, doi: str) -> dict | None:
+        doi = normalize_doi(doi)
+        return self._by_doi.get(doi) if doi else None
+
+    def find_by_title_author(self, title: str, author: str) -> dict | None:
+        key = title_author_key(title, author)
+        return self._by_title_author.get(key) if key[0] else None
+
+    def find_similar(self, title: str, author: str = "") -> list[tuple[float, dict]]:
+        """Entries whose normalized title is a near-duplicate of ``title``, best first.
+
+        The fuzzy index is built on first use and kept in sync by ``upsert``.
+        """
+        if self._near is None:
+            self._near = NearDuplicateIndex(self.near_dup_threshold)
+            for e in self._entries:
+                self._near.add(id(e), e, e.get("title", ""), e.get("author", ""))
+        return self._near.candidates(title, author)
+
+    def find_by_basename(self, basename: str) -> dict | None:
+        return self._by_basename.get(basename.lower())
+
+    def linked_basenames(self) -> set[str]:
+        return set(self._by_basename)
+
+    @property
+    def pending(self) -> int:
+        return len(self._dirty) + len(self._new)
+
+    def upsert(self, new_entry: dict) -> dict:
+        with self._lock:
+            existing = self.find_by_doi(new_entry.get("doi"))
+            if existing is not None:
+                self._unindex(existing)
+                if id(existing) not in self._full:
+                    self._load_fields(existing)
+                existing.update(new_entry)
+                self._index(existing)
+                if id(existing) in self._spans:
+                    self._dirty[id(existing)] = existing
+                return existing
+            self._entries.append(new_entry)
+            self._full.add(id(new_entry))
+            self._index(new_entry)
+            self._new.append(new_entry)
+            return new_entry
+
+    def maybe_flush(self) -> bool:
+        if not self.pending:
+            return False
+        due = self.pending >= self.flush_every
+        if not due and self.flush_interval is not None:
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+        return due
+
+    def flush(self):
+        with self._lock:
+            if self.pending:
+                self._write()
+
+    @timed("bib.write")
+    def _write(self):
+        raw = self._raw
+        # Splice from the end so earlier offsets stay valid
+        edits = []
+        for start, end, e in sorted(((*self._spans[k], e) for k, e in self._dirty.items()),
+                                    key=lambda t: t[0], reverse=True):
+            chunk = render_bib_entry(e).rstrip("\n").encode("utf-8")
+            raw = raw[:start] + chunk + raw[end:]
+            edits.append((start, len(chunk) - (end - start), id(e), len(chunk)))
+        if edits:
+            # Entries after a splice move by the size changes before them
+            edits.reverse()
+            starts = [start for start, *_ in edits]
+            shifts = list(itertools.accumulate((delta for _, delta, *_ in edits), initial=0))
+            for key, (start, end) in self._spans.items():
+                if start > starts[0]:
+                    shift = shifts[bisect.bisect_left(starts, start)]
+                    self._spans[key] = (start + shift, end + shift)
+            for (start, _, key, size), shift in zip(edits, shifts):
+                self._spans[key] = (start + shift, start + shift + size)
+        if self._new:
+            if raw and not raw.endswith(b"\n"):
+                raw += b"\n"
+            sep = b"\n" if raw else b""
+            chunks = [render_bib_entry(e).encode("utf-8") for e in self._new]
+            pos = len(raw) + len(sep)
+            for e, chunk in zip(self._new, chunks):
+                self._spans[id(e)] = (pos, pos + len(chunk.rstrip(b"\n")))
+                pos += len(chunk) + 1
+            raw += sep + b"\n".join(chunks)
+        atomic_write_bytes(self.bib_path, raw)
+        self._raw = raw
+        self._dirty.clear()
+        self._new.clear()
+        self._last_flush = time.monotonic()
+
+    def save(self):
+        self.flush()
+
+def get_linked_pdf_basenames(bib_path: str, library: BibLibrary | None = None) -> set[str]:
+    """Lowercased PDF basenames linked from the bib (scanned, not parsed, without a ``library``)."""
+    if library is None:
+        if not os.path.exists(bib_path):
+            return set()
+        return {b for rec in scan_bib(bib_path, ("file",)) for b in entry_file_basenames(rec)}
+    return library.linked_basenames()
+
+def bib_has_doi_with_file(bib_path: str, doi: str,
+                          library: BibLibrary | None = None) -> tuple[bool, str]:
+    doi = normalize_doi(doi)
+    if not doi:
+        return False, ""
+    if library is None:
+        if not os.path.exists(bib_path):
+            return False, ""
+        records = scan_bib(bib_path, ("doi", "file"))
+        e = next((rec for rec in records if normalize_doi(rec.get("doi")) == doi), None)
+    else:
+        e = library.find_by_doi(doi)
+    if e is None:
         return False, ""
-    with open(bib_path, "r", encoding="utf-8") as f:
-        db = bibtexparser.load(f)
-    doi = doi.lower().strip()
-    for e in db.entries:
-        if (e.get("doi") or "").lower().strip() == doi:
-            fval = e.get("file")
-            if fval:
-                bases = list(get_linked_pdf_basenames(bib_path))
-                for b in bases:
-                    return True, b
-            return True, ""
-    return False, ""
+    bases = entry_file_basenames(e)
+    return True, (bases[0] if bases else "")
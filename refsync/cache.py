@@ -0,0 +1,107 @@
+# refsync/cache.py
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+
+class CacheMiss(LookupError):
+    """Raised in cache-only mode when a response is not in the cache."""
+
+
+def make_key(namespace: str, query: str, params: dict | None = None) -> str:
+    """Stable key from a namespace (provider), normalized query text and params."""
+    q = re.sub(r"\s+", " ", (query or "").strip().lower())
+    raw = json.dumps([namespace, q, sorted((params or {}).items())],
+                     ensure_ascii=False, default=str)
+    return namespace + ":" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """Small persistent key/value cache stored in one SQLite file.
+
+    Values are JSON-serializable objects. Entries older than ``ttl`` seconds
+    are treated as misses; once the stored payload exceeds ``max_bytes`` the
+    least recently used entries are evicted. Use ``":memory:"`` as path for a
+    process-local cache.
+    """
+
+    def __init__(self, path: str, ttl: float | None = None, max_bytes: int | None = None):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY, value TEXT NOT NULL,
+                created REAL NOT NULL, accessed REAL NOT NULL, size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+        """)
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM cache WHERE key = ?",
+                                     (key,)).fetchone()
+            if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value):
+        text = json.dumps(value, ensure_ascii=False)
+        size = len(text.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)", (key, text, now, now, size)
+            )
+            self._size += size - (old[0] if old else 0)
+            if self.max_bytes is not None and self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Drop least recently used rows until we are 10% under the limit
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute("SELECT key, size FROM cache ORDER BY accessed")
+        doomed = []
+        for key, size in rows:
+            if self._size <= target:
+                break
+            doomed.append((key,))
+            self._size -= size
+        self._conn.executemany("DELETE FROM cache WHERE key = ?", doomed)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._size = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "bytes": self._size,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,31 +1,225 @@
 # refsync/cli.py
 import argparse
-from .core import process_folder
+import os
+import sys
+import time
+from .config import (CACHE_DIR, CACHE_TTL_DAYS, CACHE_MAX_MB, DEFAULT_PROVIDERS,
+                     GLOBAL_INDEX_FILENAME, EXTRACT_CACHE_MAX_MB, NEAR_DUP_THRESHOLD,
+                     LOCAL_INDEX_FILENAME)
+from .core import process_folder, process_tree
+from .global_index import GlobalIndex
+from .local_index import LocalIndex, build_index
+from . import metrics
+from .metadata_extraction import configure_extract_cache, extract_cache_stats
+from .ref_client import configure_cache, cache_stats, configure_providers, configure_local_index
+from .watch import watch
 
-def build_parser():
-    p = argparse.ArgumentParser(
-        description="Rename PDFs and sync BibTeX (JabRef-friendly)."
-    )
-    # Path is optional; default = current directory
-    p.add_argument("path", nargs="?", default=".", help="Folder to process (default: current directory)")
+def _add_processing_options(p):
     p.add_argument("--bib", default="library.bib", help="Bib file name to create/update (default: library.bib)")
     p.add_argument("--dry-run", action="store_true", help="Preview actions without writing changes")
     p.add_argument("--verbose", action="store_true", help="Verbose output")
-    # Tracker controls
-    p.add_argument("--no-tracker", action="store_true", help="Disable tracker; process all PDFs not linked in bib")
-    p.add_argument("--rebuild-tracker", action="store_true", help="Rebuild tracker from existing BibTeX links and exit")
+    p.add_argument("--state", choices=["json", "sqlite"], default="json",
+                   help="Tracker backend: json file or sqlite database "
+                        "(migrates the json tracker on first use)")
     # Duplicate handling
     p.add_argument("--dedupe", choices=["skip", "quarantine", "replace"],
                    default="quarantine", help="How to handle duplicate PDFs (default: quarantine)")
     p.add_argument("--duplicates-dir", default="_duplicates", help="Folder name for quarantined duplicates (default: _duplicates)")
     # Skipped PDFs
     p.add_argument("--skipped-dir", default="_skipped", help="Folder name for PDFs skipped due to missing title (default: _skipped)")
+    p.add_argument("--bibtex-source", choices=["local", "doi", "verify"], default="local",
+                   help="Build BibTeX from the Crossref record (local, falls back to doi.org), "
+                        "always fetch it from doi.org (doi), or build locally and cross-check "
+                        "with doi.org (verify)")
+    p.add_argument("--providers", default=",".join(DEFAULT_PROVIDERS),
+                   help="Title search providers in order, from crossref, openalex, s2; later "
+                        "ones are skipped after an exact title match "
+                        f"(default: {','.join(DEFAULT_PROVIDERS)})")
+    p.add_argument("--local-index", default=None, metavar="PATH",
+                   help="Offline metadata index asked before any provider "
+                        f"(default: <cache-dir>/{LOCAL_INDEX_FILENAME}, if built)")
+    p.add_argument("--hedge-ms", type=float, default=None, metavar="MS",
+                   help="Also query the second provider if the first has not answered "
+                        "within MS milliseconds")
+    p.add_argument("--title-candidates", type=int, default=5, metavar="K",
+                   help="Look up at most K locally ranked title guesses per PDF (default: 5)")
+    p.add_argument("--request-budget", type=int, default=10, metavar="N",
+                   help="Stop title lookups for a PDF after N provider requests (default: 10)")
+    p.add_argument("--extract", choices=["layout", "text"], default="layout",
+                   help="First-page reading: top region with font sizes and XMP (layout), "
+                        "or the whole page as plain text (text) (default: layout)")
+    p.add_argument("--hash-algo", choices=["sha256", "blake2b", "sha1", "md5"], default="sha256",
+                   help="Full-content hash used to confirm duplicates (default: sha256)")
+    p.add_argument("--near-dup-threshold", type=float, default=NEAR_DUP_THRESHOLD, metavar="SIM",
+                   help="Treat a bib entry with a linked PDF as the same paper when its title "
+                        "similarity reaches SIM (0-1; above 1 disables fuzzy matching) "
+                        f"(default: {NEAR_DUP_THRESHOLD})")
+    p.add_argument("--library-root", action="append", default=[], metavar="FOLDER",
+                   help="Also treat PDFs already filed in FOLDER as duplicates (repeatable)")
+    p.add_argument("--global-index", default=None, metavar="PATH",
+                   help="Shared content index for --library-root folders "
+                        f"(default: <cache-dir>/{GLOBAL_INDEX_FILENAME})")
+    # HTTP response cache
+    p.add_argument("--cache-dir", default=CACHE_DIR,
+                   help=f"Folder for the persistent lookup cache (default: {CACHE_DIR})")
+    p.add_argument("--no-cache", action="store_true",
+                   help="Do not persist lookup responses between runs")
+    p.add_argument("--cache-only", action="store_true",
+                   help="Offline mode: answer lookups from the cache only; "
+                        "misses are reported as errors")
+    p.add_argument("--cache-ttl-days", type=float, default=CACHE_TTL_DAYS,
+                   help="Treat cached responses older than this as stale "
+                        f"(default: {CACHE_TTL_DAYS})")
+    p.add_argument("--cache-max-mb", type=float, default=CACHE_MAX_MB,
+                   help="Evict least recently used responses above this size "
+                        f"(default: {CACHE_MAX_MB})")
+    p.add_argument("--extract-cache-mb", type=float, default=EXTRACT_CACHE_MAX_MB,
+                   help="Size limit for cached first-page extraction results, reused for "
+                        f"unchanged PDF content (default: {EXTRACT_CACHE_MAX_MB})")
+
+def build_parser():
+    p = argparse.ArgumentParser(
+        description="Rename PDFs and sync BibTeX (JabRef-friendly).",
+        epilog="Run 'refsync watch ROOT' to file PDFs as they arrive, or "
+               "'refsync index build SNAPSHOT' to build an offline metadata index."
+    )
+    # Path is optional; default = current directory
+    p.add_argument("path", nargs="?", default=".",
+                   help="Folder to process (default: current directory)")
+    p.add_argument("--recursive", "-r", action="store_true",
+                   help="Process every folder under path that has a bib file or tracker, "
+                        "in one run")
+    # Tracker controls
+    p.add_argument("--no-tracker", action="store_true",
+                   help="Disable tracker; process all PDFs not linked in bib")
+    p.add_argument("--rebuild-tracker", action="store_true",
+                   help="Rebuild tracker from existing BibTeX links and exit")
+    p.add_argument("--jobs", "-j", type=int, default=1, metavar="N",
+                   help="Extract and look up N PDFs in parallel; renames and bib writes stay "
+                        "ordered (default: 1)")
+    # Bib writing
+    p.add_argument("--bib-flush-every", type=int, default=1, metavar="N",
+                   help="Write the bib file after N pending updates (default: 1)")
+    p.add_argument("--bib-flush-interval", type=float, default=None, metavar="SECONDS",
+                   help="Also write the bib file once SECONDS have passed since the last write")
+    # Instrumentation
+    p.add_argument("--profile", action="store_true",
+                   help="Print per-stage timings (p50/p95) and counters at the end of the run")
+    p.add_argument("--metrics-json", default=None, metavar="PATH",
+                   help="Write per-stage timings and counters for this run to PATH as JSON")
+    p.add_argument("--cprofile", default=None, metavar="PATH",
+                   help="Record the run with cProfile into PATH (pstats format)")
+    _add_processing_options(p)
+    return p
+
+def build_watch_parser():
+    p = argparse.ArgumentParser(
+        prog="refsync watch",
+        description="Keep running and file PDFs as they are added anywhere under ROOT."
+    )
+    p.add_argument("root", nargs="?", default=".",
+                   help="Folder tree to watch (default: current directory)")
+    p.add_argument("--settle", type=float, default=1.0, metavar="SECONDS",
+                   help="Wait until a new file has not changed for SECONDS (default: 1)")
+    p.add_argument("--poll", type=float, default=None, metavar="SECONDS",
+                   help="Scan the tree every SECONDS instead of using inotify")
+    _add_processing_options(p)
+    return p
 
+def build_index_parser():
+    p = argparse.ArgumentParser(
+        prog="refsync index",
+        description="Build an offline metadata index from Crossref or OpenAlex JSONL snapshots."
+    )
+    sub = p.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build", help="Load snapshots into the index (works are updated by DOI)")
+    b.add_argument("snapshots", nargs="+", metavar="SNAPSHOT",
+                   help="JSONL file of Crossref or OpenAlex works, optionally gzipped")
+    b.add_argument("--index", default=None, metavar="PATH",
+                   help=f"Index file (default: <cache-dir>/{LOCAL_INDEX_FILENAME})")
+    b.add_argument("--cache-dir", default=CACHE_DIR,
+                   help=f"Default index location (default: {CACHE_DIR})")
+    b.add_argument("--verbose", action="store_true", help="Report progress")
     return p
 
-def main():
-    args = build_parser().parse_args()
-    process_folder(
+def _configure(parser, args):
+    """Apply provider and cache options; return the global duplicate index, if any."""
+    try:
+        names = [n.strip() for n in args.providers.split(",") if n.strip()]
+        configure_providers(names, hedge_ms=args.hedge_ms)
+    except ValueError as e:
+        parser.error(str(e))
+    configure_cache(
+        None if args.no_cache else args.cache_dir,
+        ttl=args.cache_ttl_days * 86400,
+        max_bytes=int(args.cache_max_mb * 1024 * 1024),
+        cache_only=args.cache_only
+    )
+    configure_extract_cache(None if args.no_cache else args.cache_dir,
+                            max_bytes=int(args.extract_cache_mb * 1024 * 1024))
+    local_path = args.local_index or os.path.join(args.cache_dir, LOCAL_INDEX_FILENAME)
+    if args.local_index and not os.path.exists(local_path):
+        parser.error(f"local index not found: {local_path} (build it with 'refsync index build')")
+    configure_local_index(LocalIndex(local_path) if os.path.exists(local_path) else None)
+    global_index = None
+    if args.library_root or args.global_index:
+        global_index = GlobalIndex(args.global_index
+                                   or os.path.join(args.cache_dir, GLOBAL_INDEX_FILENAME))
+        for root in args.library_root:
+            global_index.import_folder(root)
+    return global_index
+
+def watch_main(argv):
+    parser = build_watch_parser()
+    args = parser.parse_args(argv)
+    global_index = _configure(parser, args)
+    watch(
+        args.root,
+        settle=args.settle,
+        poll_interval=args.poll,
+        duplicates_dir=args.duplicates_dir,
+        skipped_dir=args.skipped_dir,
+        bib_filename=args.bib,
+        verbose=args.verbose,
+        state=args.state,
+        hash_algorithm=args.hash_algo,
+        global_index=global_index,
+        dry_run=args.dry_run,
+        dedupe_mode=args.dedupe,
+        bibtex_source=args.bibtex_source,
+        title_candidates=args.title_candidates,
+        request_budget=args.request_budget,
+        extract_mode=args.extract,
+        near_dup_threshold=args.near_dup_threshold
+    )
+
+def index_main(argv):
+    args = build_index_parser().parse_args(argv)
+    path = args.index or os.path.join(args.cache_dir, LOCAL_INDEX_FILENAME)
+    count = build_index(args.snapshots, path, verbose=args.verbose)
+    print(f"[index] {count} works from {len(args.snapshots)} snapshot(s) -> {path}")
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["watch"]:
+        return watch_main(argv[1:])
+    if argv[:1] == ["index"]:
+        return index_main(argv[1:])
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    global_index = _configure(parser, args)
+    if args.profile or args.metrics_json:
+        metrics.reset()
+        metrics.configure_metrics(True)
+    profiler = None
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+    process = process_tree if args.recursive else process_folder
+    if profiler is not None:
+        profiler.enable()
+    start = time.perf_counter()
+    process(
         args.path,
         bib_filename=args.bib,
         dry_run=args.dry_run,
@@ -34,8 +228,39 @@ def main():
         rebuild_tracker=args.rebuild_tracker,
         dedupe_mode=args.dedupe,
         duplicates_dir=args.duplicates_dir,
-        skipped_dir=args.skipped_dir
+        skipped_dir=args.skipped_dir,
+        bib_flush_every=args.bib_flush_every,
+        bib_flush_interval=args.bib_flush_interval,
+        state=args.state,
+        jobs=args.jobs,
+        bibtex_source=args.bibtex_source,
+        title_candidates=args.title_candidates,
+        request_budget=args.request_budget,
+        hash_algorithm=args.hash_algo,
+        global_index=global_index,
+        extract_mode=args.extract,
+        near_dup_threshold=args.near_dup_threshold
     )
+    wall = time.perf_counter() - start
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.cprofile)
+    stats = cache_stats()
+    if stats["hits"] or stats["misses"]:
+        print(f"[cache] hits={stats['hits']} misses={stats['misses']} "
+              f"hit-rate={stats['hit_rate']:.0%}")
+    stats = extract_cache_stats()
+    if stats and (stats["hits"] or stats["misses"]):
+        print(f"[extract-cache] hits={stats['hits']} misses={stats['misses']} "
+              f"hit-rate={stats['hit_rate']:.0%}")
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json, {"argv": argv, "wall_seconds": round(wall, 4)})
+    if args.profile:
+        print(f"[profile] wall time {wall:.3f}s")
+        print(metrics.format_table())
+        if profiler is not None:
+            import pstats
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
 
 if __name__ == "__main__":
     main()
@@ -1,15 +1,53 @@
+import os
+
 BIB_FILENAME = "library.bib"
 
 # Metadata extraction
 USE_GROBID = False
 GROBID_URL = "http://localhost:8070/api/processHeaderDocument"
 
+# Provider endpoints; REFSYNC_*_URL environment variables point them elsewhere
+# (a mirror, a proxy, or the benchmark stand-in server)
 # Crossref
 USER_AGENT = "ref-sync/0.1 (mailto:you@example.com)"
-CROSSREF_WORKS_URL = "https://api.crossref.org/works"
+CROSSREF_WORKS_URL = os.environ.get("REFSYNC_CROSSREF_URL", "https://api.crossref.org/works")
 # Semantic Scholar
-SEMANTIC_SCHOLAR_URL = "https://api.semanticscholar.org/graph/v1/paper/search"
+SEMANTIC_SCHOLAR_URL = os.environ.get("REFSYNC_S2_SEARCH_URL",
+                                      "https://api.semanticscholar.org/graph/v1/paper/search")
+SEMANTIC_SCHOLAR_PAPER_URL = os.environ.get(
+    "REFSYNC_S2_PAPER_URL", "https://api.semanticscholar.org/graph/v1/paper/{paper_id}")
 # OpenAlex
-OPENALEX_URL = "https://api.openalex.org/works"
+OPENALEX_URL = os.environ.get("REFSYNC_OPENALEX_URL", "https://api.openalex.org/works")
+
+DOI_CONTENT_NEGOTIATION_URL = os.environ.get("REFSYNC_DOI_URL", "https://doi.org/{doi}")
+
+# Title search providers, asked in order until one returns an exact title match
+DEFAULT_PROVIDERS = ("crossref", "s2")
+
+# Per-provider (requests/second, connection pool size). Rates are starting
+# points; they adapt to Retry-After and X-Rate-Limit-* response headers.
+PROVIDER_LIMITS = {
+    "crossref": (10.0, 8),
+    "s2": (1.0, 2),
+    "openalex": (10.0, 8),
+    "doi.org": (5.0, 8),
+}
+
+# Persistent HTTP response cache
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+                         "refsync")
+CACHE_FILENAME = "responses.sqlite"
+CACHE_TTL_DAYS = 30
+CACHE_MAX_MB = 256
+# First-page extraction results, keyed by content fingerprint
+EXTRACT_CACHE_FILENAME = "extract.sqlite"
+EXTRACT_CACHE_MAX_MB = 64
+
+# Cross-folder duplicate index (used when library roots are configured)
+GLOBAL_INDEX_FILENAME = "content-index.sqlite"
+
+# Offline metadata index built by 'refsync index build' (used when present)
+LOCAL_INDEX_FILENAME = "metadata-index.sqlite"
 
-DOI_CONTENT_NEGOTIATION_URL = "https://doi.org/{doi}"
+# Fuzzy title+author dedupe: minimum character-trigram similarity of normalized titles
+NEAR_DUP_THRESHOLD = 0.85
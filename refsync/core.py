@@ -1,27 +1,171 @@
 # refsync/core.py
 import os
-from turtle import title
-from .config import BIB_FILENAME
-from .metadata_extraction import read_pdf_metadata, guess_title_from_first_page, title_from_filename
+from .config import BIB_FILENAME, NEAR_DUP_THRESHOLD
+from .metadata_extraction import (
+    extract_first_page, extract_cache_enabled, guess_title_from_first_page, title_from_filename
+)
+from .title_candidates import plan_title_candidates, years_in_text
 from .ref_client import (
-    best_metadata_match, bibtex_from_doi,
+    match_identifiers, match_title_candidates, bibtex_from_doi, normalize_title,
     first_author_lastname, year_from_item, words_of_title, needs_title_case_fix, fix_title_case
 )
 from .bib_utils import (
-    parse_bibtex_to_entry, upsert_bib_entry, safe_bib_key,
-    add_or_update_file_field, get_linked_pdf_basenames, bib_has_doi_with_file
+    BibLibrary, parse_bibtex_to_entry, entry_from_crossref, upsert_bib_entry, safe_bib_key,
+    add_or_update_file_field, bib_has_doi_with_file, entry_file_basenames, normalize_doi, scan_bib
 )
 from .file_utils import rename_pdf, build_unique_stem
-from .tracker import load_tracker, save_tracker, is_tracked, mark_processed, mark_hash, seen_hash
-from .dedupe import compute_pdf_hash, quarantine_file, ensure_dir
+from .tracker import (get_tracker_store, save_tracker, TRACKER_FILENAME, LEGACY_TRACKER_FILENAME,
+                      SQLITE_TRACKER_FILENAME)
+from .dedupe import Fingerprinter, quarantine_file, ensure_dir
+from .global_index import GlobalIndex
+from .pipeline import Pipeline
+from .metrics import count, timed
 
 
-def process_pdf(pdf_path: str, bib_path: str, dry_run=False, verbose=False,
-                dedupe_mode: str = 'quarantine', duplicates_dir: str = '_duplicates', skipped_dir: str = '_skipped'):
+# Direct identifier lookups tried per PDF before falling back to title search
+IDENTIFIER_BUDGET = 3
+
+
+def _skip_lookup_for_hash(dedupe_mode: str, dry_run: bool) -> bool:
+    # Mirrors the hash-dedupe exits in commit_pdf
+    return dedupe_mode == 'skip' or (dedupe_mode == 'quarantine' and not dry_run)
+
+
+@timed("extract")
+def extract_pdf(pdf_path: str, fingerprinter: Fingerprinter | None = None,
+                extract_mode: str = "layout") -> dict:
+    """Stage 1: fingerprint the file and read its embedded metadata and first page.
+
+    ``extract_mode="layout"`` reads only the top of page 1 with font sizes
+    (plus XMP); ``"text"`` reads the whole first page as plain text. Results
+    come from the extraction cache when the content was seen before.
+    """
+    if fingerprinter is None:
+        fingerprinter = Fingerprinter(get_tracker_store(os.path.dirname(pdf_path)))
+    job = {
+        "pdf_path": pdf_path,
+        "fingerprint": fingerprinter.quick(pdf_path),
+        "fingerprinter": fingerprinter,
+        "log": [],
+    }
+    # The extraction cache outlives the folder, so its hits are confirmed by the
+    # full hash; a new file is only hashed in full if its fingerprint was seen before
+    content_key = fingerprinter.known_full(pdf_path) if extract_cache_enabled() else None
+    job.update(extract_first_page(pdf_path, extract_mode, content_key=content_key,
+                                  fingerprint=job["fingerprint"],
+                                  full_hash=lambda: fingerprinter.full(pdf_path)))
+    return job
+
+
+def _bibtex_entry_for(item: dict, doi: str, bibtex_source: str, log: list) -> dict | None:
+    """BibTeX entry for a matched item: rendered locally from the Crossref record
+    when possible, with doi.org as fallback ("local"), only source ("doi") or
+    cross-check ("verify")."""
+    local = entry_from_crossref(item) if bibtex_source != "doi" else None
+    if local is not None and bibtex_source == "local":
+        return local
+    remote = parse_bibtex_to_entry(bibtex_from_doi(doi))
+    if local is not None and remote:
+        diffs = [k for k in ("ENTRYTYPE", "title", "year", "volume", "number")
+                 if normalize_title(str(local.get(k, "")))
+                 != normalize_title(str(remote.get(k, "")))]
+        if diffs:
+            log.append(f"  [verify] Local BibTeX differs from doi.org in: {', '.join(diffs)}; "
+                       "using doi.org.")
+            return remote
+        return local
+    return remote
+
+
+@timed("lookup")
+def lookup_pdf(job: dict, dedupe_mode: str = 'quarantine', dry_run=False,
+               bibtex_source: str = "local", title_candidates: int = 5,
+               request_budget: int = 10) -> dict:
+    """Stage 2: find the best metadata match and its BibTeX entry (network only, no side effects).
+
+    DOIs, arXiv IDs and ISBNs found during extraction are resolved directly
+    first. Otherwise title hypotheses are ranked locally and only the top
+    ``title_candidates`` are looked up; both share ``request_budget``.
+    """
+    pdf_path = job["pdf_path"]
+    fingerprinter = job["fingerprinter"]
+    if _skip_lookup_for_hash(dedupe_mode, dry_run) and (
+            fingerprinter.find_duplicate(pdf_path)
+            or fingerprinter.find_global_duplicate(pdf_path)):
+        return job  # commit_pdf treats it as a duplicate
+    log = job["log"]
+    candidate_title, candidate_author, first_page = job["title"], job["author"], job["first_page"]
+    item = None
+    stats = {"requests": 0}
+    identifiers = job.get("identifiers") or {}
+    if any(identifiers.values()):
+        evidence = [candidate_title, job.get("layout_title", ""), first_page]
+        matched, item = match_identifiers(identifiers, evidence,
+                                          budget=min(IDENTIFIER_BUDGET, request_budget),
+                                          stats=stats)
+        if item is not None:
+            log.append(f"  Matched by {item['_identifier']}")
+            candidate_title = matched
+    if item is None:
+        candidates = plan_title_candidates(candidate_title, title_from_filename(pdf_path),
+                                           first_page, lines=job.get("lines"),
+                                           top_k=title_candidates,
+                                           layout_title=job.get("layout_title", ""))
+        candidate_title, item = match_title_candidates([c for c, _ in candidates], candidate_author,
+                                                       budget=request_budget - stats["requests"],
+                                                       years=years_in_text(first_page))
+    found_match = item is not None
+
+    job.update(candidate_title=candidate_title, found_match=found_match, item=item, entry=None)
+    if not found_match or not candidate_title:
+        return job
+
+    doi = item.get("DOI")
+    if not doi:
+        log.append("  No DOI; building BibTeX from metadata.")
+        # Build BibTeX entry from item metadata
+        entry = {
+            "ID": safe_bib_key(item),
+            "ENTRYTYPE": "article",
+            "title": item.get("title", [""])[0] if item.get("title") else "",
+            "author": " and ".join(
+                [f"{a.get('family','')}, {a.get('given','')}".strip(", ") for a in item.get("author", []) if a]
+            ),
+            "year": year_from_item(item) or item.get("year", ""),
+            "file": os.path.basename(pdf_path),
+            "_title_match_flag": "true" if item.get("_title_match_flag") else "false",
+            "_manual_entry_flag": "true"
+        }
+    else:
+        entry = _bibtex_entry_for(item, doi, bibtex_source, log)
+        if not entry:
+            log.append("  Failed to parse BibTeX; skipping.")
+            return job
+
+    # Fix uppercased titles
+    if entry and entry.get("title", "") and needs_title_case_fix(entry["title"]):
+        entry["title"] = fix_title_case(entry["title"])
+    job["entry"] = entry
+    return job
+
+
+@timed("commit")
+def commit_pdf(job: dict, bib_path: str, library: BibLibrary, dry_run=False, verbose=False,
+               dedupe_mode: str = 'quarantine', duplicates_dir: str = '_duplicates',
+               skipped_dir: str = '_skipped') -> str:
+    """Stage 3: apply side effects (quarantine, rename, bib upsert, tracker) for one looked-up PDF.
+
+    Only one committer may run per library; it re-checks everything that
+    earlier commits in the same run can change.
+    """
+    pdf_path = job["pdf_path"]
+    fingerprinter = job["fingerprinter"]
+
     def _move_to_skipped() -> None:
         if verbose:
             print("  Moving to skipped folder.")
         if not dry_run:
+            fingerprinter.forget(pdf_path)
             target_dir = os.path.join(os.path.dirname(pdf_path), skipped_dir)
             ensure_dir(target_dir)
             quarantine_file(pdf_path, target_dir)  # keeps original basename, avoids overwrite
@@ -30,145 +174,83 @@ def process_pdf(pdf_path: str, bib_path: str, dry_run=False, verbose=False,
         print(f"[PDF] {pdf_path}")
 
     # Hash-based dedupe
-    h = compute_pdf_hash(pdf_path)
-    if seen_hash(os.path.dirname(pdf_path), h):
+    dup_of = fingerprinter.find_duplicate(pdf_path)
+    if dup_of:
         if verbose:
             print("  [dup] Same file hash seen before.")
         if dedupe_mode == 'skip':
-            return
+            return "duplicate"
         elif dedupe_mode == 'quarantine' and not dry_run:
             dup_dir = os.path.join(os.path.dirname(pdf_path), duplicates_dir)
             # Use the original processed basename from tracker (already in your structured format)
-            data = load_tracker(os.path.dirname(pdf_path))
-            desired = (data.get("hashes", {}) or {}).get(h)  # e.g., "Smith2021DeepLearning.pdf"
+            desired = dup_of  # e.g., "Smith2021DeepLearning.pdf"
+            fingerprinter.forget(pdf_path)
             quarantine_file(pdf_path, dup_dir, new_basename=desired)
-            return
-
-    def _is_plausible_title(title: str) -> bool:
-        # Heuristic: at least 5 words, not all caps, not mostly digits, not too short
-        words = title.split()
-        return (
-            len(words) >= 5 and
-            not title.isupper() and
-            sum(c.isdigit() for c in title) < 5 and
-            sum(c.isalpha() for c in title) > 10
-        )
+            return "duplicate"
 
-    # Metadata & lookup
-    candidate_title, candidate_author, first_page = read_pdf_metadata(pdf_path)
-    found_match = False
-    if _is_plausible_title(candidate_title):
-        item = best_metadata_match(candidate_title, candidate_author)
-        if item and item.get("_title_match_flag"):
-            found_match = True
-    else:
-        candidate_title = title_from_filename(pdf_path)
-        if _is_plausible_title(candidate_title):
-            item = best_metadata_match(candidate_title, candidate_author)
-            if item and item.get("_title_match_flag"):
-                found_match = True
-        else:
-            candidate_title = None
-
-    if not found_match:
-        lines = [line.strip() for line in first_page.split('\n') if line.strip()]
-        max_lines = min(10, len(lines))
-        for start in range(max_lines):
-            # Try with just this line
-            title_try = lines[start]
-            words = title_try.split()
-            if (len(words) >= 4 and
-                sum(c.isdigit() for c in title_try) < 5 and
-                sum(c.isalpha() for c in title_try) > 10 and
-                not any(w.lower() in ["copyright", "doi"] for w in words[:3])
-                ):
-                item = best_metadata_match(title_try, candidate_author)
-                if item and item.get("_title_match_flag"):
-                    candidate_title = title_try
-                    found_match = True
-                    break
-                elif item and not item.get("_title_match_flag"):
-                    # Try with next line added
-                    if start + 1 < len(lines):
-                        combined_title = title_try + " " + lines[start + 1]
-                        item2 = best_metadata_match(combined_title, candidate_author)
-                        if item2 and item2.get("_title_match_flag"):
-                            candidate_title = combined_title
-                            item = item2
-                            found_match = True
-                            break
-                        elif item2 and not item2.get("_title_match_flag"):
-                            # Try with next line added
-                            if start + 1 < len(lines):
-                                combined_title = combined_title + " " + lines[start + 1]
-                                item3 = best_metadata_match(combined_title, candidate_author)
-                                if item3 and item3.get("_title_match_flag"):
-                                    candidate_title = combined_title
-                                    item = item3
-                                    found_match = True
-                                    break
-
-        
-    if not found_match:
+    # Same content already filed in another library folder
+    global_dup = fingerprinter.find_global_duplicate(pdf_path)
+    if global_dup:
+        other_folder, other_name, _ = global_dup
         if verbose:
-            print("  Could not guess a plausible title with good Crossref match; moving to skipped folder.")
+            print(f"  [dup] Same file already in {os.path.join(other_folder, other_name)}")
+        if dedupe_mode == 'skip':
+            return "duplicate"
+        elif dedupe_mode == 'quarantine' and not dry_run:
+            fingerprinter.forget(pdf_path)
+            quarantine_file(pdf_path, os.path.join(os.path.dirname(pdf_path), duplicates_dir),
+                            new_basename=other_name)
+            return "duplicate"
+
+    if verbose:
+        for line in job["log"]:
+            print(line)
+
+    if not job.get("found_match"):
+        if verbose:
+            print("  Could not guess a plausible title with good Crossref match; "
+                  "moving to skipped folder.")
         _move_to_skipped()
-        return
+        return "skipped"
 
-    if not candidate_title:
+    if not job.get("candidate_title"):
         if verbose:
             print("  Could not guess a title; moving to skipped folder.")
         _move_to_skipped()
-        return
+        return "skipped"
 
+    item = job["item"]
+    entry = job["entry"]
+    if not entry:
+        _move_to_skipped()
+        return "skipped"
     doi = item.get("DOI")
-    if not doi:
-        if verbose: print("  No DOI; building BibTeX from metadata.")
-        # Build BibTeX entry from item metadata
-        entry = {
-            "ID": safe_bib_key(item),
-            "ENTRYTYPE": "article",
-            "title": item.get("title", [""])[0] if item.get("title") else "",
-            "author": " and ".join(
-                [f"{a.get('family','')}, {a.get('given','')}".strip(", ") for a in item.get("author", []) if a]
-            ),
-            "year": year_from_item(item) or item.get("year", ""),
-            "file": os.path.basename(pdf_path),
-            "_title_match_flag": "true" if item.get("_title_match_flag") else "false",
-            "_manual_entry_flag": "true"
-        }
-    else:
-        bib_str = bibtex_from_doi(doi)
-        entry = parse_bibtex_to_entry(bib_str)
-        if not entry:
-            if verbose: print("  Failed to parse BibTeX; skipping.")
-            _move_to_skipped()
-            return
-    
-    # Fix uppercased titles
-    if entry and entry.get("title", "") and needs_title_case_fix(entry["title"]):
-        entry["title"] = fix_title_case(entry["title"])
+
     # dedupe
     dup_flag = False
-    has_doi, linked_base = bib_has_doi_with_file(bib_path, doi)
+    has_doi, linked_base = bib_has_doi_with_file(bib_path, doi, library=library)
     if has_doi and linked_base:
         if verbose:
             print(f"  [dup] DOI already in bib with linked file: {linked_base}")
+        dup_flag = True
+    elif not has_doi:
+        # The DOI is not in the bib: look for the same paper filed under another
+        # (or no) DOI by title and author. A bib entry with this DOI but no file
+        # is not a duplicate; it gets linked to this PDF below.
+        e = library.find_by_title_author(entry.get("title", ""), entry.get("author", ""))
+        if e is not None and entry_file_basenames(e):
+            if verbose:
+                print(f"  [debug] Title+author already in bib: {e.get('ID', '')}")
             dup_flag = True
-    elif linked_base:
-        # Check for existing entry with same title and author
-        with open(bib_path, "r", encoding="utf-8") as f:
-            bib_content = f.read()
-        # Parse all entries
-        entries = [parse_bibtex_to_entry(e) for e in bib_content.split("@") if e.strip()]
-        for e in entries:
-            if (
-                e.get("title", "").strip().lower() == entry.get("title", "").strip().lower() and
-                e.get("author", "").strip().lower() == entry.get("author", "").strip().lower()
-            ):
-                if verbose:
-                    print(f"  [debug] Title+author already in bib: {e.get('ID', '')}")
+        else:
+            # Near-duplicate titles (punctuation, ligatures, preprint vs published wording)
+            for score, e in library.find_similar(entry.get("title", ""), entry.get("author", "")):
+                if entry_file_basenames(e):
+                    if verbose:
+                        print(f"  [dup] Near-duplicate title in bib ({score:.2f}): "
+                              f"{e.get('ID', '')}")
                     dup_flag = True
+                    break
     if dup_flag and dedupe_mode == 'quarantine' and not dry_run:
         dup_dir = os.path.join(os.path.dirname(pdf_path), duplicates_dir)
         ensure_dir(dup_dir)  # so we can check existing stems in that folder
@@ -182,8 +264,9 @@ def process_pdf(pdf_path: str, bib_path: str, dry_run=False, verbose=False,
         stem = build_unique_stem(dup_dir, (flast, y), twords)
 
         # Move+rename to something like Smith2021DeepLearning.pdf under _duplicates/
+        fingerprinter.forget(pdf_path)
         quarantine_file(pdf_path, dup_dir, new_basename=stem + ".pdf")
-        return
+        return "duplicate"
     
 
     # Ensure key fields
@@ -210,23 +293,59 @@ def process_pdf(pdf_path: str, bib_path: str, dry_run=False, verbose=False,
     rel_path = os.path.relpath(new_pdf_path, os.path.dirname(bib_path))
     add_or_update_file_field(entry, rel_path)
 
-    upsert_bib_entry(bib_path, entry, dry_run=dry_run)
+    upsert_bib_entry(bib_path, entry, dry_run=dry_run, library=library)
 
     if not dry_run:
-        mark_hash(os.path.dirname(pdf_path), h, os.path.basename(new_pdf_path))
+        fingerprinter.record(pdf_path, new_pdf_path, doi=doi)
 
     if verbose:
         action = "(dry-run) " if dry_run else ""
         print(f"  {action}Renamed -> {os.path.basename(new_pdf_path)}")
         print(f"  {action}Updated {os.path.basename(bib_path)} with key {entry['ID']}")
+    return "renamed"
 
 
-def process_folder(folder_path: str, bib_filename: str = BIB_FILENAME, dry_run=False, verbose=False,
-                   use_tracker: bool = True, rebuild_tracker: bool = False,
-                   dedupe_mode: str = 'quarantine', duplicates_dir: str = '_duplicates', skipped_dir: str = '_skipped'):
+def process_pdf(pdf_path: str, bib_path: str, dry_run=False, verbose=False,
+                dedupe_mode: str = 'quarantine', duplicates_dir: str = '_duplicates',
+                skipped_dir: str = '_skipped',
+                library: BibLibrary | None = None, bibtex_source: str = "local",
+                title_candidates: int = 5, request_budget: int = 10, hash_algorithm: str = "sha256",
+                global_index: GlobalIndex | None = None, fingerprinter: Fingerprinter | None = None,
+                extract_mode: str = "layout", near_dup_threshold: float = NEAR_DUP_THRESHOLD):
+    if library is None:
+        library = BibLibrary(bib_path, near_dup_threshold=near_dup_threshold)
+    if fingerprinter is None:
+        fingerprinter = Fingerprinter(get_tracker_store(os.path.dirname(pdf_path)),
+                                      algorithm=hash_algorithm, global_index=global_index)
+    job = extract_pdf(pdf_path, fingerprinter, extract_mode=extract_mode)
+    job = lookup_pdf(job, dedupe_mode=dedupe_mode, dry_run=dry_run, bibtex_source=bibtex_source,
+                     title_candidates=title_candidates, request_budget=request_budget)
+    return commit_pdf(job, bib_path, library, dry_run=dry_run, verbose=verbose,
+                      dedupe_mode=dedupe_mode, duplicates_dir=duplicates_dir,
+                      skipped_dir=skipped_dir)
+
+
+def _open_folder(folder_path: str, bib_filename: str, verbose: bool, use_tracker: bool,
+                 rebuild_tracker: bool, bib_flush_every: int, bib_flush_interval: float | None,
+                 state: str, hash_algorithm: str, global_index: GlobalIndex | None,
+                 near_dup_threshold: float = NEAR_DUP_THRESHOLD) -> dict | None:
+    """Load one folder's bib and tracker and list its PDFs to process.
+
+    Returns None after a tracker rebuild. Linked files and DOIs come from a
+    streaming scan of the bib; it is only fully parsed when there are PDFs
+    to file.
+    """
     print(f"Processing folder: {folder_path}")  # Add this line
+    tracker = get_tracker_store(folder_path, backend=state)
     bib_path = os.path.join(folder_path, bib_filename)
-    linked = get_linked_pdf_basenames(bib_path)
+    linked, dois = set(), {}
+    if os.path.exists(bib_path):
+        for rec in scan_bib(bib_path, ("doi", "file")):
+            bases = entry_file_basenames(rec)
+            linked.update(bases)
+            if rec.get("doi"):
+                for base in bases:
+                    dois[base] = normalize_doi(rec["doi"])
 
     if rebuild_tracker:
         processed = []
@@ -236,8 +355,9 @@ def process_folder(folder_path: str, bib_filename: str = BIB_FILENAME, dry_run=F
         save_tracker(folder_path, {"processed": processed, "hashes": {}})
         if verbose:
             print(f"[tracker] Rebuilt with {len(processed)} entries from BibTeX links.")
-        return
+        return None
 
+    todo = []
     for name in sorted(os.listdir(folder_path)):
         if not name.lower().endswith('.pdf'):
             continue
@@ -245,16 +365,198 @@ def process_folder(folder_path: str, bib_filename: str = BIB_FILENAME, dry_run=F
             if verbose:
                 print(f"[skip] Already linked in {bib_filename}: {name}")
             continue
-        if use_tracker and is_tracked(folder_path, name):
+        if use_tracker and tracker.is_tracked(name):
             if verbose:
                 print(f"[skip] Listed in tracker: {name}")
             continue
+        todo.append(os.path.join(folder_path, name))
+
+    if global_index is not None:
+        global_index.import_folder(folder_path, tracker, dois=dois)
+    library = None
+    if todo:
+        library = BibLibrary(bib_path, flush_every=bib_flush_every,
+                             flush_interval=bib_flush_interval,
+                             near_dup_threshold=near_dup_threshold)
+    return {
+        "tracker": tracker,
+        "bib_path": bib_path,
+        "library": library,
+        "fingerprinter": Fingerprinter(tracker, algorithm=hash_algorithm,
+                                       global_index=global_index),
+        "todo": todo,
+    }
+
+
+def _close_folder(folder: dict, dry_run: bool):
+    if not dry_run and folder["library"] is not None:
+        folder["library"].flush()
+    folder["tracker"].flush()
+    folder["tracker"].before_save = None
+
+
+def _run_folders(folders, pipeline: Pipeline, dry_run: bool, verbose: bool, use_tracker: bool,
+                 dedupe_mode: str, duplicates_dir: str, skipped_dir: str, bibtex_source: str,
+                 title_candidates: int, request_budget: int, extract_mode: str = "layout"):
+    """Stream the PDFs of every opened folder through one pipeline, committing in order.
+
+    A folder's bib and tracker are flushed as soon as its last PDF is committed,
+    while the pools are already working on the next folder. Until then the
+    tracker writes pending bib changes first whenever it saves, so a crash
+    never leaves a renamed PDF tracked but missing from the bib.
+    """
+    def _items():
+        for folder in folders:
+            if folder is None:
+                continue
+            if not folder["todo"]:
+                _close_folder(folder, dry_run)
+                continue
+            if not dry_run:
+                folder["tracker"].before_save = folder["library"].flush
+            for pdf_path in folder["todo"]:
+                yield folder, pdf_path
+
+    stages = pipeline.run(
+        _items(),
+        lambda item: extract_pdf(item[1], item[0]["fingerprinter"], extract_mode=extract_mode),
+        lambda job: lookup_pdf(job, dedupe_mode=dedupe_mode, dry_run=dry_run,
+                               bibtex_source=bibtex_source, title_candidates=title_candidates,
+                               request_budget=request_budget),
+    )
+    current = None
+    try:
+        for (folder, pdf_path), fut in stages:
+            if folder is not current:
+                if current is not None:
+                    _close_folder(current, dry_run)
+                current = folder
+            name = os.path.basename(pdf_path)
+            tracker = folder["tracker"]
+            try:
+                outcome = commit_pdf(fut.result(), folder["bib_path"], folder["library"],
+                                     dry_run=dry_run, verbose=verbose, dedupe_mode=dedupe_mode,
+                                     duplicates_dir=duplicates_dir, skipped_dir=skipped_dir)
+                count(f"pdf.{outcome}")
+                if use_tracker and not dry_run:
+                    tracker.mark_processed(name)
+                    tracker.set_outcome(name, outcome)
+            except Exception as e:
+                count("pdf.error")
+                print(f"  !! Error on {pdf_path}: {e}")
+                if use_tracker and not dry_run:
+                    tracker.set_outcome(name, "error", str(e))
+    finally:
+        if current is not None:
+            _close_folder(current, dry_run)
+
+
+def process_folder(folder_path: str, bib_filename: str = BIB_FILENAME, dry_run=False, verbose=False,
+                   use_tracker: bool = True, rebuild_tracker: bool = False,
+                   dedupe_mode: str = 'quarantine', duplicates_dir: str = '_duplicates',
+                   skipped_dir: str = '_skipped',
+                   bib_flush_every: int = 1, bib_flush_interval: float | None = None,
+                   state: str = "json", jobs: int = 1, pipeline: Pipeline | None = None,
+                   bibtex_source: str = "local", title_candidates: int = 5,
+                   request_budget: int = 10,
+                   hash_algorithm: str = "sha256", global_index: GlobalIndex | None = None,
+                   extract_mode: str = "layout", near_dup_threshold: float = NEAR_DUP_THRESHOLD):
+    """Process every untracked, unlinked PDF in a folder.
 
-        pdf_path = os.path.join(folder_path, name)
+    With ``jobs > 1`` (or a shared ``pipeline``) hashing/extraction and
+    metadata lookups run in worker pools while renames, bib upserts and
+    tracker updates stay in this thread, in sorted filename order.
+
+    With a ``global_index``, PDFs already filed in other indexed folders are
+    treated as duplicates, and this folder's files are added to the index.
+    """
+    folder = _open_folder(folder_path, bib_filename, verbose, use_tracker, rebuild_tracker,
+                          bib_flush_every, bib_flush_interval, state, hash_algorithm, global_index,
+                          near_dup_threshold)
+    if folder is None:
+        return
+    own_pipeline = pipeline is None
+    if own_pipeline:
+        pipeline = Pipeline(jobs)
+    try:
+        _run_folders([folder], pipeline, dry_run, verbose, use_tracker, dedupe_mode, duplicates_dir,
+                     skipped_dir, bibtex_source, title_candidates, request_budget, extract_mode)
+    finally:
+        if own_pipeline:
+            pipeline.close()
+
+
+def _library_markers(bib_filename: str) -> set[str]:
+    return {bib_filename, TRACKER_FILENAME, LEGACY_TRACKER_FILENAME, SQLITE_TRACKER_FILENAME}
+
+
+def is_library_folder(folder: str, bib_filename: str = BIB_FILENAME) -> bool:
+    """True if ``folder`` holds a bib file or a tracker, as in :func:`find_library_folders`."""
+    return any(os.path.isfile(os.path.join(folder, name))
+               for name in _library_markers(bib_filename))
+
+
+def find_library_folders(root: str, bib_filename: str = BIB_FILENAME,
+                         exclude: tuple[str, ...] = ('_duplicates', '_skipped')) -> list[str]:
+    """Folders under ``root`` (including it) that hold a bib file or a tracker, sorted.
+
+    Hidden directories, symlinked directories and the ``exclude`` names
+    (quarantine folders) are not descended into.
+    """
+    markers = _library_markers(bib_filename)
+    found = []
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        is_library = False
         try:
-            process_pdf(pdf_path, bib_path, dry_run=dry_run, verbose=verbose,
-                        dedupe_mode=dedupe_mode, duplicates_dir=duplicates_dir, skipped_dir=skipped_dir)
-            if use_tracker and not dry_run:
-                mark_processed(folder_path, name)
-        except Exception as e:
-            print(f"  !! Error on {pdf_path}: {e}")
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if entry.name in markers and entry.is_file():
+                        is_library = True
+                    elif (entry.is_dir(follow_symlinks=False) and not entry.name.startswith('.')
+                          and entry.name not in exclude):
+                        stack.append(entry.path)
+        except OSError as e:
+            print(f"  !! Cannot scan {folder}: {e}")
+            continue
+        if is_library:
+            found.append(folder)
+    return sorted(found)
+
+
+def process_tree(root: str, bib_filename: str = BIB_FILENAME, dry_run=False, verbose=False,
+                 use_tracker: bool = True, rebuild_tracker: bool = False,
+                 dedupe_mode: str = 'quarantine', duplicates_dir: str = '_duplicates',
+                 skipped_dir: str = '_skipped',
+                 bib_flush_every: int = 1, bib_flush_interval: float | None = None,
+                 state: str = "json", jobs: int = 1, pipeline: Pipeline | None = None,
+                 bibtex_source: str = "local", title_candidates: int = 5,
+                 request_budget: int = 10,
+                 hash_algorithm: str = "sha256", global_index: GlobalIndex | None = None,
+                 extract_mode: str = "layout",
+                 near_dup_threshold: float = NEAR_DUP_THRESHOLD) -> list[str]:
+    """Process every library folder under ``root`` in one run.
+
+    All folders share one pipeline (and the process-wide HTTP sessions and
+    caches); PDFs from the next folder are extracted and looked up while the
+    previous one is still being committed. Returns the folders processed.
+    """
+    folders = find_library_folders(root, bib_filename, exclude=(duplicates_dir, skipped_dir))
+    if global_index is not None:
+        for folder_path in folders:
+            global_index.import_folder(folder_path)
+    opened = (_open_folder(f, bib_filename, verbose, use_tracker, rebuild_tracker, bib_flush_every,
+                           bib_flush_interval, state, hash_algorithm, global_index,
+                           near_dup_threshold)
+              for f in folders)
+    own_pipeline = pipeline is None
+    if own_pipeline:
+        pipeline = Pipeline(jobs)
+    try:
+        _run_folders(opened, pipeline, dry_run, verbose, use_tracker, dedupe_mode, duplicates_dir,
+                     skipped_dir, bibtex_source, title_candidates, request_budget, extract_mode)
+    finally:
+        if own_pipeline:
+            pipeline.close()
+    return folders
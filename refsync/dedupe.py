@@ -1,17 +1,177 @@
 # refsync/dedupe.py
 import os
 import hashlib
+import mmap
 import shutil
+import threading
+from .file_utils import get_stem_registry, forget_pdf
+from .metrics import count, timed
 
-def compute_pdf_hash(path: str, chunk_size: int = 1 << 20) -> str:
-    h = hashlib.sha256()
+HASH_ALGORITHMS = ("sha256", "blake2b", "sha1", "md5")
+PARTIAL_BYTES = 64 * 1024
+
+def hash_key(digest: str, algorithm: str = "sha256") -> str:
+    # sha256 keys stay bare so existing trackers keep matching
+    return digest if algorithm == "sha256" else f"{algorithm}:{digest}"
+
+@timed("hash.full")
+def compute_pdf_hash(path: str, chunk_size: int = 1 << 24, algorithm: str = "sha256") -> str:
+    """Full-content hash, read through mmap (no copies into Python buffers)."""
+    h = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        count("bytes_hashed", size)
+        if size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    for off in range(0, size, chunk_size):
+                        h.update(view[off:off + chunk_size])
+                finally:
+                    view.release()
+    return hash_key(h.hexdigest(), algorithm)
+
+@timed("hash.fingerprint")
+def quick_fingerprint(path: str) -> str:
+    """Cheap first-tier fingerprint: file size plus a hash of the first and last 64 KiB."""
     with open(path, "rb") as f:
-        while True:
-            chunk = f.read(chunk_size)
-            if not chunk:
-                break
-            h.update(chunk)
-    return h.hexdigest()
+        size = os.fstat(f.fileno()).st_size
+        count("bytes_fingerprinted", min(size, 2 * PARTIAL_BYTES))
+        h = hashlib.sha256(f.read(PARTIAL_BYTES))
+        if size > PARTIAL_BYTES:
+            f.seek(max(PARTIAL_BYTES, size - PARTIAL_BYTES))
+            h.update(f.read(PARTIAL_BYTES))
+    return f"{size}:{h.hexdigest()[:32]}"
+
+def stat_key(path: str, st: os.stat_result | None = None) -> str:
+    st = st or os.stat(path)
+    return f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}|{st.st_ino}"
+
+
+class Fingerprinter:
+    """Tiered duplicate detection against one folder's tracker.
+
+    The size + head/tail fingerprint is compared first; a full hash is only
+    computed when that fingerprint collides with a tracked file. Both tiers
+    are cached in the tracker under (path, size, mtime, inode), so unchanged
+    files are never re-read. An optional ``global_index`` extends the check
+    to files filed in other library folders.
+    """
+
+    def __init__(self, tracker, algorithm: str = "sha256", global_index=None):
+        if algorithm not in HASH_ALGORITHMS:
+            raise ValueError(f"Unsupported hash algorithm: {algorithm}")
+        self.tracker = tracker
+        self.algorithm = algorithm
+        self.global_index = global_index
+        self._legacy_checked = False
+        self._legacy_unresolved = False
+        self._legacy_lock = threading.Lock()
+
+    def _cached(self, path: str, field: str, compute) -> str:
+        key = stat_key(path)
+        cached = self.tracker.cached_hashes(key) or {}
+        value = cached.get(field)
+        if value is None:
+            value = compute(path)
+            self.tracker.cache_hashes(key, {**cached, field: value})
+        return value
+
+    def quick(self, path: str) -> str:
+        return self._cached(path, "quick", quick_fingerprint)
+
+    def full(self, path: str, algorithm: str | None = None) -> str:
+        algo = algorithm or self.algorithm
+        return self._cached(path, algo, lambda p: compute_pdf_hash(p, algorithm=algo))
+
+    def known_full(self, path: str) -> str | None:
+        """Full hash of ``path`` if the hash cache already holds it; never reads the file."""
+        return (self.tracker.cached_hashes(stat_key(path)) or {}).get(self.algorithm)
+
+    def _check_legacy(self):
+        # Trackers written before fingerprints only hold full hashes; backfill
+        # fingerprints for files still present, and fall back to full hashing
+        # if some can no longer be fingerprinted. Other lookup workers wait
+        # until the backfill is complete.
+        if self._legacy_checked:
+            return
+        with self._legacy_lock:
+            if self._legacy_checked:
+                return
+            for full, basename in self.tracker.legacy_hashes():
+                path = os.path.join(self.tracker.folder_path, basename)
+                if os.path.exists(path):
+                    self.tracker.mark_quick(self.quick(path), basename)
+                else:
+                    self._legacy_unresolved = True
+            self._legacy_checked = True
+
+    def find_duplicate(self, path: str) -> str | None:
+        """Basename of the tracked file with the same content as ``path``, if any.
+
+        Runs in the lookup stage, so apart from the stat-keyed hash cache (and a
+        legacy tracker's one-time backfill) it leaves the tracker untouched.
+        """
+        self._check_legacy()
+        candidate = self.tracker.quick_basename(self.quick(path))
+        if candidate is None and not self._legacy_unresolved:
+            return None
+        algos = [self.algorithm]
+        if self._legacy_unresolved and self.algorithm != "sha256":
+            algos.append("sha256")
+        for algo in algos:
+            seen = self.tracker.hash_basename(self.full(path, algo))
+            if seen:
+                return seen
+        if candidate is not None:
+            cand_path = os.path.join(self.tracker.folder_path, candidate)
+            if os.path.exists(cand_path):
+                if self.full(cand_path) == self.full(path):
+                    return candidate
+        return None
+
+    def find_global_duplicate(self, path: str) -> tuple[str, str, str | None] | None:
+        """(folder, basename, DOI) of a same-content file in another indexed folder, if any."""
+        if self.global_index is None:
+            return None
+        here = os.path.abspath(self.tracker.folder_path)
+        for folder, basename, doi, cand_full in self.global_index.lookup(self.quick(path)):
+            if folder == here:
+                continue
+            cand_path = os.path.join(folder, basename)
+            if not os.path.exists(cand_path):
+                self.global_index.remove(folder, basename)
+                continue
+            if cand_full is None:
+                cand_full = compute_pdf_hash(cand_path, algorithm=self.algorithm)
+                self.global_index.add(folder, basename, full=cand_full)
+            algo = cand_full.split(":", 1)[0] if ":" in cand_full else "sha256"
+            if self.full(path, algo) == cand_full:
+                return folder, basename, doi
+        return None
+
+    def record(self, old_path: str, new_path: str, doi: str | None = None):
+        """Remember the fingerprint (and full hash, if known) of a file after renaming it."""
+        basename = os.path.basename(new_path)
+        st = os.stat(new_path)
+        old_key = stat_key(old_path, st)  # a rename keeps size, mtime and inode
+        cached = self.tracker.cached_hashes(old_key) or {}
+        quick = cached.get("quick") or quick_fingerprint(new_path)
+        self.tracker.mark_quick(quick, basename)
+        for algo in HASH_ALGORITHMS:
+            if cached.get(algo):
+                self.tracker.mark_hash(cached[algo], basename)
+        if self.global_index is not None:
+            self.global_index.add(self.tracker.folder_path, basename, fingerprint=quick,
+                                  full=cached.get(self.algorithm), doi=doi)
+        self.tracker.forget_hashes(old_key)
+        self.tracker.cache_hashes(stat_key(new_path, st), {**cached, "quick": quick})
+
+    def forget(self, path: str):
+        """Drop cached hashes for a file that is about to leave the folder."""
+        if os.path.exists(path):
+            self.tracker.forget_hashes(stat_key(path))
+
 
 def ensure_dir(path: str):
     os.makedirs(path, exist_ok=True)
@@ -31,12 +191,27 @@ def quarantine_file(src_path: str, duplicates_dir: str, new_basename: str | None
         ext = os.path.splitext(src_path)[1] or ".pdf"
 
     dst = os.path.join(duplicates_dir, name + ext)
+    if os.path.abspath(dst) == os.path.abspath(src_path):
+        return dst
 
-    # Avoid overwriting collisions
-    i = 2
-    while os.path.exists(dst) and os.path.abspath(dst) != os.path.abspath(src_path):
-        dst = os.path.join(duplicates_dir, f"{name}_{i}{ext}")
-        i += 1
+    registry = None
+    if ext.lower() == ".pdf":
+        # Free name from the directory's stem registry (reserved atomically)
+        registry = get_stem_registry(duplicates_dir)
+        name = registry.reserve(name)
+        dst = os.path.join(duplicates_dir, name + ext)
+    else:
+        # Avoid overwriting collisions
+        i = 2
+        while os.path.exists(dst):
+            dst = os.path.join(duplicates_dir, f"{name}_{i}{ext}")
+            i += 1
 
-    shutil.move(src_path, dst)
+    try:
+        shutil.move(src_path, dst)
+    except BaseException:
+        if registry is not None:
+            registry.release(name)
+        raise
+    forget_pdf(src_path)
     return dst
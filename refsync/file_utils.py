@@ -1,12 +1,128 @@
 import os
 import re
+import tempfile
+import threading
 STOPWORDS = {"a", "an", "the", "of", "in", "on", "for", "and", "to", "at", "by", "with", "from"}
 
 
+def atomic_write_text(path: str, text: str, encoding: str = "utf-8"):
+    """Write text to a temp file next to path, then rename it over path.
+
+    A crash mid-write leaves either the old file or the new one, never a
+    truncated mix.
+    """
+    _atomic_write(path, text, "w", encoding)
+
+def atomic_write_bytes(path: str, data: bytes):
+    """Like ``atomic_write_text``, for bytes."""
+    _atomic_write(path, data, "wb", None)
+
+def _atomic_write(path: str, data, mode: str, encoding: str | None):
+    parent = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=parent)
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
 def sanitize_stem(stem: str) -> str:
     stem = re.sub(r"[^A-Za-z0-9]", "", stem) or "unnamed"
     return stem
 
+class StemRegistry:
+    """Lowercased stems of the PDFs in one directory, listed once with os.scandir.
+
+    Renames and moves made through refsync update it, so picking a free name
+    needs no further directory listings. Reservation is atomic under a lock,
+    so concurrent workers never receive the same stem; each candidate is
+    still checked with one ``os.path.exists`` in case another program created
+    the file since the scan.
+    """
+
+    def __init__(self, folder_path: str):
+        self.folder_path = folder_path
+        self._lock = threading.Lock()
+        self._stems: set[str] = set()
+        try:
+            with os.scandir(folder_path) as it:
+                for entry in it:
+                    stem, ext = os.path.splitext(entry.name)
+                    if ext.lower() == ".pdf":
+                        self._stems.add(stem.lower())
+        except FileNotFoundError:
+            pass
+
+    def __contains__(self, stem: str) -> bool:
+        with self._lock:
+            return stem.lower() in self._stems
+
+    def _taken(self, stem: str) -> bool:
+        if stem.lower() in self._stems:
+            return True
+        if os.path.exists(os.path.join(self.folder_path, stem + ".pdf")):
+            self._stems.add(stem.lower())
+            return True
+        return False
+
+    def free_stem(self, stem: str) -> str:
+        """``stem`` or the first free ``stem_2``, ``stem_3``, ... without reserving it."""
+        with self._lock:
+            candidate, i = stem, 2
+            while self._taken(candidate):
+                candidate, i = f"{stem}_{i}", i + 1
+            return candidate
+
+    def reserve(self, stem: str) -> str:
+        """Atomically claim ``stem`` or the first free suffixed variant; return the claimed one."""
+        with self._lock:
+            candidate, i = stem, 2
+            while self._taken(candidate):
+                candidate, i = f"{stem}_{i}", i + 1
+            self._stems.add(candidate.lower())
+            return candidate
+
+    def release(self, stem: str):
+        """Forget a stem whose file left the directory (or whose reservation was not used)."""
+        with self._lock:
+            self._stems.discard(stem.lower())
+
+
+_REGISTRIES: dict[str, StemRegistry] = {}
+_REGISTRIES_LOCK = threading.Lock()
+
+def get_stem_registry(folder_path: str) -> StemRegistry:
+    """Cached StemRegistry for a directory, scanned on first use."""
+    key = os.path.abspath(folder_path)
+    with _REGISTRIES_LOCK:
+        registry = _REGISTRIES.get(key)
+        if registry is None:
+            registry = _REGISTRIES[key] = StemRegistry(folder_path)
+        return registry
+
+def drop_stem_registries(folder_path: str):
+    """Forget the registries of a directory and its subdirectories (re-scanned on next use).
+
+    For long-running processes, where files may be deleted or moved behind
+    the registries' back.
+    """
+    prefix = os.path.join(os.path.abspath(folder_path), "")
+    with _REGISTRIES_LOCK:
+        for key in [k for k in _REGISTRIES if os.path.join(k, "").startswith(prefix)]:
+            del _REGISTRIES[key]
+
+def forget_pdf(path: str):
+    """Drop a PDF that was moved away from the registry of its directory, if one is loaded."""
+    stem, ext = os.path.splitext(os.path.basename(path))
+    registry = _REGISTRIES.get(os.path.abspath(os.path.dirname(path)))
+    if registry is not None and ext.lower() == ".pdf":
+        registry.release(stem)
+
 def rename_pdf(pdf_path: str, stem_components: tuple[str, str, str], dry_run=False) -> tuple[str, str]:
     parent = os.path.dirname(pdf_path)
     stem = "".join(stem_components).strip()
@@ -17,18 +133,18 @@ def rename_pdf(pdf_path: str, stem_components: tuple[str, str, str], dry_run=Fal
     if os.path.abspath(new_path) == os.path.abspath(pdf_path):
         return pdf_path, stem
 
-    if os.path.exists(new_path):
-        i = 2
-        while True:
-            alt = os.path.join(parent, f"{stem}_{i}.pdf")
-            if not os.path.exists(alt):
-                new_path = alt
-                break
-            i += 1
+    registry = get_stem_registry(parent)
+    if dry_run:
+        return os.path.join(parent, registry.free_stem(stem) + ".pdf"), stem
 
-    if not dry_run:
+    final = registry.reserve(stem)
+    new_path = os.path.join(parent, final + ".pdf")
+    try:
         os.rename(pdf_path, new_path)
-
+    except BaseException:
+        registry.release(final)
+        raise
+    forget_pdf(pdf_path)
     return new_path, stem
 
 def existing_pdf_stems(folder_path: str) -> set[str]:
@@ -46,7 +162,7 @@ def build_unique_stem(folder_path: str, prefix_components: tuple[str, str], titl
     """
     last, year = prefix_components
     words = [w for w in title_words if w] or ["Untitled"]
-    existing = existing_pdf_stems(folder_path)
+    existing = get_stem_registry(folder_path)
 
     # Handle StopWords
     if words and words[0].lower() in STOPWORDS and len(words) > 1:
@@ -54,7 +170,7 @@ def build_unique_stem(folder_path: str, prefix_components: tuple[str, str], titl
     # try 1..max_words words
     for k in range(1, min(max_words, len(words)) + 1):
         stem = sanitize_stem(f"{last}{year}{''.join(words[:k])}")
-        if stem.lower() not in existing:
+        if stem not in existing:
             return stem
     # if all collide, append an index-free version and let rename_pdf handle suffixing
     return sanitize_stem(f"{last}{year}{''.join(words[:max_words])}")
@@ -0,0 +1,132 @@
+# refsync/global_index.py
+import os
+import sqlite3
+import threading
+from .dedupe import quick_fingerprint
+from .tracker import (load_tracker, TRACKER_FILENAME, LEGACY_TRACKER_FILENAME,
+                      SQLITE_TRACKER_FILENAME)
+
+_BATCH = 500
+_UPSERT = (
+    "INSERT INTO files VALUES (?, ?, ?, ?, ?) ON CONFLICT (folder, basename) DO UPDATE SET "
+    "fingerprint = COALESCE(excluded.fingerprint, fingerprint), "
+    "full = COALESCE(excluded.full, full), doi = COALESCE(excluded.doi, doi)"
+)
+# (folder, basename, doi, full hash) of a filed PDF
+_Hit = tuple[str, str, str | None, str | None]
+
+
+class GlobalIndex:
+    """Content index shared by several library folders, in one SQLite file.
+
+    Maps content fingerprints (and full hashes, when known) to the folder,
+    basename and DOI of the filed PDF, so a paper already filed in another
+    folder is recognised without re-hashing anything. Folders are imported
+    from their trackers and updated as files are processed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                folder TEXT NOT NULL, basename TEXT NOT NULL,
+                fingerprint TEXT, full TEXT, doi TEXT,
+                PRIMARY KEY (folder, basename)
+            );
+            CREATE INDEX IF NOT EXISTS files_fingerprint ON files (fingerprint);
+            CREATE INDEX IF NOT EXISTS files_full ON files (full);
+            CREATE TABLE IF NOT EXISTS folders (folder TEXT PRIMARY KEY, tracker_mtime REAL);
+        """)
+
+    @staticmethod
+    def _folder(folder: str) -> str:
+        return os.path.abspath(folder)
+
+    def add(self, folder: str, basename: str, fingerprint: str | None = None,
+            full: str | None = None, doi: str | None = None):
+        """Insert or update a filed PDF; fields left as None keep their stored value."""
+        with self._lock:
+            self._conn.execute(
+                _UPSERT,
+                (self._folder(folder), basename, fingerprint, full, doi or None),
+            )
+
+    def remove(self, folder: str, basename: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM files WHERE folder = ? AND basename = ?",
+                               (self._folder(folder), basename))
+
+    def _select(self, column: str, keys: list[str]) -> dict[str, list[_Hit]]:
+        out: dict[str, list] = {}
+        with self._lock:
+            for i in range(0, len(keys), _BATCH):
+                chunk = keys[i:i + _BATCH]
+                rows = self._conn.execute(
+                    f"SELECT {column}, folder, basename, doi, full FROM files "
+                    f"WHERE {column} IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                for key, folder, basename, doi, full in rows:
+                    out.setdefault(key, []).append((folder, basename, doi, full))
+        return out
+
+    def lookup_many(self, fingerprints: list[str]) -> dict[str, list[_Hit]]:
+        """fingerprint -> [(folder, basename, doi, full hash)] for every known fingerprint."""
+        return self._select("fingerprint", list(dict.fromkeys(fingerprints)))
+
+    def lookup(self, fingerprint: str) -> list[_Hit]:
+        return self.lookup_many([fingerprint]).get(fingerprint, [])
+
+    def import_folder(self, folder: str, tracker=None, dois: dict[str, str] | None = None) -> bool:
+        """Bulk-load a folder's tracker (fingerprints and full hashes) into the index.
+
+        Without a live ``tracker`` the folder's tracker file is read, and the
+        import is skipped if that file has not changed since the last one.
+        ``dois`` optionally maps lowercased basenames to DOIs.
+        """
+        folder = self._folder(folder)
+        names = (SQLITE_TRACKER_FILENAME, SQLITE_TRACKER_FILENAME + "-wal",
+                 TRACKER_FILENAME, LEGACY_TRACKER_FILENAME)
+        files = [os.path.join(folder, n) for n in names]
+        mtime = max((os.path.getmtime(f) for f in files if os.path.exists(f)), default=None)
+        if tracker is None:
+            if mtime is None:
+                return False
+            with self._lock:
+                row = self._conn.execute("SELECT tracker_mtime FROM folders WHERE folder = ?",
+                                         (folder,)).fetchone()
+            if row is not None and row[0] == mtime:
+                return False
+            data = load_tracker(folder)
+        else:
+            data = tracker.as_dict()
+        dois = dois or {}
+        rows: dict[str, list] = {}
+        for fp, basename in (data.get("quick") or {}).items():
+            rows.setdefault(basename, [None, None])[0] = fp
+        for full, basename in (data.get("hashes") or {}).items():
+            rows.setdefault(basename, [None, None])[1] = full
+        for basename, row in rows.items():
+            # Trackers from before fingerprints only hold full hashes
+            path = os.path.join(folder, basename)
+            if row[0] is None and os.path.exists(path):
+                row[0] = quick_fingerprint(path)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                _UPSERT,
+                ((folder, b, fp, full, dois.get(b.lower())) for b, (fp, full) in rows.items()),
+            )
+            self._conn.execute("INSERT OR REPLACE INTO folders VALUES (?, ?)",
+                               (folder, mtime or 0.0))
+            self._conn.execute("COMMIT")
+        return True
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,73 @@
+# refsync/identifiers.py
+import re
+
+# DOI: 10.<registrant>/<suffix>; the suffix runs to whitespace or a delimiter
+_DOI_RE = re.compile(r"\b(10\.\d{4,9}/[^\s\"'<>{}\[\]]+)", re.I)
+# New-style (2007+) and old-style arXiv identifiers, with or without version
+_ARXIV_NEW_RE = re.compile(r"(?:arxiv\s*:\s*|arxiv\.org/(?:abs|pdf)/)(\d{4}\.\d{4,5})(v\d+)?", re.I)
+_ARXIV_OLD_RE = re.compile(
+    r"(?:arxiv\s*:\s*|arxiv\.org/(?:abs|pdf)/)([a-z][a-z\-]+(?:\.[A-Z]{2})?/\d{7})(v\d+)?", re.I)
+_ISBN_RE = re.compile(r"\bISBN(?:-1[03])?\s*:?\s*((?:97[89][\s\-]?)?(?:\d[\s\-]?){9}[\dX])\b", re.I)
+
+
+def clean_doi(doi: str) -> str:
+    """Strip URL/label prefixes and trailing punctuation picked up from running text."""
+    doi = re.sub(r"^(?:https?://(?:dx\.)?doi\.org/|doi\s*:\s*)", "", doi.strip(), flags=re.I)
+    while doi and doi[-1] in ".,;:":
+        doi = doi[:-1]
+    # A closing parenthesis belongs to the DOI only if it has an opening one
+    while doi.endswith(")") and doi.count("(") < doi.count(")"):
+        doi = doi[:-1]
+    return doi
+
+def is_valid_doi(doi: str) -> bool:
+    return bool(re.fullmatch(r"10\.\d{4,9}/\S+", doi)) and len(doi) < 200
+
+def is_valid_arxiv(arxiv_id: str) -> bool:
+    m = re.fullmatch(r"(\d{2})(\d{2})\.(\d{4,5})", arxiv_id)
+    if m:
+        # YYMM; five-digit numbers started in 2015
+        return 1 <= int(m.group(2)) <= 12 and (len(m.group(3)) == 4 or int(m.group(1)) >= 15)
+    return bool(re.fullmatch(r"[a-z][a-z\-]+(?:\.[A-Z]{2})?/\d{7}", arxiv_id, re.I))
+
+def is_valid_isbn(isbn: str) -> bool:
+    """ISBN-10 or ISBN-13 with a correct check digit (``isbn`` without separators)."""
+    if len(isbn) == 10 and re.fullmatch(r"\d{9}[\dX]", isbn):
+        total = sum((10 - i) * (10 if c == "X" else int(c)) for i, c in enumerate(isbn))
+        return total % 11 == 0
+    if len(isbn) == 13 and isbn.isdigit():
+        total = sum(int(c) * (1 if i % 2 == 0 else 3) for i, c in enumerate(isbn))
+        return total % 10 == 0
+    return False
+
+def find_identifiers(texts: list[str]) -> dict[str, list[str]]:
+    """Valid DOIs, arXiv IDs and ISBNs in ``texts``, in order of first appearance.
+
+    DOIs are lowercased; arXiv IDs drop their version suffix; ISBNs lose
+    separators. arXiv's own DOIs (10.48550/arXiv.*) are reported as arXiv IDs.
+    """
+    found = {"doi": [], "arxiv": [], "isbn": []}
+
+    def _add(kind: str, value: str):
+        if value not in found[kind]:
+            found[kind].append(value)
+
+    for text in texts:
+        if not text:
+            continue
+        for m in _DOI_RE.finditer(text):
+            doi = clean_doi(m.group(1)).lower()
+            arxiv = re.fullmatch(r"10\.48550/arxiv\.(.+)", doi)
+            if arxiv and is_valid_arxiv(arxiv.group(1)):
+                _add("arxiv", arxiv.group(1))
+            elif is_valid_doi(doi):
+                _add("doi", doi)
+        for pattern in (_ARXIV_NEW_RE, _ARXIV_OLD_RE):
+            for m in pattern.finditer(text):
+                if is_valid_arxiv(m.group(1)):
+                    _add("arxiv", m.group(1))
+        for m in _ISBN_RE.finditer(text):
+            isbn = re.sub(r"[\s\-]", "", m.group(1)).upper()
+            if is_valid_isbn(isbn):
+                _add("isbn", isbn)
+    return found
@@ -0,0 +1,195 @@
+# refsync/local_index.py
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from .ref_client import (
+    normalize_title, normalize_openalex_item, first_author_lastname, year_from_item
+)
+
+_BATCH = 5000
+# Crossref record fields kept in the index: what entry_from_crossref() and the matcher read
+_KEEP = ("DOI", "title", "subtitle", "author", "editor", "type", "container-title", "volume",
+         "issue", "page", "publisher", "ISSN", "issn-type", "ISBN", "institution",
+         "published-print", "published-online", "issued", "URL")
+
+
+def _open_snapshot(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+def _records(path: str):
+    """Work records from a JSONL snapshot; API responses ({"message": ...}) and
+    Crossref data-file bundles ({"items": [...]}) on one line are unpacked."""
+    with _open_snapshot(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(rec, dict):
+                continue
+            rec = rec.get("message", rec) if isinstance(rec.get("message"), dict) else rec
+            if isinstance(rec.get("items"), list):
+                yield from (it for it in rec["items"] if isinstance(it, dict))
+            else:
+                yield rec
+
+def crossref_like(rec: dict) -> dict | None:
+    """A Crossref or OpenAlex work as a trimmed Crossref-style record (None without DOI/title)."""
+    if "authorships" in rec or "display_name" in rec:
+        item = normalize_openalex_item(rec)
+        item.pop("year", None)
+        if rec.get("type_crossref"):
+            item["type"] = rec["type_crossref"]
+        source = ((rec.get("primary_location") or {}).get("source") or {})
+        if source.get("display_name"):
+            item["container-title"] = [source["display_name"]]
+        biblio = rec.get("biblio") or {}
+        for src, dst in (("volume", "volume"), ("issue", "issue")):
+            if biblio.get(src):
+                item[dst] = biblio[src]
+        if biblio.get("first_page"):
+            item["page"] = "-".join(p for p in (biblio["first_page"], biblio.get("last_page")) if p)
+        item["URL"] = f"https://doi.org/{item['DOI']}" if item["DOI"] else ""
+    else:
+        item = {k: rec[k] for k in _KEEP if rec.get(k)}
+    if not item.get("DOI") or not (item.get("title") or [""])[0]:
+        return None
+    item["DOI"] = item["DOI"].lower()
+    return item
+
+
+class LocalIndex:
+    """Offline metadata index built from Crossref/OpenAlex snapshots, in one SQLite file.
+
+    Works are keyed by DOI and by normalized title, with an FTS5 table over
+    titles for inexact lookups. Records are stored as compressed,
+    Crossref-style JSON so they can stand in for provider answers.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS works (
+                id INTEGER PRIMARY KEY, doi TEXT NOT NULL UNIQUE, norm_title TEXT NOT NULL,
+                author TEXT, year TEXT, item BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS works_title ON works (norm_title);
+            CREATE VIRTUAL TABLE IF NOT EXISTS titles USING fts5 (
+                norm_title, content='works', content_rowid='id'
+            );
+        """)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM works").fetchone()[0]
+
+    def add_many(self, items) -> int:
+        """Insert or replace Crossref-style records (one transaction). Call rebuild() afterwards."""
+        rows = []
+        for item in items:
+            title = normalize_title((item.get("title") or [""])[0])
+            if item.get("DOI") and title:
+                author = normalize_title(first_author_lastname(item))
+                blob = zlib.compress(json.dumps(item).encode("utf-8"))
+                rows.append((item["DOI"].lower(), title, author, year_from_item(item), blob))
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO works (doi, norm_title, author, year, item) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (doi) DO UPDATE SET norm_title = excluded.norm_title, "
+                "author = excluded.author, year = excluded.year, item = excluded.item",
+                rows,
+            )
+            self._conn.execute("COMMIT")
+        return len(rows)
+
+    def rebuild(self):
+        """Re-sync the title search table with the stored works."""
+        with self._lock:
+            self._conn.execute("INSERT INTO titles (titles) VALUES ('rebuild')")
+            self._conn.execute("PRAGMA optimize")
+
+    @staticmethod
+    def _item(blob: bytes) -> dict:
+        return json.loads(zlib.decompress(blob))
+
+    def by_doi(self, doi: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT item FROM works WHERE doi = ?",
+                                     (doi.lower(),)).fetchone()
+        return self._item(row[0]) if row else None
+
+    def search(self, normalized_title: str, author: str = "", limit: int = 3) -> list[dict]:
+        """Records for a normalized title: exact title matches, else full-text matches.
+
+        Full-text search first requires every title word, then any of them
+        (best BM25 rank first). Records whose first author's surname appears
+        in ``author`` come first.
+        """
+        words = normalized_title.split()
+        if not words:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item, author FROM works WHERE norm_title = ? LIMIT ?",
+                (normalized_title, limit * 4)
+            ).fetchall()
+            if not rows:
+                quoted = ['"' + w + '"' for w in dict.fromkeys(words)]
+                for query in (" ".join(quoted), " OR ".join(quoted)):
+                    rows = self._conn.execute(
+                        "SELECT works.item, works.author FROM titles "
+                        "JOIN works ON works.id = titles.rowid "
+                        "WHERE titles MATCH ? ORDER BY rank LIMIT ?", (query, limit)
+                    ).fetchall()
+                    if rows or len(quoted) == 1:
+                        break
+        author_words = set(normalize_title(author).split())
+        rows.sort(key=lambda r: not (r[1] and set(r[1].split()) <= author_words))
+        return [self._item(blob) for blob, _ in rows[:limit]]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def build_index(snapshots: list[str], index_path: str, verbose: bool = False) -> int:
+    """Load Crossref/OpenAlex JSONL snapshots (optionally .gz) into the index at ``index_path``.
+
+    Returns the number of works stored; re-running with newer snapshots
+    updates works by DOI.
+    """
+    index = LocalIndex(index_path)
+    total = 0
+    try:
+        for path in snapshots:
+            batch = []
+            for rec in _records(path):
+                item = crossref_like(rec)
+                if item is not None:
+                    batch.append(item)
+                if len(batch) >= _BATCH:
+                    total += index.add_many(batch)
+                    batch = []
+                    if verbose:
+                        print(f"[index] {total} works", flush=True)
+            total += index.add_many(batch)
+            if verbose:
+                print(f"[index] {path}: done ({total} works so far)")
+        index.rebuild()
+    finally:
+        index.close()
+    return total
@@ -1,9 +1,28 @@
-import fitz  # PyMuPDF
 import os
 import re
+import xml.etree.ElementTree as ET
+from .cache import DiskCache
+from .config import EXTRACT_CACHE_FILENAME
+from .identifiers import find_identifiers
+from .metrics import count, stage
+
+EXTRACT_MODES = ("layout", "text")
+# Bump when extraction output changes so cached results are not reused
+EXTRACTOR_VERSION = 2
+# Share of page 1 (from the top) searched for the title in layout mode
+TOP_FRACTION = 0.45
+# Share of page 1 (from the bottom) also scanned for identifiers, where footers print the DOI
+FOOTER_FRACTION = 0.15
+_XMP_NS = {
+    "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+    "dc": "http://purl.org/dc/elements/1.1/",
+    "prism": "http://prismstandard.org/namespaces/basic/2.0/",
+    "pdfx": "http://ns.adobe.com/pdfx/1.3/",
+}
 
 
 def read_pdf_metadata(pdf_path: str):
+    import fitz  # PyMuPDF; imported on first read so startup stays cheap
     doc = fitz.open(pdf_path)
     md = doc.metadata or {}
     title = (md.get("title") or "").strip()
@@ -14,6 +33,131 @@ def read_pdf_metadata(pdf_path: str):
     doc.close()
     return title, author, text_first_page
 
+def parse_xmp(xml: str) -> dict:
+    """Title, creators and DOI from an XMP packet (empty values when absent or unparsable)."""
+    out = {"title": "", "authors": [], "doi": ""}
+    if not xml or not xml.strip():
+        return out
+    try:
+        root = ET.fromstring(xml.strip().encode("utf-8"))
+    except ET.ParseError:
+        return out
+    title = root.find(".//dc:title//rdf:li", _XMP_NS)
+    if title is not None and title.text:
+        out["title"] = " ".join(title.text.split())
+    out["authors"] = [li.text.strip() for li in root.findall(".//dc:creator//rdf:li", _XMP_NS)
+                      if li.text and li.text.strip()]
+    for path in (".//prism:doi", ".//pdfx:doi", ".//dc:identifier"):
+        node = root.find(path, _XMP_NS)
+        text = (node.text if node is not None else None) or ""
+        if not text and node is not None:
+            li = node.find(".//rdf:li", _XMP_NS)
+            text = (li.text if li is not None else None) or ""
+        if text.strip():
+            out["doi"] = text.strip()
+            break
+    return out
+
+def _line_size(spans: list[dict]) -> float:
+    # Font size carrying most of the line's characters
+    weight: dict[float, int] = {}
+    for sp in spans:
+        size = round(sp.get("size", 0.0), 1)
+        weight[size] = weight.get(size, 0) + len(sp.get("text", "").strip())
+    return max(weight, key=weight.get) if weight else 0.0
+
+def _largest_font_block(blocks: list[list[tuple[str, float]]]) -> str:
+    """Text of the lines set in the largest font within one block (the usual title)."""
+    best_size, best = 0.0, ""
+    for lines in blocks:
+        for text, size in lines:
+            if size > best_size + 0.25 and sum(c.isalpha() for c in text) > 3:
+                best_size = size
+                best = " ".join(t for t, sz in lines if abs(sz - size) <= 0.5)
+    return best
+
+def _metadata_texts(md: dict, xmp: dict) -> list[str]:
+    # Info-dict fields and the XMP DOI that publishers fill with identifiers
+    return [md.get(k) or "" for k in ("subject", "keywords", "title")] + [xmp.get("doi", "")]
+
+def _link_uris(page) -> list[str]:
+    # Checked last: links on page 1 may also point at cited works
+    return [link.get("uri") or "" for link in page.get_links()] if page is not None else []
+
+def read_pdf_text(pdf_path: str) -> dict:
+    """Metadata and the whole first page as plain text, plus identifiers found there."""
+    import fitz  # PyMuPDF
+    doc = fitz.open(pdf_path)
+    try:
+        md = doc.metadata or {}
+        try:
+            xmp = parse_xmp(doc.get_xml_metadata())
+        except Exception:
+            xmp = parse_xmp("")
+        page = doc[0] if doc.page_count > 0 else None
+        first_page = page.get_text("text") if page is not None else ""
+        sources = _metadata_texts(md, xmp) + [first_page] + _link_uris(page)
+    finally:
+        doc.close()
+    return {
+        "title": (md.get("title") or "").strip(),
+        "author": (md.get("author") or "").strip(),
+        "first_page": first_page,
+        "identifiers": find_identifiers(sources),
+    }
+
+def read_pdf_layout(pdf_path: str, top_fraction: float = TOP_FRACTION) -> dict:
+    """Metadata and the top of page 1 with font sizes, for title detection.
+
+    Only the top ``top_fraction`` of the first page is extracted, as spans
+    with font sizes ("dict" output, images skipped). Returns the info-dict
+    title/author (falling back to XMP), the XMP fields, ``lines`` as
+    (text, font size) in reading order, their plain text as ``first_page``,
+    ``layout_title``, the largest-font text block, and the DOIs/arXiv IDs/ISBNs
+    found in metadata, link annotations, the top region and the page footer.
+    """
+    import fitz  # PyMuPDF
+    doc = fitz.open(pdf_path)
+    try:
+        md = doc.metadata or {}
+        try:
+            xmp = parse_xmp(doc.get_xml_metadata())
+        except Exception:
+            xmp = parse_xmp("")
+        blocks: list[list[tuple[str, float]]] = []
+        page = doc[0] if doc.page_count > 0 else None
+        footer_text = ""
+        if page is not None:
+            r = page.rect
+            clip = fitz.Rect(r.x0, r.y0, r.x1, r.y0 + r.height * top_fraction)
+            data = page.get_text("dict", clip=clip, flags=fitz.TEXTFLAGS_TEXT, sort=True)
+            for block in data.get("blocks", []):
+                lines = []
+                for line in block.get("lines", []):
+                    spans = line.get("spans", [])
+                    text = " ".join("".join(sp.get("text", "") for sp in spans).split())
+                    if text:
+                        lines.append((text, _line_size(spans)))
+                if lines:
+                    blocks.append(lines)
+            footer = fitz.Rect(r.x0, r.y1 - r.height * FOOTER_FRACTION, r.x1, r.y1)
+            footer_text = page.get_text("text", clip=footer, flags=fitz.TEXTFLAGS_TEXT)
+        links = _link_uris(page)
+    finally:
+        doc.close()
+    lines = [ln for block in blocks for ln in block]
+    first_page = "\n".join(t for t, _ in lines)
+    return {
+        "title": (md.get("title") or "").strip() or xmp["title"],
+        "author": (md.get("author") or "").strip() or ", ".join(xmp["authors"]),
+        "xmp": xmp,
+        "lines": lines,
+        "first_page": first_page,
+        "layout_title": _largest_font_block(blocks),
+        "identifiers": find_identifiers(_metadata_texts(md, xmp)
+                                        + [first_page, footer_text] + links),
+    }
+
 def title_from_filename(pdf_path: str) -> str:
     fname = os.path.basename(pdf_path)
     fname = os.path.splitext(fname)[0]
@@ -62,4 +206,75 @@ def guess_title_from_first_page(text_first_page: str, start_line: int = 1) -> st
     ]
     if candidates:
         return max(candidates, key=len)
-    return ""
\ No newline at end of file
+    return ""
+
+
+# Extraction results by content fingerprint; off until configure_extract_cache() is called
+_extract_cache: DiskCache | None = None
+
+def configure_extract_cache(cache_dir: str | None,
+                            max_bytes: int | None = None) -> DiskCache | None:
+    """Persist extraction results under ``cache_dir`` (disabled when None)."""
+    global _extract_cache
+    _extract_cache = None
+    if cache_dir:
+        _extract_cache = DiskCache(os.path.join(cache_dir, EXTRACT_CACHE_FILENAME),
+                                   max_bytes=max_bytes)
+    return _extract_cache
+
+def extract_cache_enabled() -> bool:
+    return _extract_cache is not None
+
+def extract_cache_stats() -> dict | None:
+    return _extract_cache.stats() if _extract_cache is not None else None
+
+def _read_first_page(pdf_path: str, mode: str) -> dict:
+    with stage(f"read_pdf.{mode}"):
+        if mode == "layout":
+            return read_pdf_layout(pdf_path)
+        return read_pdf_text(pdf_path)
+
+def _cached_result(hit: dict) -> dict:
+    if "lines" in hit:
+        hit["lines"] = [tuple(line) for line in hit["lines"]]
+    return hit
+
+def extract_first_page(pdf_path: str, mode: str = "layout", content_key: str | None = None,
+                       fingerprint: str | None = None, full_hash=None) -> dict:
+    """Title, author and first-page text (plus layout fields in layout mode).
+
+    With the cache configured, results are reused across runs without opening
+    the PDF. They are keyed by ``content_key``, the file's full content hash.
+    If that is not known yet, pass the quick ``fingerprint`` and a
+    ``full_hash`` callable instead: a new file is cached provisionally under
+    its fingerprint, and the full hash is only computed when a later file has
+    the same fingerprint, to confirm the match.
+    """
+    if _extract_cache is None or not (content_key or (fingerprint and full_hash)):
+        return _read_first_page(pdf_path, mode)
+    prefix = f"extract:v{EXTRACTOR_VERSION}:{mode}:{TOP_FRACTION}:"
+    seen_key = seen = None
+    if not content_key:
+        seen_key = prefix + "fp:" + fingerprint
+        seen = _extract_cache.get(seen_key)
+        if seen is None:
+            count("extract_cache.misses")
+            result = _read_first_page(pdf_path, mode)
+            _extract_cache.set(seen_key, {"full": None, "result": result})
+            return result
+        content_key = full_hash()
+        if seen["full"] == content_key:
+            count("extract_cache.hits")
+            return _cached_result(seen["result"])
+    key = prefix + content_key
+    hit = _extract_cache.get(key)
+    count("extract_cache.hits" if hit is not None else "extract_cache.misses")
+    if hit is not None:
+        return _cached_result(hit)
+    result = _read_first_page(pdf_path, mode)
+    _extract_cache.set(key, result)
+    if seen is not None and seen["full"] is None:
+        # The provisional entry's content was never hashed; replace it with
+        # this one, now confirmed by its full hash
+        _extract_cache.set(seen_key, {"full": content_key, "result": result})
+    return result
@@ -0,0 +1,104 @@
+# refsync/metrics.py
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Process-wide stage timings and counters; off until configure_metrics() is called
+_enabled = False
+_lock = threading.Lock()
+_timings: dict[str, list[float]] = {}
+_counters: dict[str, float] = {}
+
+
+def configure_metrics(enabled: bool = True):
+    """Turn collection on or off; values collected so far are kept until reset()."""
+    global _enabled
+    _enabled = enabled
+
+def enabled() -> bool:
+    return _enabled
+
+def reset():
+    with _lock:
+        _timings.clear()
+        _counters.clear()
+
+def record(name: str, seconds: float):
+    if _enabled:
+        with _lock:
+            _timings.setdefault(name, []).append(seconds)
+
+def count(name: str, n: float = 1):
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + n
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block as one sample of stage ``name`` (stages may nest)."""
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+def timed(name: str):
+    """Decorator form of stage()."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+def _percentile(values: list[float], q: float) -> float:
+    # Nearest rank on sorted values
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+def snapshot() -> dict:
+    """Per-stage count/total/mean/p50/p95/max (ms) and all counters."""
+    with _lock:
+        timings = {name: sorted(values) for name, values in _timings.items()}
+        counters = dict(_counters)
+    stages = {}
+    for name, values in sorted(timings.items()):
+        total = sum(values)
+        stages[name] = {
+            "count": len(values),
+            "total_s": round(total, 4),
+            "mean_ms": round(1000 * total / len(values), 3),
+            "p50_ms": round(1000 * _percentile(values, 0.5), 3),
+            "p95_ms": round(1000 * _percentile(values, 0.95), 3),
+            "max_ms": round(1000 * values[-1], 3),
+        }
+    return {"stages": stages, "counters": dict(sorted(counters.items()))}
+
+def format_table(snap: dict | None = None) -> str:
+    """Plain-text profile: one row per stage, then counters.
+
+    Nested stages are part of their parents' time.
+    """
+    snap = snap if snap is not None else snapshot()
+    rows = [f"{'stage':28s} {'count':>7s} {'total s':>9s} {'mean ms':>9s} {'p50 ms':>9s} "
+            f"{'p95 ms':>9s} {'max ms':>9s}"]
+    for name, s in snap["stages"].items():
+        rows.append(f"{name:28s} {s['count']:7d} {s['total_s']:9.3f} {s['mean_ms']:9.2f} "
+                    f"{s['p50_ms']:9.2f} {s['p95_ms']:9.2f} {s['max_ms']:9.2f}")
+    if snap["counters"]:
+        rows.append("")
+        rows.append(f"{'counter':28s} {'value':>12s}")
+        for name, value in snap["counters"].items():
+            rows.append(f"{name:28s} {value:12g}")
+    return "\n".join(rows)
+
+def write_json(path: str, extra: dict | None = None):
+    """Write snapshot() (plus ``extra`` fields such as the run's arguments) to ``path``."""
+    data = {**(extra or {}), **snapshot()}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
@@ -0,0 +1,108 @@
+# refsync/near_dup.py
+import re
+import unicodedata
+from .config import NEAR_DUP_THRESHOLD
+from .ref_client import normalize_title
+
+# Title words too common to narrow down candidates
+_STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "and", "to", "at", "by", "with", "from", "via",
+    "using", "towards", "toward", "into", "its", "their", "is", "are", "how", "what", "new",
+    "study", "analysis", "approach", "based", "model", "models",
+}
+# Blocking tokens shared by more titles than this (or a tenth of the index) are skipped
+_MAX_POSTING = 200
+
+
+def _fold(text: str) -> str:
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+
+def first_author_surname(author: str) -> str:
+    """Lowercased ASCII surname of the first author in a BibTeX author field."""
+    first = re.split(r"\s+and\s+", (author or "").strip(), maxsplit=1)[0].strip()
+    if not first:
+        return ""
+    name = first.split(",")[0] if "," in first else first.split()[-1]
+    return re.sub(r"[^a-z]", "", _fold(name).lower())
+
+def title_trigrams(normalized: str) -> set[str]:
+    # Spaces dropped so hyphenation and word splits ("multi agent"/"multiagent") still match
+    s = normalized.replace(" ", "")
+    return {s[i:i + 3] for i in range(len(s) - 2)} if len(s) > 3 else {s} if s else set()
+
+def _blocking_tokens(normalized: str) -> set[str]:
+    return {w for w in normalized.split() if len(w) > 2 and w not in _STOPWORDS}
+
+
+class NearDuplicateIndex:
+    """Finds bib entries whose titles nearly match, without scanning all entries.
+
+    Titles are normalized with ``normalize_title``. Candidates come from an
+    inverted index on distinctive title words (n-gram blocking), are scored
+    by Jaccard similarity of character trigrams, and must reach
+    ``threshold``. When both sides name a first author, the surnames must
+    agree; titles with different numbers ("Part 1" vs "Part 2") never match.
+    """
+
+    def __init__(self, threshold: float = NEAR_DUP_THRESHOLD):
+        self.threshold = threshold
+        self._postings: dict[str, set[int]] = {}
+        self._items: dict[int, tuple[object, set[str], str, frozenset[str]]] = {}
+        self._tokens: dict[int, set[str]] = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, key: int, value, title: str, author: str = ""):
+        normalized = normalize_title(title or "")
+        if not normalized:
+            return
+        self.remove(key)
+        numbers = frozenset(w for w in normalized.split() if w.isdigit())
+        self._items[key] = (value, title_trigrams(normalized), first_author_surname(author),
+                            numbers)
+        tokens = self._tokens[key] = _blocking_tokens(normalized) or set(normalized.split())
+        for tok in tokens:
+            self._postings.setdefault(tok, set()).add(key)
+
+    def remove(self, key: int):
+        if self._items.pop(key, None) is None:
+            return
+        for tok in self._tokens.pop(key):
+            self._postings[tok].discard(key)
+
+    def candidates(self, title: str, author: str = "",
+                   threshold: float | None = None) -> list[tuple[float, object]]:
+        """(similarity, value) pairs at or above the threshold, best first."""
+        threshold = self.threshold if threshold is None else threshold
+        normalized = normalize_title(title or "")
+        if not normalized:
+            return []
+        tokens = _blocking_tokens(normalized) or set(normalized.split())
+        limit = max(_MAX_POSTING, len(self._items) // 10)
+        hits: dict[int, int] = {}
+        for tok in tokens:
+            keys = self._postings.get(tok)
+            if not keys or len(keys) > limit:
+                continue
+            for k in keys:
+                hits[k] = hits.get(k, 0) + 1
+        # Titles sharing too few distinctive words cannot reach a high trigram overlap
+        need = 1 if len(tokens) < 4 else 2
+        grams = title_trigrams(normalized)
+        surname = first_author_surname(author)
+        numbers = frozenset(w for w in normalized.split() if w.isdigit())
+        out = []
+        for k, shared in hits.items():
+            if shared < need:
+                continue
+            value, other, other_surname, other_numbers = self._items[k]
+            if surname and other_surname and surname != other_surname:
+                continue
+            if numbers != other_numbers:
+                continue
+            sim = len(grams & other) / len(grams | other) if grams or other else 0.0
+            if sim >= threshold:
+                out.append((sim, value))
+        out.sort(key=lambda c: c[0], reverse=True)
+        return out
@@ -0,0 +1,95 @@
+# refsync/pipeline.py
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+def _copy_outcome(src: Future, dst: Future):
+    if src.cancelled():
+        dst.cancel()
+        return
+    exc = src.exception()
+    if exc is not None:
+        dst.set_exception(exc)
+    else:
+        dst.set_result(src.result())
+
+
+class Pipeline:
+    """Two worker pools feeding a single, in-order consumer.
+
+    ``run`` sends each item through ``extract`` (CPU/disk bound: hashing,
+    PyMuPDF) on one pool and then ``lookup`` (network bound) on a second,
+    bounded pool, and yields ``(item, future)`` pairs in input order. The
+    caller is the committer: it calls ``future.result()`` and applies side
+    effects one item at a time, so results match a serial run.
+
+    With ``jobs <= 1`` everything runs inline in the caller's thread.
+    """
+
+    def __init__(self, jobs: int = 1, lookup_jobs: int | None = None, window: int | None = None):
+        self.jobs = max(1, jobs)
+        self.lookup_jobs = max(1, lookup_jobs or self.jobs)
+        # Items in flight ahead of the committer; bounds memory held by extracted text
+        self.window = window or 4 * max(self.jobs, self.lookup_jobs)
+        self._extract_pool = None
+        self._lookup_pool = None
+        if self.jobs > 1:
+            self._extract_pool = ThreadPoolExecutor(self.jobs, thread_name_prefix="refsync-extract")
+            self._lookup_pool = ThreadPoolExecutor(self.lookup_jobs,
+                                                   thread_name_prefix="refsync-lookup")
+
+    def _submit(self, item, extract, lookup) -> Future:
+        out = Future()
+
+        def _chain(f: Future):
+            if f.cancelled():
+                out.cancel()
+                return
+            if f.exception() is not None:
+                out.set_exception(f.exception())
+                return
+            try:
+                g = self._lookup_pool.submit(lookup, f.result())
+                g.add_done_callback(lambda g: _copy_outcome(g, out))
+            except RuntimeError as e:  # pool shut down while we were extracting
+                out.set_exception(e)
+
+        self._extract_pool.submit(extract, item).add_done_callback(_chain)
+        return out
+
+    def run(self, items, extract, lookup):
+        if self._extract_pool is None:
+            for item in items:
+                out = Future()
+                try:
+                    out.set_result(lookup(extract(item)))
+                except Exception as e:
+                    out.set_exception(e)
+                yield item, out
+            return
+
+        it = iter(items)
+        pending = deque()
+        for item in it:
+            pending.append((item, self._submit(item, extract, lookup)))
+            if len(pending) >= self.window:
+                break
+        while pending:
+            yield pending.popleft()
+            nxt = next(it, _END)
+            if nxt is not _END:
+                pending.append((nxt, self._submit(nxt, extract, lookup)))
+
+    def close(self):
+        for pool in (self._extract_pool, self._lookup_pool):
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_END = object()
@@ -0,0 +1,100 @@
+# refsync/rate_limit.py
+import email.utils
+import re
+import threading
+import time
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if re.fullmatch(r"\d+(\.\d+)?", value):
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+def _parse_interval(value: str) -> float | None:
+    # Crossref sends e.g. "1s"; also accept "500ms", "1m" and bare seconds
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h)?\s*", value or "")
+    if not m:
+        return None
+    n = float(m.group(1))
+    return n * {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}[m.group(2)]
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by all lookup workers of a provider.
+
+    ``rate`` tokens per second refill a bucket of ``burst`` tokens. Callers
+    reserve a token and sleep for the returned delay, so waiters are served in
+    order without busy looping. ``update_from_headers`` adapts the rate and
+    pauses the bucket from a provider's rate-limit response headers.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None, safety: float = 0.9):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.safety = safety
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def acquire(self):
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def set_rate(self, rate: float, burst: float | None = None):
+        with self._lock:
+            self.rate = max(rate, 0.01)
+            if burst is not None:
+                self.burst = max(1.0, burst)
+                self._tokens = min(self._tokens, self.burst)
+
+    def update_from_headers(self, headers):
+        """Follow Retry-After, Crossref's X-Rate-Limit-* and (X-)RateLimit-* headers."""
+        retry_after = parse_retry_after(headers.get("Retry-After"))
+        if retry_after is not None:
+            self.pause(retry_after)
+
+        limit = headers.get("X-Rate-Limit-Limit")
+        interval = _parse_interval(headers.get("X-Rate-Limit-Interval", ""))
+        if limit and interval:
+            try:
+                n = float(limit)
+            except ValueError:
+                n = 0
+            if n > 0:
+                self.set_rate(self.safety * n / interval, burst=n)
+
+        remaining = headers.get("X-RateLimit-Remaining", headers.get("RateLimit-Remaining"))
+        reset = headers.get("X-RateLimit-Reset", headers.get("RateLimit-Reset"))
+        if remaining is not None and reset is not None:
+            try:
+                remaining, reset = float(remaining), float(reset)
+            except ValueError:
+                return
+            if remaining <= 0:
+                # Epoch timestamps vs. delta-seconds
+                wait = reset - time.time() if reset > 1e9 else reset
+                if wait > 0:
+                    self.pause(wait)
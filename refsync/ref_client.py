@@ -1,53 +1,243 @@
-import json
-from tenacity import retry, stop_after_attempt, wait_exponential
-import requests
-from .config import CROSSREF_WORKS_URL, DOI_CONTENT_NEGOTIATION_URL, USER_AGENT, SEMANTIC_SCHOLAR_URL, OPENALEX_URL
+from __future__ import annotations
+import atexit
+import math
+import os
+import threading
+from collections import Counter
+from typing import TYPE_CHECKING
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
+from .config import (
+    CROSSREF_WORKS_URL, DOI_CONTENT_NEGOTIATION_URL, USER_AGENT, SEMANTIC_SCHOLAR_URL, OPENALEX_URL,
+    SEMANTIC_SCHOLAR_PAPER_URL,
+    CACHE_FILENAME, PROVIDER_LIMITS, DEFAULT_PROVIDERS
+)
+from .cache import DiskCache, CacheMiss, make_key
+from .rate_limit import TokenBucket, parse_retry_after
+from .metrics import count, stage
 import re
-import time
 
-SESSION = requests.Session()
-SESSION.headers.update({"User-Agent": USER_AGENT})
-_crossref_cache = {}
+if TYPE_CHECKING:
+    import requests
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=6))
-def crossref_query(bibliographic: str, rows: int = 5) -> dict:
-    resp = SESSION.get(CROSSREF_WORKS_URL, params={"query.bibliographic": bibliographic, "rows": rows}, timeout=20)
+# requests and tenacity are imported on the first network request, so runs
+# that never go online (no-op runs, --rebuild-tracker, --help) skip them
+
+
+class RateLimited(OSError):
+    """A provider answered 429/503; its limiter has been paused accordingly."""
+
+    def __init__(self, message: str, response=None):
+        super().__init__(message)
+        self.response = response
+
+
+class Provider:
+    """HTTP state for one metadata provider: its own connection pool and rate limiter."""
+
+    def __init__(self, name: str, rate: float, pool_size: int):
+        self.name = name
+        self.pool_size = pool_size
+        self.limiter = TokenBucket(rate)
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    session.headers.update({"User-Agent": USER_AGENT})
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+        return self._session
+
+    def send(self, url: str, params: dict | None = None, headers: dict | None = None,
+             timeout: float = 20) -> requests.Response:
+        with stage(f"ratelimit.{self.name}"):
+            self.limiter.acquire()
+        return self.send_now(url, params, headers, timeout)
+
+    def send_now(self, url: str, params: dict | None = None, headers: dict | None = None,
+                 timeout: float = 20) -> requests.Response:
+        """Send without waiting on the limiter (the caller already acquired a token)."""
+        count(f"http.{self.name}.requests")
+        with stage(f"http.{self.name}"):
+            resp = self.session.get(url, params=params, headers=headers, timeout=timeout)
+        self.limiter.update_from_headers(resp.headers)
+        if resp.status_code in (429, 503):
+            count(f"http.{self.name}.rate_limited")
+            if parse_retry_after(resp.headers.get("Retry-After")) is None:
+                self.limiter.pause(2.0)
+            raise RateLimited(f"{self.name} answered {resp.status_code}", response=resp)
+        return resp
+
+
+PROVIDERS = {name: Provider(name, rate, pool) for name, (rate, pool) in PROVIDER_LIMITS.items()}
+
+def _stop_retry(retry_state) -> bool:
+    return retry_state.attempt_number >= 3
+
+def _wait_retry(retry_state) -> float:
+    # After a 429/503 the provider's limiter already waits for the server's reset
+    if isinstance(retry_state.outcome.exception(), RateLimited):
+        return 0
+    # Exponential backoff: 1s, 2s, 4s, ... capped at 6s
+    return min(2 ** (retry_state.attempt_number - 1), 6)
+
+def _count_retry(retry_state):
+    count("http.retries")
+
+RETRY_POLICY = dict(stop=_stop_retry, wait=_wait_retry, reraise=True,
+                    before_sleep=_count_retry)
+
+# Response cache shared by all providers; process-local until configure_cache() is called
+_cache = DiskCache(":memory:")
+_cache_only = False
+
+def configure_cache(cache_dir: str | None, ttl: float | None = None, max_bytes: int | None = None,
+                    cache_only: bool = False) -> DiskCache:
+    """Point the response cache at ``cache_dir`` (or memory when None).
+
+    With ``cache_only`` a miss raises CacheMiss instead of going to the network.
+    """
+    global _cache, _cache_only
+    path = os.path.join(cache_dir, CACHE_FILENAME) if cache_dir else ":memory:"
+    _cache = DiskCache(path, ttl=ttl, max_bytes=max_bytes)
+    _cache_only = cache_only
+    return _cache
+
+def cache_stats() -> dict:
+    return _cache.stats()
+
+def cache_lookup(provider: str, query: str, params: dict):
+    """(key, cached value or None); raises CacheMiss on a miss in cache-only mode."""
+    key = make_key(provider, query, params)
+    hit = _cache.get(key)
+    if hit is None and _cache_only:
+        raise CacheMiss(f"{provider}: {query!r} not in cache")
+    return key, hit
+
+def cache_store(key: str, value):
+    # None means "no usable answer" and is not cached
+    if value is not None:
+        _cache.set(key, value)
+
+def _cached(provider: str, query: str, params: dict, fetch):
+    """Return the cached response for (provider, query, params) or fetch and store it."""
+    key, hit = cache_lookup(provider, query, params)
+    count("cache.hits" if hit is not None else "cache.misses")
+    if hit is not None:
+        return hit
+    value = fetch()
+    cache_store(key, value)
+    return value
+
+def _fetch(provider: str, request: tuple, parse):
+    from tenacity import Retrying
+    url, params, headers = request
+    return Retrying(**RETRY_POLICY)(lambda: parse(PROVIDERS[provider].send(url, params, headers)))
+
+# Request builders and response parsers; _fetch sends them through the provider
+def crossref_request(bibliographic: str, rows: int) -> tuple:
+    return CROSSREF_WORKS_URL, {"query.bibliographic": bibliographic, "rows": rows}, None
+
+def crossref_parse(resp: requests.Response) -> dict:
     resp.raise_for_status()
     return resp.json()
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=2, min=2, max=10))
-def semantic_scholar_query(title: str, limit: int = 1):
+def semantic_scholar_request(title: str, limit: int) -> tuple:
     params = {
         "query": title.strip(),
         "fields": "title,authors,year,externalIds,url",
         "limit": limit
     }
-    headers = {"Accept": "application/json"}
-    time.sleep(1)
-    resp = SESSION.get(SEMANTIC_SCHOLAR_URL, params=params, headers=headers)
+    return SEMANTIC_SCHOLAR_URL, params, {"Accept": "application/json"}
+
+def semantic_scholar_parse(resp: requests.Response):
     if resp.status_code == 200:
         return resp.json().get("data", [])
-    return []
+    return None
 
-def openalex_query(title: str, limit: int = 1):
-    params = {
-        "search": title,
-        "per-page": limit
-    }
-    resp = SESSION.get(OPENALEX_URL, params=params)
+def openalex_request(title: str, limit: int) -> tuple:
+    return OPENALEX_URL, {"search": title, "per-page": limit}, None
+
+def openalex_parse(resp: requests.Response):
     if resp.status_code == 200:
         return resp.json().get("results", [])
-    return []
-
-def _score_item(it: dict, candidate_title: str, candidate_author: str) -> int:
-    t = " ".join(it.get("title") or []).lower()
-    s = 0
-    for w in set(candidate_title.lower().split()):
-        if len(w) > 3 and w in t:
-            s += 1
-    if candidate_author and (candidate_author.lower() in json.dumps(it.get("author", [])).lower()):
-        s += 1
-    return s
+    return None
+
+def crossref_work_request(doi: str) -> tuple:
+    return f"{CROSSREF_WORKS_URL}/{quote(doi, safe='/:;()')}", None, None
+
+def crossref_work_parse(resp: requests.Response) -> dict | None:
+    if resp.status_code == 404:
+        return None  # not a Crossref DOI
+    resp.raise_for_status()
+    return resp.json().get("message")
+
+def crossref_isbn_request(isbn: str, rows: int) -> tuple:
+    return CROSSREF_WORKS_URL, {"filter": f"isbn:{isbn}", "rows": rows}, None
+
+def semantic_scholar_paper_request(paper_id: str) -> tuple:
+    return (SEMANTIC_SCHOLAR_PAPER_URL.format(paper_id=quote(paper_id, safe=":/")),
+            {"fields": "title,authors,year,externalIds,url"}, {"Accept": "application/json"})
+
+def semantic_scholar_paper_parse(resp: requests.Response):
+    if resp.status_code == 200:
+        return resp.json()
+    return None
+
+def doi_bibtex_request(doi: str) -> tuple:
+    return DOI_CONTENT_NEGOTIATION_URL.format(doi=doi), None, {"Accept": "application/x-bibtex"}
+
+def doi_bibtex_parse(resp: requests.Response) -> str:
+    resp.raise_for_status()
+    return resp.text
+
+def crossref_query(bibliographic: str, rows: int = 5) -> dict:
+    request = crossref_request(bibliographic, rows)
+    return _cached("crossref", bibliographic, {"rows": rows},
+                   lambda: _fetch("crossref", request, crossref_parse))
+
+def semantic_scholar_query(title: str, limit: int = 1):
+    try:
+        request = semantic_scholar_request(title, limit)
+        return _cached("s2", title, {"limit": limit},
+                       lambda: _fetch("s2", request, semantic_scholar_parse)) or []
+    except RateLimited:
+        return []
+
+def openalex_query(title: str, limit: int = 1):
+    try:
+        request = openalex_request(title, limit)
+        return _cached("openalex", title, {"limit": limit},
+                       lambda: _fetch("openalex", request, openalex_parse)) or []
+    except RateLimited:
+        return []
+
+def crossref_work(doi: str) -> dict | None:
+    """Crossref record for a DOI, or None if Crossref does not know it."""
+    return _cached("crossref", doi, {"work": 1},
+                   lambda: _fetch("crossref", crossref_work_request(doi), crossref_work_parse))
+
+def crossref_isbn_query(isbn: str, rows: int = 5) -> dict:
+    return _cached("crossref", isbn, {"isbn": 1, "rows": rows},
+                   lambda: _fetch("crossref", crossref_isbn_request(isbn, rows), crossref_parse))
+
+def semantic_scholar_paper(paper_id: str) -> dict | None:
+    """Semantic Scholar paper by external ID (e.g. ``arXiv:1706.03762``), or None."""
+    try:
+        request = semantic_scholar_paper_request(paper_id)
+        return _cached("s2", paper_id, {"paper": 1},
+                       lambda: _fetch("s2", request, semantic_scholar_paper_parse))
+    except RateLimited:
+        return None
 
 def normalize_title(title: str) -> str:
     ligatures = {
@@ -64,6 +254,91 @@ def normalize_title(title: str) -> str:
     # Lowercase, remove punctuation, collapse whitespace
     return re.sub(r'\W+', ' ', title.lower()).strip()
 
+# Re-ranking weights (logistic): confidence ~ chance the record is the paper a
+# title hypothesis names. Fit by hand on exact, subtitle-less, truncated and
+# unrelated titles, with and without author agreement.
+_RANK_BIAS = -6.5
+_RANK_TITLE = 9.0
+_RANK_EXACT = 1.5
+_RANK_AUTHOR = (1.2, 0.6, -0.5)  # first author named, another author named, none named
+_RANK_YEAR = (0.6, 0.3)  # same year, off by one
+# Non-exact titles at or above this confidence are accepted without further lookups
+ACCEPT_CONFIDENCE = 0.9
+# best_metadata_match() returns nothing below this
+MIN_CONFIDENCE = 0.5
+# Roman numerals up to 39 ("Part II", "Vol. IV"); rank_items() does not weigh them
+_ROMAN = re.compile(r"^(?=[ivx])x{0,3}(?:ix|iv|v?i{0,3})$")
+
+def _title_numbers(normalized: str) -> frozenset[str]:
+    return frozenset(w for w in normalized.split() if w.isdigit() or _ROMAN.match(w))
+
+def _numbers_agree(normalized: str, item: dict) -> bool:
+    # "Part I" vs "Part II" scores as a near-identical title; never accept it as one
+    title = normalize_title((item.get("title") or [""])[0])
+    return _title_numbers(normalized) == _title_numbers(title)
+
+def _author_term(item: dict, author_words: set[str]) -> float:
+    if not author_words:
+        return 0.0
+    surnames = [set(normalize_title(a.get("family") or a.get("name") or "").split())
+                for a in item.get("author") or [] if a]
+    surnames = [s for s in surnames if s]
+    if not surnames:
+        return 0.0
+    if surnames[0] <= author_words:
+        return _RANK_AUTHOR[0]
+    if any(s <= author_words for s in surnames[1:]):
+        return _RANK_AUTHOR[1]
+    return _RANK_AUTHOR[2]
+
+def _year_term(item: dict, years: set[int]) -> float:
+    year = year_from_item(item) or str(item.get("year") or "")
+    if not years or not year.isdigit():
+        return 0.0
+    if int(year) in years:
+        return _RANK_YEAR[0]
+    if int(year) - 1 in years or int(year) + 1 in years:
+        return _RANK_YEAR[1]
+    return 0.0
+
+def rank_items(items: list[dict], queries: list[str], candidate_author: str = "",
+               years=()) -> list[tuple[float, str, dict]]:
+    """Score provider records against normalized title hypotheses in one pass.
+
+    Titles are compared as token sets weighted by IDF over the whole batch
+    (records and hypotheses), so words every candidate shares count for
+    little. Title similarity, exactness, first-author surname and year
+    agreement are combined into a confidence in [0, 1]. Returns
+    (confidence, best hypothesis, record), best first.
+    """
+    queries = [q for q in dict.fromkeys(queries) if q]
+    titles = [normalize_title((it.get("title") or [""])[0]) for it in items]
+    query_tokens = [set(q.split()) for q in queries]
+    title_tokens = [set(t.split()) for t in titles]
+    df = Counter(w for tokens in query_tokens + title_tokens for w in tokens)
+    n = len(query_tokens) + len(title_tokens)
+    weight = {w: (math.log((n + 1) / (c + 0.5)) + 1.0) ** 2 for w, c in df.items()}
+    query_norms = [math.sqrt(sum(weight[w] for w in tokens)) for tokens in query_tokens]
+    author_words = set(normalize_title(candidate_author).split())
+    years = {int(y) for y in years if str(y).isdigit()}
+    ranked = []
+    for item, title, tokens in zip(items, titles, title_tokens):
+        if not tokens or not queries:
+            continue
+        norm = math.sqrt(sum(weight[w] for w in tokens))
+        best_z, best_query = -math.inf, queries[0]
+        for query, q_tokens, q_norm in zip(queries, query_tokens, query_norms):
+            if title == query:
+                z = _RANK_TITLE + _RANK_EXACT
+            else:
+                z = _RANK_TITLE * sum(weight[w] for w in q_tokens & tokens) / (q_norm * norm)
+            if z > best_z:
+                best_z, best_query = z, query
+        z = _RANK_BIAS + best_z + _author_term(item, author_words) + _year_term(item, years)
+        ranked.append((1.0 / (1.0 + math.exp(-z)), best_query, item))
+    ranked.sort(key=lambda r: r[0], reverse=True)
+    return ranked
+
 def normalize_semantic_item(item: dict) -> dict:
     """Convert Semantic Scholar item to Crossref-like format (fields as lists)."""
     norm = {}
@@ -90,52 +365,281 @@ def normalize_semantic_item(item: dict) -> dict:
     norm["URL"] = item.get("url", "")
     return norm
 
-def best_metadata_match(candidate_title: str, candidate_author: str = "") -> dict | None:
-    normalized_candidate = normalize_title(candidate_title)
-    candidate_words = normalized_candidate.split()
+def normalize_openalex_item(item: dict) -> dict:
+    """Convert an OpenAlex work to Crossref-like format (fields as lists)."""
+    norm = {}
+    title = item.get("title") or item.get("display_name") or ""
+    norm["title"] = [title]
+    norm["author"] = []
+    for a in item.get("authorships") or []:
+        name = ((a.get("author") or {}).get("display_name") or "").strip()
+        parts = name.split()
+        norm["author"].append({"family": parts[-1] if parts else "", "given": " ".join(parts[:-1])})
+    year = item.get("publication_year")
+    norm["year"] = str(year or "")
+    if year:
+        norm["issued"] = {"date-parts": [[year]]}
+    doi = item.get("doi") or ""
+    norm["DOI"] = re.sub(r"^https?://(dx\.)?doi\.org/", "", doi)
+    norm["URL"] = item.get("id", "")
+    return norm
+
+def _crossref_items(normalized_candidate: str, candidate_author: str) -> list[dict]:
     q = f"{normalized_candidate} {candidate_author}".strip()
+    # Get 3 from Crossref
+    return crossref_query(q, rows=3).get("message", {}).get("items", [])
 
-    
-    # Use cache if available
-    if q in _crossref_cache:
-        crossref_data = _crossref_cache[q]
-    else:
-        # Get 3 from Crossref
-        crossref_data = crossref_query(q, rows=3)
-        _crossref_cache[q] = crossref_data
+def _semantic_scholar_items(normalized_candidate: str, candidate_author: str) -> list[dict]:
+    # Get 1 from Semantic Scholar
+    items = semantic_scholar_query(normalized_candidate, limit=1)[:1]
+    return [normalize_semantic_item(it) for it in items]
 
-    items = crossref_data.get("message", {}).get("items", [])
+def _openalex_items(normalized_candidate: str, candidate_author: str) -> list[dict]:
+    return [normalize_openalex_item(it) for it in openalex_query(normalized_candidate, limit=3)]
 
-    # Get 1 from Semantic Scholar
-    semsch_items = semantic_scholar_query(normalized_candidate, limit=1)
-
-    # Combine results
-    if len(semsch_items) > 0:
-        items =  items + [normalize_semantic_item(semsch_items[0])]
-    items.sort(key=lambda it: _score_item(it, normalized_candidate, candidate_author), reverse=True)
-    for item in items:
-        crossref_title = item.get("title", [""])[0]
-        normalized_crossref = normalize_title(crossref_title)
-        if normalized_candidate == normalized_crossref:
-            item["_title_match_flag"] = True
-            return item  # return exact match
-        crossref_words = normalized_crossref.split()
-        m = min(len(candidate_words), len(crossref_words))
-        if m == 0:
+PROVIDER_SEARCH = {
+    "crossref": _crossref_items,
+    "openalex": _openalex_items,
+    "s2": _semantic_scholar_items,
+}
+
+_provider_chain: list[str] = list(DEFAULT_PROVIDERS)
+_hedge_after: float | None = None
+_hedge_pool: ThreadPoolExecutor | None = None
+_hedge_pool_lock = threading.Lock()
+# Offline metadata index (refsync.local_index.LocalIndex), asked before any provider
+_local_index = None
+
+def configure_local_index(index):
+    """Answer title and DOI lookups from ``index`` first (None to disable)."""
+    global _local_index
+    _local_index = index
+
+def configure_providers(names: list[str], hedge_ms: float | None = None):
+    """Set the provider chain used for title search, in order.
+
+    With ``hedge_ms`` the second provider is also queried when the first has
+    not answered within that many milliseconds; the first exact match wins.
+    """
+    global _provider_chain, _hedge_after
+    unknown = [n for n in names if n not in PROVIDER_SEARCH]
+    if unknown or not names:
+        raise ValueError(f"Unknown provider(s): {', '.join(unknown) or '(none given)'}")
+    _provider_chain = list(names)
+    _hedge_after = hedge_ms / 1000.0 if hedge_ms is not None else None
+
+def _has_exact(items: list[dict], accept: set[str]) -> bool:
+    return any(normalize_title((it.get("title") or [""])[0]) in accept for it in items)
+
+def _get_hedge_pool() -> ThreadPoolExecutor:
+    # Lookup workers race to the first hedged search; only one may create the pool
+    global _hedge_pool
+    with _hedge_pool_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(4, thread_name_prefix="refsync-hedge")
+        return _hedge_pool
+
+def shutdown_hedge_pool():
+    """Stop the hedge pool's threads, dropping queued requests (a later search starts a new one)."""
+    global _hedge_pool
+    with _hedge_pool_lock:
+        pool, _hedge_pool = _hedge_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+atexit.register(shutdown_hedge_pool)
+
+def _hedged_search(primary: str, secondary: str, normalized_candidate: str, candidate_author: str,
+                   accept: set[str], stats: dict) -> tuple[list[dict], bool]:
+    """Query primary; if it is slower than the hedge delay also query secondary.
+
+    Returns (items, whether secondary was used).
+    """
+    pool = _get_hedge_pool()
+    first = pool.submit(PROVIDER_SEARCH[primary], normalized_candidate, candidate_author)
+    stats["requests"] += 1
+    try:
+        return first.result(timeout=_hedge_after), False
+    except FuturesTimeout:
+        pass
+    second = pool.submit(PROVIDER_SEARCH[secondary], normalized_candidate, candidate_author)
+    stats["requests"] += 1
+    items, error = [], None
+    for fut in as_completed([first, second]):
+        try:
+            got = fut.result()
+        except Exception as e:
+            error = error or e
             continue
-        # Compare first m words in order
-        if candidate_words[:m] == crossref_words[:m]:
-            item["_title_match_flag"] = False
+        if _has_exact(got, accept):
+            return got, True  # the slower request finishes in the background and is cached
+        items += got
+    if error is not None and not items:
+        raise error
+    return items, True
+
+def _provider_items(normalized_candidate: str, candidate_author: str = "",
+                    stats: dict | None = None, accept: set[str] | None = None) -> list[dict]:
+    """Crossref-like items for a normalized title from the provider chain.
+
+    The local index, if configured, is asked first. Providers are asked in
+    order; once one returns a title in ``accept`` (default: the candidate
+    itself) the rest of the chain is skipped.
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault("requests", 0)
+    accept = accept or {normalized_candidate}
+    chain = list(_provider_chain)
+    items = []
+    if _local_index is not None:
+        # Not counted as a request: the network is only used on a local miss
+        items += _local_index.search(normalized_candidate, candidate_author)
+        if _has_exact(items, accept):
+            return items
+    if _hedge_after is not None and len(chain) >= 2:
+        got, used_secondary = _hedged_search(chain[0], chain[1], normalized_candidate,
+                                             candidate_author, accept, stats)
+        items += got
+        if _has_exact(got, accept):
+            return items
+        chain = chain[2:] if used_secondary else chain[1:]
+    for name in chain:
+        got = PROVIDER_SEARCH[name](normalized_candidate, candidate_author)
+        stats["requests"] += 1
+        items += got
+        if _has_exact(got, accept):
+            break
+    return items
+
+def best_metadata_match(candidate_title: str, candidate_author: str = "", stats: dict | None = None,
+                        years=()) -> dict | None:
+    """Best provider record for a title, or None below ``MIN_CONFIDENCE``.
+
+    ``_title_match_flag`` is set for exact (normalized) titles and for
+    records at or above ``ACCEPT_CONFIDENCE`` whose title carries the same
+    numbers; ``_confidence`` holds the score.
+    """
+    normalized_candidate = normalize_title(candidate_title)
+    items = _provider_items(normalized_candidate, candidate_author, stats)
+    ranked = rank_items(items, [normalized_candidate], candidate_author, years)
+    if not ranked or ranked[0][0] < MIN_CONFIDENCE:
+        return None
+    confidence, _, item = ranked[0]
+    exact = normalize_title((item.get("title") or [""])[0]) == normalized_candidate
+    item["_title_match_flag"] = exact or (confidence >= ACCEPT_CONFIDENCE
+                                          and _numbers_agree(normalized_candidate, item))
+    item["_confidence"] = confidence
+    return item
+
+def match_title_candidates(candidates: list[str], candidate_author: str = "",
+                           budget: int = 10, years=()) -> tuple[str | None, dict | None]:
+    """Look up ranked title hypotheses until a provider record confirms one.
+
+    Every answer is re-ranked against *all* hypotheses, so querying one line
+    can confirm a two-line title without another lookup. An exact title match
+    is taken first; otherwise a record at or above ``ACCEPT_CONFIDENCE``
+    (near-identical title with the same numbers, agreeing author/year) ends
+    the search early. Stops
+    once ``budget`` provider requests have been spent. Returns (matched
+    hypothesis, item).
+    """
+    by_norm: dict[str, str] = {}
+    for c in candidates:
+        by_norm.setdefault(normalize_title(c), c)
+    by_norm.pop("", None)
+    stats = {"requests": 0}
+    queried = set()
+    for c in candidates:
+        norm = normalize_title(c)
+        if not norm or norm in queried:
+            continue
+        if stats["requests"] >= budget:
+            break
+        queried.add(norm)
+        items = _provider_items(norm, candidate_author, stats, accept=set(by_norm))
+        ranked = rank_items(items, list(by_norm), candidate_author, years)
+        # Exact hits first (the queried hypothesis before others), then by confidence
+        exact = [(normalize_title((it.get("title") or [""])[0]), conf, it)
+                 for conf, _, it in ranked]
+        exact = [(t, conf, it) for t, conf, it in exact if t in by_norm]
+        if exact:
+            t, conf, it = min(exact, key=lambda h: h[0] != norm)
+            it["_title_match_flag"] = True
+            it["_confidence"] = conf
+            return by_norm[t], it
+        confident = [(conf, query, it) for conf, query, it in ranked
+                     if conf >= ACCEPT_CONFIDENCE and _numbers_agree(query, it)]
+        if confident:
+            conf, query, it = confident[0]
+            it["_title_match_flag"] = True
+            it["_confidence"] = conf
+            return by_norm[query], it
+    return None, None
+
+_BOOK_TYPES = ("book", "monograph", "edited-book", "reference-book")
+
+def _identifier_item(kind: str, value: str, stats: dict) -> dict | None:
+    """Crossref-like record for one identifier via a direct lookup."""
+    if kind == "doi" and _local_index is not None:
+        item = _local_index.by_doi(value)
+        if item is not None:
             return item
+    stats["requests"] += 1
+    if kind == "doi":
+        return crossref_work(value)
+    if kind == "arxiv":
+        paper = semantic_scholar_paper(f"arXiv:{value}")
+        if not paper:
+            return None
+        item = normalize_semantic_item(paper)
+        if item["DOI"]:
+            # Published version: prefer its full Crossref record
+            stats["requests"] += 1
+            return crossref_work(item["DOI"].lower()) or item
+        item["DOI"] = f"10.48550/arXiv.{value}"  # arXiv's DataCite DOI
+        return item
+    if kind == "isbn":
+        items = crossref_isbn_query(value).get("message", {}).get("items", [])
+        books = [it for it in items if it.get("type") in _BOOK_TYPES]
+        return (books or items or [None])[0]
     return None
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=6))
+def _title_confirmed(title: str, evidence_words: set[str]) -> bool:
+    # Most of the record's title words must appear in the PDF's own text
+    all_words = normalize_title(title).split()
+    words = [w for w in all_words if len(w) > 3] or all_words
+    if not words:
+        return False
+    if not evidence_words:
+        return True  # no text to check against (e.g. scanned), trust the identifier
+    return sum(w in evidence_words for w in words) >= 0.6 * len(words)
+
+def match_identifiers(identifiers: dict[str, list[str]], evidence: list[str], budget: int = 3,
+                      stats: dict | None = None) -> tuple[str | None, dict | None]:
+    """Resolve DOIs, then arXiv IDs, then ISBNs found in a PDF by direct lookup.
+
+    A record is accepted only if its title is backed by ``evidence`` (the PDF's
+    metadata and first-page text), so a DOI of a cited work is not taken for
+    the paper's own. Returns (record title, item) or (None, None).
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault("requests", 0)
+    evidence_words = set(normalize_title(" ".join(t for t in evidence if t)).split())
+    for kind in ("doi", "arxiv", "isbn"):
+        for value in identifiers.get(kind) or []:
+            if stats["requests"] >= budget:
+                return None, None
+            item = _identifier_item(kind, value, stats)
+            title = " ".join((item or {}).get("title") or [])
+            if item and _title_confirmed(title, evidence_words):
+                item["_title_match_flag"] = True
+                item["_identifier"] = f"{kind}:{value}"
+                return title, item
+    return None, None
+
 def bibtex_from_doi(doi: str) -> str:
-    url = DOI_CONTENT_NEGOTIATION_URL.format(doi=doi)
-    headers = {"Accept": "application/x-bibtex"}
-    r = SESSION.get(url, headers=headers, timeout=20)
-    r.raise_for_status()
-    return r.text
+    return _cached("doi.org", doi, {"accept": "application/x-bibtex"},
+                   lambda: _fetch("doi.org", doi_bibtex_request(doi), doi_bibtex_parse))
 
 def first_author_lastname(item: dict) -> str:
     authors = item.get("author") or []
@@ -0,0 +1,117 @@
+# refsync/title_candidates.py
+import re
+from .ref_client import normalize_title
+
+# Words that mark a first-page line as boilerplate rather than a title
+_NOISE_WORDS = {
+    "copyright", "doi", "journal", "vol", "volume", "issn", "isbn", "http", "https", "www",
+    "received", "accepted", "published", "abstract", "keywords", "university", "department",
+    "proceedings", "preprint", "arxiv", "license", "licensed", "elsevier", "springer", "ieee",
+}
+_MAX_LINES = 10
+
+
+def years_in_text(text: str) -> set[int]:
+    """Plausible publication years printed in text (e.g. a header or copyright line)."""
+    return {int(y) for y in re.findall(r"\b(?:19[5-9]\d|20[0-4]\d)\b", text or "")}
+
+def is_plausible_title(title: str) -> bool:
+    # Heuristic: at least 5 words, not all caps, not mostly digits, not too short
+    words = title.split()
+    return (
+        len(words) >= 5 and
+        not title.isupper() and
+        sum(c.isdigit() for c in title) < 5 and
+        sum(c.isalpha() for c in title) > 10
+    )
+
+def _line_ok(line: str) -> bool:
+    # Same filter the first-page line search has always used
+    words = line.split()
+    return (
+        len(words) >= 4 and
+        sum(c.isdigit() for c in line) < 5 and
+        sum(c.isalpha() for c in line) > 10 and
+        not any(w.lower() in ["copyright", "doi"] for w in words[:3])
+    )
+
+def score_title(text: str) -> float:
+    """Text-only plausibility of a title hypothesis, roughly in [0, 1]."""
+    words = text.split()
+    if not words:
+        return 0.0
+    n = len(words)
+    s = 1.0
+    if n < 4:
+        s -= 0.5
+    elif n > 25:
+        s -= 0.3 + 0.02 * (n - 25)
+    if text.isupper():
+        s -= 0.2
+    digits = sum(c.isdigit() for c in text)
+    s -= 0.05 * digits
+    lowered = {re.sub(r"\W+", "", w.lower()) for w in words}
+    s -= 0.3 * len(lowered & _NOISE_WORDS)
+    if "@" in text or "©" in text:
+        s -= 0.5
+    # Author lines: several commas, "and", initials
+    if text.count(",") >= 2 or re.search(r"\b[A-Z]\.\s", text):
+        s -= 0.3
+    if text.rstrip().endswith("."):
+        s -= 0.1
+    return s
+
+def plan_title_candidates(meta_title: str, filename_title: str, first_page: str,
+                          lines: list[tuple[str, float | None]] | None = None,
+                          top_k: int = 5, layout_title: str = "") -> list[tuple[str, float]]:
+    """Rank title hypotheses for a PDF locally, best first, without any lookup.
+
+    Hypotheses are the metadata title, the largest-font block (``layout_title``),
+    the file name, and single lines plus 2- and 3-line runs from the top of
+    the first page. ``lines`` may carry (text, font size) pairs; larger fonts
+    and same-size runs score higher.
+    Returns up to ``top_k`` distinct (text, score) pairs.
+    """
+    if lines is None:
+        lines = [(line.strip(), None) for line in (first_page or "").split("\n") if line.strip()]
+    lines = lines[:_MAX_LINES]
+    sizes = [sz for _, sz in lines if sz]
+    max_size = max(sizes) if sizes else None
+
+    scored: dict[str, tuple[str, float]] = {}
+
+    def _add(text: str, score: float):
+        key = normalize_title(text)
+        if key and (key not in scored or scored[key][1] < score):
+            scored[key] = (text, score)
+
+    if meta_title and is_plausible_title(meta_title):
+        _add(meta_title, 2.0 + score_title(meta_title))
+    if layout_title and len(layout_title.split()) >= 2 and score_title(layout_title) > 0:
+        _add(layout_title, 1.5 + score_title(layout_title))
+    if filename_title and is_plausible_title(filename_title):
+        _add(filename_title, 1.0 + score_title(filename_title))
+
+    for start, (text, size) in enumerate(lines):
+        if not _line_ok(text):
+            continue
+        position = 0.5 * (1 - start / _MAX_LINES)
+        font = (size / max_size) if (size and max_size) else 0.5
+        for span in (1, 2, 3):
+            if start + span > len(lines):
+                break
+            run = lines[start:start + span]
+            joined = " ".join(t for t, _ in run)
+            s = score_title(joined) + position + font
+            if span > 1:
+                run_sizes = {sz for _, sz in run}
+                if max_size and len(run_sizes) == 1:
+                    s += 0.2  # a title wrapped over lines keeps its font size
+                elif max_size:
+                    s -= 0.4
+                else:
+                    s -= 0.1 * (span - 1)
+            _add(joined, s)
+
+    ranked = sorted(scored.values(), key=lambda c: c[1], reverse=True)
+    return ranked[:max(1, top_k)]
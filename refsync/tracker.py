@@ -1,15 +1,23 @@
 import os
 import json
+import atexit
+import sqlite3
+import threading
+import time
+from .file_utils import atomic_write_text
 
 TRACKER_FILENAME = ".refsync-tracker.json"
+LEGACY_TRACKER_FILENAME = ".bibsync-tracker.json"
+SQLITE_TRACKER_FILENAME = ".refsync-tracker.sqlite"
+TRACKER_BACKENDS = ("json", "sqlite")
 
 def _tracker_path(folder_path: str) -> str:
     return os.path.join(folder_path, TRACKER_FILENAME)
 
-def load_tracker(folder_path: str) -> dict:
+def _read_tracker_file(folder_path: str) -> dict:
     path = _tracker_path(folder_path)
     # LEGACY support: read old .bibsync-tracker.json if present
-    legacy = os.path.join(folder_path, ".bibsync-tracker.json")
+    legacy = os.path.join(folder_path, LEGACY_TRACKER_FILENAME)
     if not os.path.exists(path) and os.path.exists(legacy):
         path = legacy
     if not os.path.exists(path):
@@ -20,28 +28,406 @@ def load_tracker(folder_path: str) -> dict:
     except Exception:
         return {"processed": [], "hashes": {}}
 
+
+class TrackerStore:
+    """Tracker state for one folder, loaded once and kept in memory.
+
+    Lookups hit a set/dict instead of re-reading the JSON file. Changes are
+    coalesced: the file is rewritten (atomically) once ``save_every`` changes
+    are pending or ``save_interval`` seconds have passed, and on ``flush``.
+    ``before_save``, if set, is called before every save (e.g. to write the
+    bib first, so the tracker never records a file the bib does not link).
+    """
+
+    backend = "json"
+    before_save = None
+
+    def __init__(self, folder_path: str, save_every: int = 25, save_interval: float = 5.0):
+        self.folder_path = folder_path
+        self.save_every = max(1, save_every)
+        self.save_interval = save_interval
+        self._lock = threading.RLock()
+        self._dirty = 0
+        self._last_save = time.monotonic()
+        self._load(_read_tracker_file(folder_path))
+
+    def _load(self, data: dict):
+        self._extra = {k: v for k, v in data.items()
+                       if k not in ("processed", "hashes", "quick", "hash_cache")}
+        self._processed = list(data.get("processed", []) or [])
+        self._processed_lower = {x.lower() for x in self._processed}
+        self._hashes = dict(data.get("hashes", {}) or {})
+        self._quick = dict(data.get("quick", {}) or {})
+        self._hash_cache = dict(data.get("hash_cache", {}) or {})
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            data = {**self._extra, "processed": list(self._processed), "hashes": dict(self._hashes)}
+            if self._quick:
+                data["quick"] = dict(self._quick)
+            if self._hash_cache:
+                data["hash_cache"] = dict(self._hash_cache)
+            return data
+
+    def replace(self, data: dict):
+        with self._lock:
+            hash_cache = self._hash_cache
+            self._load(data)
+            # Cached file hashes stay valid whatever the tracker says
+            self._hash_cache = {**hash_cache, **self._hash_cache}
+            self._dirty += 1
+
+    def is_tracked(self, pdf_basename: str) -> bool:
+        return pdf_basename.lower() in self._processed_lower
+
+    def mark_processed(self, pdf_basename: str):
+        with self._lock:
+            b = pdf_basename.lower()
+            if b not in self._processed_lower:
+                self._processed.append(pdf_basename)
+                self._processed_lower.add(b)
+                self._changed()
+
+    def seen_hash(self, pdf_hash: str) -> bool:
+        return pdf_hash in self._hashes
+
+    def hash_basename(self, pdf_hash: str) -> str | None:
+        return self._hashes.get(pdf_hash)
+
+    def mark_hash(self, pdf_hash: str, pdf_basename: str):
+        with self._lock:
+            if self._hashes.get(pdf_hash) != pdf_basename:
+                self._hashes[pdf_hash] = pdf_basename
+                self._changed()
+
+    def quick_basename(self, fingerprint: str) -> str | None:
+        return self._quick.get(fingerprint)
+
+    def mark_quick(self, fingerprint: str, pdf_basename: str):
+        with self._lock:
+            if self._quick.get(fingerprint) != pdf_basename:
+                self._quick[fingerprint] = pdf_basename
+                self._changed()
+
+    def legacy_hashes(self) -> list[tuple[str, str]]:
+        """Full hashes whose file has no fingerprint yet (trackers from older versions)."""
+        with self._lock:
+            fingerprinted = set(self._quick.values())
+            return [(h, b) for h, b in self._hashes.items() if b not in fingerprinted]
+
+    def cached_hashes(self, key: str) -> dict | None:
+        return self._hash_cache.get(key)
+
+    def cache_hashes(self, key: str, hashes: dict):
+        with self._lock:
+            if self._hash_cache.get(key) != hashes:
+                self._hash_cache[key] = hashes
+                self._changed()
+
+    def forget_hashes(self, key: str):
+        with self._lock:
+            if self._hash_cache.pop(key, None) is not None:
+                self._changed()
+
+    def set_outcome(self, pdf_basename: str, outcome: str, detail: str = ""):
+        # The JSON tracker does not keep per-file outcomes; use the sqlite backend
+        pass
+
+    def get_outcome(self, pdf_basename: str) -> tuple[str, str] | None:
+        return None
+
+    def _changed(self):
+        self._dirty += 1
+        if (self._dirty >= self.save_every
+                or time.monotonic() - self._last_save >= self.save_interval):
+            self.save()
+
+    def save(self):
+        with self._lock:
+            if self.before_save is not None:
+                self.before_save()
+            text = json.dumps(self.as_dict(), indent=2, ensure_ascii=False)
+            atomic_write_text(_tracker_path(self.folder_path), text)
+            self._dirty = 0
+            self._last_save = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            if self._dirty:
+                self.save()
+
+    def close(self):
+        self.flush()
+
+
+class SqliteTrackerStore:
+    """SQLite-backed tracker with the same interface as TrackerStore.
+
+    Processed basenames, content hashes and per-file lookup outcomes live in
+    indexed tables of ``.refsync-tracker.sqlite``, so nothing is loaded up
+    front. The database runs in WAL mode; writes are grouped into transactions
+    committed every ``save_every`` changes or ``save_interval`` seconds.
+
+    On first open, an existing JSON tracker (current or legacy name) is
+    migrated into the database.
+    """
+
+    backend = "sqlite"
+    before_save = None
+
+    def __init__(self, folder_path: str, save_every: int = 200, save_interval: float = 5.0):
+        self.folder_path = folder_path
+        self.save_every = max(1, save_every)
+        self.save_interval = save_interval
+        self._lock = threading.RLock()
+        self._dirty = 0
+        self._last_save = time.monotonic()
+        path = os.path.join(folder_path, SQLITE_TRACKER_FILENAME)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS processed (name_lower TEXT PRIMARY KEY, name TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS hashes (hash TEXT PRIMARY KEY, basename TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS outcomes (
+                name_lower TEXT PRIMARY KEY, name TEXT NOT NULL,
+                outcome TEXT NOT NULL, detail TEXT, updated REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS quick (fingerprint TEXT PRIMARY KEY, basename TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS quick_basename ON quick (basename);
+            CREATE TABLE IF NOT EXISTS hash_cache (key TEXT PRIMARY KEY, hashes TEXT NOT NULL);
+        """)
+        if self._meta("migrated") is None:
+            self._migrate_json()
+
+    def _meta(self, key: str) -> str | None:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _migrate_json(self):
+        data = _read_tracker_file(self.folder_path)
+        with self._lock:
+            self._begin()
+            self._insert(data)
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('migrated', ?)",
+                               (str(time.time()),))
+            self._conn.execute("COMMIT")
+
+    def _insert(self, data: dict):
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO processed VALUES (?, ?)",
+            ((n.lower(), n) for n in data.get("processed", []) or []),
+        )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO hashes VALUES (?, ?)",
+            (data.get("hashes", {}) or {}).items(),
+        )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO quick VALUES (?, ?)",
+            (data.get("quick", {}) or {}).items(),
+        )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO hash_cache VALUES (?, ?)",
+            ((k, json.dumps(v)) for k, v in (data.get("hash_cache", {}) or {}).items()),
+        )
+
+    def _begin(self):
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN")
+
+    def _changed(self):
+        self._dirty += 1
+        if (self._dirty >= self.save_every
+                or time.monotonic() - self._last_save >= self.save_interval):
+            self.save()
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT name FROM processed ORDER BY rowid")
+            processed = [r[0] for r in rows]
+            hashes = dict(self._conn.execute("SELECT hash, basename FROM hashes"))
+            quick = dict(self._conn.execute("SELECT fingerprint, basename FROM quick"))
+        data = {"processed": processed, "hashes": hashes}
+        if quick:
+            data["quick"] = quick
+        return data
+
+    def replace(self, data: dict):
+        with self._lock:
+            self._begin()
+            self._conn.execute("DELETE FROM processed")
+            self._conn.execute("DELETE FROM hashes")
+            self._conn.execute("DELETE FROM quick")
+            self._insert(data)
+            self._dirty += 1
+
+    def is_tracked(self, pdf_basename: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM processed WHERE name_lower = ?", (pdf_basename.lower(),)
+            ).fetchone()
+        return row is not None
+
+    def mark_processed(self, pdf_basename: str):
+        with self._lock:
+            self._begin()
+            self._conn.execute("INSERT OR IGNORE INTO processed VALUES (?, ?)",
+                               (pdf_basename.lower(), pdf_basename))
+            self._changed()
+
+    def seen_hash(self, pdf_hash: str) -> bool:
+        return self.hash_basename(pdf_hash) is not None
+
+    def hash_basename(self, pdf_hash: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT basename FROM hashes WHERE hash = ?",
+                                     (pdf_hash,)).fetchone()
+        return row[0] if row else None
+
+    def mark_hash(self, pdf_hash: str, pdf_basename: str):
+        with self._lock:
+            self._begin()
+            self._conn.execute("INSERT OR REPLACE INTO hashes VALUES (?, ?)",
+                               (pdf_hash, pdf_basename))
+            self._changed()
+
+    def quick_basename(self, fingerprint: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT basename FROM quick WHERE fingerprint = ?",
+                                     (fingerprint,)).fetchone()
+        return row[0] if row else None
+
+    def mark_quick(self, fingerprint: str, pdf_basename: str):
+        with self._lock:
+            self._begin()
+            self._conn.execute("INSERT OR REPLACE INTO quick VALUES (?, ?)",
+                               (fingerprint, pdf_basename))
+            self._changed()
+
+    def legacy_hashes(self) -> list[tuple[str, str]]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT h.hash, h.basename FROM hashes h "
+                "LEFT JOIN quick q ON q.basename = h.basename WHERE q.basename IS NULL"
+            ).fetchall()
+
+    def cached_hashes(self, key: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT hashes FROM hash_cache WHERE key = ?",
+                                     (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def cache_hashes(self, key: str, hashes: dict):
+        with self._lock:
+            self._begin()
+            self._conn.execute("INSERT OR REPLACE INTO hash_cache VALUES (?, ?)",
+                               (key, json.dumps(hashes)))
+            self._changed()
+
+    def forget_hashes(self, key: str):
+        with self._lock:
+            self._begin()
+            self._conn.execute("DELETE FROM hash_cache WHERE key = ?", (key,))
+            self._changed()
+
+    def set_outcome(self, pdf_basename: str, outcome: str, detail: str = ""):
+        with self._lock:
+            self._begin()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO outcomes VALUES (?, ?, ?, ?, ?)",
+                (pdf_basename.lower(), pdf_basename, outcome, detail, time.time()),
+            )
+            self._changed()
+
+    def get_outcome(self, pdf_basename: str) -> tuple[str, str] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT outcome, detail FROM outcomes WHERE name_lower = ?", (pdf_basename.lower(),)
+            ).fetchone()
+        return (row[0], row[1] or "") if row else None
+
+    def save(self):
+        with self._lock:
+            if self._conn.in_transaction:
+                if self.before_save is not None:
+                    self.before_save()
+                self._conn.execute("COMMIT")
+            self._dirty = 0
+            self._last_save = time.monotonic()
+
+    def flush(self):
+        self.save()
+
+    def close(self):
+        with self._lock:
+            self.save()
+            self._conn.close()
+
+
+_STORES: dict[str, TrackerStore | SqliteTrackerStore] = {}
+_STORES_LOCK = threading.Lock()
+
+def get_tracker_store(folder_path: str,
+                      backend: str | None = None) -> TrackerStore | SqliteTrackerStore:
+    """Return the cached tracker store for a folder.
+
+    ``backend`` ("json" or "sqlite") selects the store the first time a folder
+    is opened, or switches it (closing the old store); without it the cached
+    store is reused.
+    """
+    key = os.path.abspath(folder_path)
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is not None and backend is not None and store.backend != backend:
+            store.close()
+            store = None
+        if store is None:
+            cls = SqliteTrackerStore if backend == "sqlite" else TrackerStore
+            store = _STORES[key] = cls(folder_path)
+        return store
+
+def flush_trackers():
+    with _STORES_LOCK:
+        stores = list(_STORES.values())
+    for store in stores:
+        store.flush()
+
+atexit.register(flush_trackers)
+
+def load_tracker(folder_path: str) -> dict:
+    """A folder's tracker data, from its cached store if one is open.
+
+    Otherwise the SQLite tracker (if any) or the JSON file is read without
+    caching a store, so a process holding the folder later is not affected.
+    """
+    store = _STORES.get(os.path.abspath(folder_path))
+    if store is not None:
+        return store.as_dict()
+    if os.path.exists(os.path.join(folder_path, SQLITE_TRACKER_FILENAME)):
+        store = SqliteTrackerStore(folder_path)
+        try:
+            return store.as_dict()
+        finally:
+            store.close()
+    return _read_tracker_file(folder_path)
+
 def save_tracker(folder_path: str, data: dict):
-    path = _tracker_path(folder_path)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    store = get_tracker_store(folder_path)
+    store.replace(data)
+    store.save()
 
 def mark_processed(folder_path: str, pdf_basename: str):
-    data = load_tracker(folder_path)
-    b = pdf_basename.lower()
-    if b not in [x.lower() for x in data.get("processed", [])]:
-        data.setdefault("processed", []).append(pdf_basename)
-        save_tracker(folder_path, data)
+    get_tracker_store(folder_path).mark_processed(pdf_basename)
 
 def is_tracked(folder_path: str, pdf_basename: str) -> bool:
-    data = load_tracker(folder_path)
-    return pdf_basename.lower() in [x.lower() for x in data.get("processed", [])]
+    return get_tracker_store(folder_path).is_tracked(pdf_basename)
 
 def mark_hash(folder_path: str, pdf_hash: str, pdf_basename: str):
-    data = load_tracker(folder_path)
-    data.setdefault("hashes", {})
-    data["hashes"][pdf_hash] = pdf_basename
-    save_tracker(folder_path, data)
+    get_tracker_store(folder_path).mark_hash(pdf_hash, pdf_basename)
 
 def seen_hash(folder_path: str, pdf_hash: str) -> bool:
-    data = load_tracker(folder_path)
-    return pdf_hash in data.get("hashes", {})
+    return get_tracker_store(folder_path).seen_hash(pdf_hash)
+
+def hash_basename(folder_path: str, pdf_hash: str) -> str | None:
+    return get_tracker_store(folder_path).hash_basename(pdf_hash)
@@ -0,0 +1,317 @@
+# refsync/watch.py
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from .bib_utils import BibLibrary
+from .config import BIB_FILENAME, NEAR_DUP_THRESHOLD
+from .core import is_library_folder, process_pdf
+from .dedupe import Fingerprinter
+from .file_utils import drop_stem_registries
+from .tracker import get_tracker_store
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+_EVENT = struct.Struct("iIII")
+
+
+def _skip_dir(name: str, exclude: tuple[str, ...]) -> bool:
+    return name.startswith('.') or name in exclude
+
+
+def _walk_pdfs(root: str, exclude: tuple[str, ...]):
+    """Yield (path, stat) for every PDF under root, outside excluded and hidden folders."""
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not _skip_dir(entry.name, exclude):
+                            stack.append(entry.path)
+                    elif entry.name.lower().endswith('.pdf') and entry.is_file():
+                        yield entry.path, entry.stat()
+        except OSError:
+            continue
+
+
+class PollingWatcher:
+    """Reports PDFs that appeared or changed since the previous scan of the tree."""
+
+    kind = "polling"
+
+    def __init__(self, root: str, exclude: tuple[str, ...], interval: float = 2.0):
+        self.root = root
+        self.exclude = exclude
+        self.interval = interval
+        self._seen = self._snapshot()
+        self._next_scan = time.monotonic() + interval
+
+    def _snapshot(self) -> dict[str, tuple[int, int]]:
+        return {path: (st.st_size, st.st_mtime_ns)
+                for path, st in _walk_pdfs(self.root, self.exclude)}
+
+    def poll(self, timeout: float | None = None) -> list[str]:
+        wait = self._next_scan - time.monotonic()
+        if timeout is not None and timeout < wait:
+            time.sleep(max(0.0, timeout))
+            return []
+        time.sleep(max(0.0, wait))
+        self._next_scan = time.monotonic() + self.interval
+        current = self._snapshot()
+        changed = [p for p, sig in current.items() if self._seen.get(p) != sig]
+        self._seen = current
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify through ctypes; watches every folder of the tree.
+
+    Reports PDFs that were closed after writing or moved in. New folders are
+    watched (and scanned) as they appear; on a queue overflow the whole tree
+    is reported again.
+    """
+
+    kind = "inotify"
+
+    def __init__(self, root: str, exclude: tuple[str, ...]):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.root = root
+        self.exclude = exclude
+        self._fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: dict[int, str] = {}
+        self._watch_tree(root)
+
+    def _watch_tree(self, top: str) -> list[str]:
+        """Watch top and its subfolders; return PDFs already inside them."""
+        found = []
+        stack = [top]
+        while stack:
+            folder = stack.pop()
+            wd = self._add_watch(self._fd, os.fsencode(folder), _WATCH_MASK)
+            if wd < 0:
+                continue
+            self._dirs[wd] = folder
+            try:
+                with os.scandir(folder) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not _skip_dir(entry.name, self.exclude):
+                                stack.append(entry.path)
+                        elif entry.name.lower().endswith('.pdf'):
+                            found.append(entry.path)
+            except OSError:
+                continue
+        return found
+
+    def poll(self, timeout: float | None = None) -> list[str]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        buf = os.read(self._fd, 64 * 1024)
+        changed = []
+        off = 0
+        while off + _EVENT.size <= len(buf):
+            wd, mask, _, length = _EVENT.unpack_from(buf, off)
+            name = os.fsdecode(buf[off + _EVENT.size:off + _EVENT.size + length].rstrip(b"\0"))
+            off += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                changed.extend(path for path, _ in _walk_pdfs(self.root, self.exclude))
+                continue
+            folder = self._dirs.get(wd)
+            if folder is None or not name:
+                continue
+            path = os.path.join(folder, name)
+            if mask & IN_ISDIR:
+                if not _skip_dir(name, self.exclude):
+                    changed.extend(self._watch_tree(path))
+            elif name.lower().endswith('.pdf') and mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                changed.append(path)
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+def open_watcher(root: str, exclude: tuple[str, ...], poll_interval: float | None = None):
+    """inotify on Linux unless ``poll_interval`` is given or inotify is unavailable."""
+    if poll_interval is None and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root, exclude)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root, exclude, interval=poll_interval or 2.0)
+
+
+def _looks_complete(path: str) -> bool:
+    # A finished PDF ends with %%EOF (possibly followed by whitespace)
+    try:
+        with open(path, "rb") as f:
+            f.seek(max(0, os.fstat(f.fileno()).st_size - 1024))
+            return b"%%EOF" in f.read()
+    except OSError:
+        return False
+
+
+class Settler:
+    """Holds reported files until they have stopped changing.
+
+    A file is ready once its size and mtime have been unchanged for
+    ``settle`` seconds and it ends like a complete PDF; after ``give_up``
+    seconds of stability it is released even without the PDF trailer.
+    """
+
+    def __init__(self, settle: float = 1.0, give_up: float = 60.0):
+        self.settle = settle
+        self.give_up = give_up
+        self._pending: dict[str, tuple[tuple[int, int] | None, float]] = {}
+
+    def __len__(self):
+        return len(self._pending)
+
+    def touch(self, path: str):
+        self._pending[path] = (None, time.monotonic())
+
+    def ready(self) -> list[str]:
+        now = time.monotonic()
+        out = []
+        for path, (sig, since) in list(self._pending.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self._pending[path]  # moved away or deleted
+                continue
+            cur = (st.st_size, st.st_mtime_ns)
+            if cur != sig:
+                self._pending[path] = (cur, now)
+            elif st.st_size and now - since >= self.settle and (
+                    now - since >= self.give_up or _looks_complete(path)):
+                del self._pending[path]
+                out.append(path)
+        return out
+
+
+class WarmFolders:
+    """Per-folder state kept between events: the parsed bib, tracker and fingerprinter.
+
+    A folder's bib is re-parsed only when the file changed on disk since this
+    process last read or wrote it (e.g. edited in JabRef).
+    """
+
+    def __init__(self, bib_filename: str = BIB_FILENAME, verbose: bool = False, state: str = "json",
+                 hash_algorithm: str = "sha256", global_index=None,
+                 near_dup_threshold: float = NEAR_DUP_THRESHOLD, **options):
+        self.bib_filename = bib_filename
+        self.verbose = verbose
+        self.state = state
+        self.hash_algorithm = hash_algorithm
+        self.global_index = global_index
+        self.near_dup_threshold = near_dup_threshold
+        self.options = options
+        self._folders: dict[str, dict] = {}
+
+    @staticmethod
+    def _sig(path: str):
+        try:
+            st = os.stat(path)
+            return st.st_size, st.st_mtime_ns
+        except OSError:
+            return None
+
+    def folder(self, folder_path: str) -> dict:
+        bib_path = os.path.join(folder_path, self.bib_filename)
+        folder = self._folders.get(folder_path)
+        if folder is None:
+            tracker = get_tracker_store(folder_path, backend=self.state)
+            folder = self._folders[folder_path] = {
+                "bib_path": bib_path,
+                "tracker": tracker,
+                "fingerprinter": Fingerprinter(tracker, algorithm=self.hash_algorithm,
+                                               global_index=self.global_index),
+                "library": None,
+            }
+        if folder["library"] is None or folder["bib_sig"] != self._sig(bib_path):
+            folder["library"] = BibLibrary(bib_path, near_dup_threshold=self.near_dup_threshold)
+            folder["bib_sig"] = self._sig(bib_path)
+        return folder
+
+    def process(self, pdf_path: str) -> str | None:
+        """File one PDF unless it is already linked or tracked; returns the outcome.
+
+        PDFs outside library folders (no bib file or tracker, e.g. ``figures/``)
+        are ignored.
+        """
+        folder_path = os.path.dirname(pdf_path)
+        if (folder_path not in self._folders
+                and not is_library_folder(folder_path, self.bib_filename)):
+            if self.verbose:
+                print(f"[watch] {pdf_path}: ignored (not in a library folder)")
+            return None
+        folder = self.folder(folder_path)
+        name = os.path.basename(pdf_path)
+        library, tracker = folder["library"], folder["tracker"]
+        if library.find_by_basename(name) is not None or tracker.is_tracked(name):
+            return None
+        start = time.perf_counter()
+        dry_run = self.options.get("dry_run", False)
+        # The user may have deleted or moved files since the last event; let
+        # the stem registries (folder, _duplicates, _skipped) re-scan
+        drop_stem_registries(os.path.dirname(pdf_path))
+        try:
+            outcome = process_pdf(pdf_path, folder["bib_path"], verbose=self.verbose,
+                                  library=library, hash_algorithm=self.hash_algorithm,
+                                  global_index=self.global_index,
+                                  fingerprinter=folder["fingerprinter"], **self.options)
+            if not dry_run:
+                tracker.mark_processed(name)
+                tracker.set_outcome(name, outcome)
+        except Exception as e:
+            print(f"  !! Error on {pdf_path}: {e}")
+            outcome = "error"
+            if not dry_run:
+                tracker.set_outcome(name, "error", str(e))
+        finally:
+            if not dry_run:
+                library.flush()
+            tracker.flush()
+            folder["bib_sig"] = self._sig(folder["bib_path"])
+        print(f"[watch] {pdf_path}: {outcome} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+        return outcome
+
+
+def watch(root: str, settle: float = 1.0, poll_interval: float | None = None,
+          duplicates_dir: str = '_duplicates', skipped_dir: str = '_skipped', stop=None, **options):
+    """Process PDFs under ``root`` as they arrive, until interrupted or ``stop`` is set.
+
+    ``options`` are passed to WarmFolders / process_pdf.
+    """
+    exclude = (duplicates_dir, skipped_dir)
+    watcher = open_watcher(root, exclude, poll_interval)
+    settler = Settler(settle)
+    folders = WarmFolders(duplicates_dir=duplicates_dir, skipped_dir=skipped_dir, **options)
+    print(f"Watching {root} ({watcher.kind}); Ctrl+C to stop")
+    try:
+        while stop is None or not stop.is_set():
+            for path in watcher.poll(settle / 2 if len(settler) else 1.0):
+                settler.touch(path)
+            for path in settler.ready():
+                folders.process(path)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
@@ -0,0 +1,32 @@
+import requests
+
+from benchmarks.corpus import make_pdf_folder, make_works
+from benchmarks.standin import StandIn
+from refsync.metadata_extraction import read_pdf_layout
+
+
+def test_corpus_pdfs_carry_their_titles(tmp_path):
+    works = make_works(3, seed=1)
+    counts = make_pdf_folder(str(tmp_path), works, duplicate_rate=0.34, doi_rate=1.0, seed=1)
+    assert counts == {"papers": 3, "duplicates": 1} and len(list(tmp_path.iterdir())) == 4
+    titles = {w["title"][0] for w in works}
+    for pdf in tmp_path.iterdir():
+        layout = read_pdf_layout(str(pdf))
+        assert layout["layout_title"] in titles and layout["identifiers"]["doi"]
+
+
+def test_standin_answers_and_rate_limits():
+    works = make_works(20, seed=2)
+    with StandIn(works, latency=0) as standin:
+        url = standin.env()["REFSYNC_CROSSREF_URL"]
+        params = {"query.bibliographic": works[5]["title"][0], "rows": 2}
+        found = requests.get(url, params=params).json()
+        assert found["message"]["items"][0]["DOI"] == works[5]["DOI"]
+        work = requests.get(f"{url}/{works[0]['DOI']}").json()["message"]
+        assert work["title"] == works[0]["title"]
+        assert requests.get(f"{url}/10.1/missing").status_code == 404
+    with StandIn(works, latency=0, rate=1) as standin:
+        url = standin.env()["REFSYNC_DOI_URL"].format(doi=works[1]["DOI"])
+        statuses = [requests.get(url).status_code for _ in range(4)]
+        assert 200 in statuses and 429 in statuses
+        assert standin.stats()["rejected"]["doi"] >= 1
@@ -1,5 +1,185 @@
+import pytest
 from refsync.bib_utils import safe_bib_key
 
 def test_safe_bib_key_minimal():
     key = safe_bib_key({"author":"Doe, John", "year":"2024", "title":"Hello World"})
     assert "Doe2024Hello" in key
+
+
+def test_bib_library_indexes_and_upsert(tmp_path):
+    from refsync.bib_utils import BibLibrary, bib_has_doi_with_file
+    bib = tmp_path / "library.bib"
+    bib.write_text(
+        "@article{Doe2020Deep,\n"
+        " author = {Doe, John},\n"
+        " doi = {10.1000/ABC},\n"
+        " file = {:Doe2020Deep.pdf:PDF},\n"
+        " title = {Deep {Learning}: A Survey},\n"
+        " year = {2020}\n"
+        "}\n",
+        encoding="utf-8",
+    )
+    lib = BibLibrary(str(bib))
+    assert lib.find_by_doi("https://doi.org/10.1000/abc")["ID"] == "Doe2020Deep"
+    assert lib.find_by_title_author("deep learning a survey", "doe, john") is not None
+    assert lib.linked_basenames() == {"doe2020deep.pdf"}
+    assert bib_has_doi_with_file(str(bib), "10.1000/abc", library=lib) == (True, "doe2020deep.pdf")
+
+    lib.upsert({"ID": "Roe2021X", "ENTRYTYPE": "article", "doi": "10.1000/xyz",
+                "title": "X", "file": "{:Roe2021X.pdf:PDF}"})
+    lib.save()
+    assert "roe2021x.pdf" in BibLibrary(str(bib)).linked_basenames()
+
+
+def test_bib_library_batched_flush_keeps_untouched_text(tmp_path):
+    from refsync.bib_utils import BibLibrary
+    bib = tmp_path / "library.bib"
+    original = (
+        "% my notes\n"
+        "@article{Keep,\n  title = {Keep   Me},\n  doi = {10.1/keep}\n}\n\n"
+        "@article{Old,\n  title = {Old},\n  doi = {10.1/old}\n}\n"
+    )
+    bib.write_text(original, encoding="utf-8")
+    lib = BibLibrary(str(bib), flush_every=2)
+    lib.upsert({"ID": "New1", "ENTRYTYPE": "article", "title": "Updated", "doi": "10.1/old"})
+    assert not lib.maybe_flush()
+    assert bib.read_text(encoding="utf-8") == original
+    lib.upsert({"ID": "New2", "ENTRYTYPE": "article", "title": "Added", "doi": "10.1/new"})
+    assert lib.maybe_flush()
+
+    text = bib.read_text(encoding="utf-8")
+    assert text.startswith("% my notes\n@article{Keep,\n  title = {Keep   Me},")
+    assert "{Old}" not in text and "@article{New1," in text
+    assert text.rstrip().endswith("}") and "@article{New2," in text
+    assert {e["ID"] for e in BibLibrary(str(bib)).entries} == {"Keep", "New1", "New2"}
+
+
+def test_bib_library_parses_only_updated_entries(tmp_path, monkeypatch):
+    import bibtexparser
+    from refsync.bib_utils import BibLibrary
+    bib = tmp_path / "library.bib"
+    bib.write_text('@string{jn = "Journal"}\n'
+                   "@article{A,\n  title = {A},\n  journal = jn,\n  pages = {1--2},\n"
+                   "  doi = {10.1/a}\n}\n"
+                   "@article{B, title = {B}, doi = {10.1/b}}\n", encoding="utf-8")
+    parsed = []
+    loads = bibtexparser.loads
+    monkeypatch.setattr(bibtexparser, "loads", lambda text: parsed.append(text) or loads(text))
+    lib = BibLibrary(str(bib))
+    assert parsed == [] and lib.find_by_doi("10.1/b")["ID"] == "B"
+
+    lib.upsert({"doi": "10.1/a", "file": "{:A.pdf:PDF}"})
+    lib.flush()
+    assert len(parsed) == 1 and "{B," not in parsed[0]
+    text = bib.read_text(encoding="utf-8")
+    assert "journal = {Journal}" in text and "pages = {1--2}" in text
+    assert "{:A.pdf:PDF}" in text
+    assert text.endswith("@article{B, title = {B}, doi = {10.1/b}}\n")
+    assert BibLibrary(str(bib)).find_by_basename("A.pdf")["ID"] == "A"
+
+
+def test_bib_library_flush_updates_spans_without_rescanning(tmp_path, monkeypatch):
+    from refsync import bib_utils
+    from refsync.bib_utils import BibLibrary, scan_bib
+    bib = tmp_path / "library.bib"
+    bib.write_text("".join(f"@article{{E{i},\n  title = {{T{i}}},\n  doi = {{10.1/{i}}}\n}}\n\n"
+                           for i in range(6)), encoding="utf-8")
+    lib = BibLibrary(str(bib))
+
+    def rescan(data):
+        raise AssertionError("whole file re-scanned")
+    monkeypatch.setattr(bib_utils, "entry_spans", rescan)
+
+    def check():
+        expected = [(rec["start"], rec["end"]) for rec in scan_bib(str(bib))]
+        assert [lib._spans[id(e)] for e in lib.entries] == expected
+
+    for doi, title in [("10.1/4", "A much longer replacement title"), ("10.1/new", "N"),
+                       ("10.1/1", "S"), ("10.1/new", "N, updated after it was written")]:
+        lib.upsert({"ID": "X", "ENTRYTYPE": "article", "title": title, "doi": doi})
+        lib.flush()
+        check()
+    # Several splices and an append in one flush
+    for doi in ("10.1/5", "10.1/0", "10.1/2", "10.1/more"):
+        lib.upsert({"ID": "Y", "ENTRYTYPE": "article", "title": "Batch " + doi, "doi": doi})
+    lib.flush()
+    check()
+    assert [e["title"] for e in BibLibrary(str(bib)).entries][:3] == [
+        "Batch 10.1/0", "S", "Batch 10.1/2"]
+
+
+def test_entry_from_crossref_matches_doi_org_shape():
+    from refsync.bib_utils import entry_from_crossref
+    item = {
+        "DOI": "10.1000/xyz", "type": "proceedings-article",
+        "title": ["Fast &amp; <i>Robust</i> Hashing"],
+        "author": [{"given": "Jane", "family": "Roe"}, {"name": "ACME Lab"}],
+        "container-title": ["Proc. of Things"], "page": "10-20",
+        "issued": {"date-parts": [[2021, 3]]},
+    }
+    e = entry_from_crossref(item)
+    assert e["ENTRYTYPE"] == "inproceedings" and e["ID"] == "Roe_2021"
+    assert e["title"] == "Fast \\& Robust Hashing"
+    assert e["author"] == "Roe, Jane and {ACME Lab}"
+    assert e["booktitle"] == "Proc. of Things" and e["pages"] == "10–20"
+    assert e["year"] == "2021" and e["month"] == "March"
+    untyped = {"DOI": "10.1/x", "title": ["No type: Semantic Scholar item"]}
+    assert entry_from_crossref(untyped) is None
+
+
+@pytest.mark.parametrize("text, escaped", [
+    ("R&D at 50% for $5 #1 a_b", r"R\&D at 50\% for \$5 \#1 a\_b"),
+    ("Set {x} in C:\\path", r"Set \textbraceleft{}x\textbraceright{} in C:\textbackslash{}path"),
+    ("O(n^2) ~ fast", r"O(n\textasciicircum{}2) \textasciitilde{} fast"),
+    ("Open { only", r"Open \textbraceleft{} only"),
+    ("<i>Already</i> \\&amp;", r"Already \textbackslash{}\&"),
+])
+def test_latex_escape_protects_special_characters(tmp_path, text, escaped):
+    from refsync.bib_utils import BibLibrary, latex_escape
+    assert latex_escape(text) == escaped
+    lib = BibLibrary(str(tmp_path / "library.bib"))
+    lib.upsert({"ENTRYTYPE": "article", "ID": "K", "title": latex_escape(text)})
+    lib.flush()
+    assert BibLibrary(str(tmp_path / "library.bib")).entries[0]["title"] == escaped
+
+
+def test_scan_bib_streams_requested_fields(tmp_path):
+    from refsync.bib_utils import scan_bib, get_linked_pdf_basenames, bib_has_doi_with_file
+    text = ('% header with @ sign\n@Comment{jabref-meta: databaseType:bibtex;}\n'
+            '@string{jn = "Journal"}\n'
+            '@Article{Doe2020Deep,\n  title = {{Deep} Learning for\n  Inventory},\n'
+            '  author = "Doe, J. and M{\\"u}ller, K.",\n  journal = jn # " of Things",\n'
+            '  doi = {10.1000/ABC},\n  file = {:Doe2020Deep.pdf:PDF}\n}\n'
+            '@book{Käy, title = {Títle {nested}}, file = {:sub/Käy.pdf:PDF;:Other.pdf:PDF}}\n')
+    bib = tmp_path / "library.bib"
+    bib.write_text(text, encoding="utf-8")
+    raw = text.encode("utf-8")
+    records = list(scan_bib(str(bib)))
+    # Results do not depend on where chunk boundaries fall
+    assert list(scan_bib(str(bib), chunk_size=5)) == records
+    first, second = records
+    assert first["ID"] == "Doe2020Deep" and first["ENTRYTYPE"] == "article"
+    assert first["title"] == "{Deep} Learning for Inventory" and first["doi"] == "10.1000/ABC"
+    assert "journal" not in first
+    assert raw[first["start"]:first["end"]].startswith(b"@Article{Doe2020Deep")
+    assert second["ID"] == "Käy" and raw[second["start"]:second["end"]].endswith(b"PDF}}")
+
+    assert get_linked_pdf_basenames(str(bib)) == {"doe2020deep.pdf", "käy.pdf", "other.pdf"}
+    found = bib_has_doi_with_file(str(bib), "https://doi.org/10.1000/abc")
+    assert found == (True, "doe2020deep.pdf")
+    assert bib_has_doi_with_file(str(bib), "10.1/none") == (False, "")
+
+
+def test_scan_bib_stops_truncated_entry_at_next_header(tmp_path):
+    from refsync.bib_utils import scan_bib
+    text = ("@article{Cut,\n  title = {Never {closed},\n  doi = {10.1/cut}\n"
+            "@article{Next,\n  title = {Next},\n  file = {:Next.pdf:PDF}\n}\n"
+            "@book{Last, title = {Last}}\n")
+    bib = tmp_path / "library.bib"
+    bib.write_text(text, encoding="utf-8")
+    for chunk_size in (7, 64, 1 << 20):
+        records = list(scan_bib(str(bib), chunk_size=chunk_size))
+        assert [r["ID"] for r in records] == ["Cut", "Next", "Last"]
+        cut, nxt, _ = records
+        assert text.encode()[cut["start"]:cut["end"]].endswith(b"{10.1/cut}")
+        assert nxt["file"] == ":Next.pdf:PDF" and nxt["title"] == "Next"
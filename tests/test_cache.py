@@ -0,0 +1,21 @@
+from refsync.cache import DiskCache, make_key
+
+
+def test_make_key_normalizes_query():
+    key = make_key("crossref", "deep learning", {"rows": 3})
+    assert make_key("crossref", "Deep  Learning ", {"rows": 3}) == key
+    assert make_key("s2", "deep learning", {"rows": 3}) != key
+
+
+def test_disk_cache_ttl_and_lru_eviction(tmp_path):
+    cache = DiskCache(str(tmp_path / "c.sqlite"), max_bytes=70)
+    cache.set("a", {"v": "x" * 20})
+    cache.set("b", {"v": "y" * 20})
+    assert cache.get("a") == {"v": "x" * 20}  # a is now more recent than b
+    cache.set("c", {"v": "z" * 20})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["misses"] == 1
+
+    stale = DiskCache(str(tmp_path / "c.sqlite"), ttl=-1)
+    assert stale.get("a") is None
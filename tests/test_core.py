@@ -1,5 +1,187 @@
 import os
+import pytest
 from refsync.core import process_folder
 
 def test_import():
     assert callable(process_folder)
+
+
+def _touch(path, data=b""):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def test_find_library_folders_skips_quarantine_and_hidden(tmp_path):
+    from refsync.core import find_library_folders
+    for rel in ("library.bib", "a/library.bib", "a/_duplicates/library.bib",
+                "b/c/.refsync-tracker.json", ".hidden/library.bib", "d/x.pdf",
+                "a/_skipped/library.bib"):
+        _touch(str(tmp_path / rel))
+    assert find_library_folders(str(tmp_path)) == sorted(
+        [str(tmp_path), str(tmp_path / "a"), str(tmp_path / "b" / "c")])
+
+
+def test_process_tree_commits_each_folder_in_order(tmp_path, monkeypatch):
+    import refsync.core as core
+    for rel in ("a/library.bib", "a/2.pdf", "a/1.pdf", "b/library.bib", "b/3.pdf",
+                "empty/library.bib"):
+        _touch(str(tmp_path / rel))
+    committed = []
+    monkeypatch.setattr(core, "extract_pdf",
+                        lambda path, fingerprinter=None, **kw: {"pdf_path": path})
+    monkeypatch.setattr(core, "lookup_pdf", lambda job, **kw: job)
+
+    def fake_commit(job, bib_path, library, **kw):
+        committed.append(os.path.relpath(job["pdf_path"], tmp_path))
+        return "skipped"
+    monkeypatch.setattr(core, "commit_pdf", fake_commit)
+
+    folders = core.process_tree(str(tmp_path), jobs=3)
+    assert folders == [str(tmp_path / n) for n in ("a", "b", "empty")]
+    assert committed == [os.path.join("a", "1.pdf"), os.path.join("a", "2.pdf"),
+                         os.path.join("b", "3.pdf")]
+    assert core.get_tracker_store(str(tmp_path / "b")).is_tracked("3.pdf")
+
+
+def test_process_folder_imports_folder_into_global_index(tmp_path):
+    from refsync.core import get_tracker_store
+    from refsync.global_index import GlobalIndex
+    lib = tmp_path / "lib"
+    _touch(str(lib / "Doe2020Deep.pdf"), b"%PDF-1.4 body")
+    with open(lib / "library.bib", "w") as f:
+        f.write("@article{Doe2020Deep,\n  doi = {10.1/ABC},\n  file = {:Doe2020Deep.pdf:PDF}\n}\n")
+    get_tracker_store(str(lib)).mark_quick("13:abc", "Doe2020Deep.pdf")
+    index = GlobalIndex(str(tmp_path / "index.sqlite"))
+    process_folder(str(lib), global_index=index)
+    assert index.lookup("13:abc") == [(str(lib), "Doe2020Deep.pdf", "10.1/abc", None)]
+
+
+def test_process_folder_skips_bib_parse_when_nothing_to_do(tmp_path, monkeypatch):
+    import refsync.core as core
+    _touch(str(tmp_path / "Doe2020Deep.pdf"), b"%PDF-1.4 body")
+    with open(tmp_path / "library.bib", "w") as f:
+        f.write("@article{Doe2020Deep,\n  doi = {10.1/ABC},\n  file = {:Doe2020Deep.pdf:PDF}\n}\n")
+
+    def no_parse(*args, **kwargs):
+        raise AssertionError("bib parsed")
+    monkeypatch.setattr(core, "BibLibrary", no_parse)
+    core.process_folder(str(tmp_path))
+
+
+def test_extract_cache_is_keyed_by_full_content(tmp_path, monkeypatch):
+    from refsync import core, metadata_extraction as me
+    from refsync.dedupe import quick_fingerprint
+    body = bytearray(os.urandom(300_000))
+    a = str(tmp_path / "a.pdf")
+    _touch(a, bytes(body))
+    body[150_000] ^= 0xFF  # same size and head/tail, different middle
+    b = str(tmp_path / "b.pdf")
+    _touch(b, bytes(body))
+    assert quick_fingerprint(a) == quick_fingerprint(b)
+    reads = []
+
+    def read_pdf_layout(path):
+        reads.append(os.path.basename(path))
+        return {"title": os.path.basename(path), "lines": []}
+    monkeypatch.setattr(me, "read_pdf_layout", read_pdf_layout)
+    me.configure_extract_cache(str(tmp_path / "cache"))
+    try:
+        assert core.extract_pdf(a)["title"] == "a.pdf"
+        assert core.extract_pdf(b)["title"] == "b.pdf"  # fingerprint seen: confirmed by full hash
+        assert core.extract_pdf(a)["title"] == "a.pdf"
+        assert core.extract_pdf(a)["title"] == "a.pdf"
+        assert core.extract_pdf(b)["title"] == "b.pdf"
+        assert reads == ["a.pdf", "b.pdf", "a.pdf"]
+    finally:
+        me.configure_extract_cache(None)
+
+
+def test_extract_cache_does_not_hash_new_files_in_full(tmp_path, monkeypatch):
+    from refsync import core, dedupe, metadata_extraction as me
+    hashed = []
+    real_hash = dedupe.compute_pdf_hash
+
+    def compute_pdf_hash(path, *args, **kwargs):
+        hashed.append(os.path.basename(path))
+        return real_hash(path, *args, **kwargs)
+    monkeypatch.setattr(dedupe, "compute_pdf_hash", compute_pdf_hash)
+    monkeypatch.setattr(me, "read_pdf_layout", lambda path: {"title": "T", "lines": []})
+    a = str(tmp_path / "a.pdf")
+    _touch(a, b"%PDF-1.4 " + os.urandom(1000))
+    b = str(tmp_path / "b.pdf")
+    _touch(b, b"%PDF-1.4 " + os.urandom(2000))
+    me.configure_extract_cache(str(tmp_path / "cache"))
+    try:
+        core.extract_pdf(a)
+        core.extract_pdf(b)
+        assert hashed == []
+        core.extract_pdf(a)  # same fingerprint again: now worth the full hash
+        assert hashed == ["a.pdf"]
+    finally:
+        me.configure_extract_cache(None)
+
+
+def test_crash_before_folder_flush_leaves_bib_ahead_of_tracker(tmp_path, monkeypatch):
+    import json
+    import refsync.core as core
+    from refsync import tracker as tracker_mod
+    from refsync.bib_utils import get_linked_pdf_basenames
+    folder = str(tmp_path)
+    for n in "ab":
+        _touch(os.path.join(folder, f"{n}.pdf"), f"%PDF-1.4 {n}".encode() * 100)
+    monkeypatch.setattr(core, "extract_pdf", lambda path, fingerprinter, **kw: {
+        "pdf_path": path, "fingerprinter": fingerprinter, "log": []})
+
+    def fake_lookup(job, **kw):
+        n = os.path.basename(job["pdf_path"])[0]
+        item = {"DOI": f"10.1/{n}", "title": [f"Paper {n}"], "author": [{"family": "Doe"}],
+                "issued": {"date-parts": [[2020]]}}
+        job.update(found_match=True, candidate_title=f"Paper {n}", item=item,
+                   entry={"ID": n, "ENTRYTYPE": "article", "title": f"Paper {n}",
+                          "doi": f"10.1/{n}"})
+        return job
+    monkeypatch.setattr(core, "lookup_pdf", fake_lookup)
+    core.get_tracker_store(folder).save_every = 1  # save after every change
+    close_folder = core._close_folder
+    monkeypatch.setattr(core, "_close_folder", lambda folder, dry_run: None)  # crash
+    core.process_folder(folder, bib_flush_every=10)
+
+    # Whatever the tracker persisted, the bib already links
+    with open(os.path.join(folder, tracker_mod.TRACKER_FILENAME), encoding="utf-8") as f:
+        saved = json.load(f)
+    linked = get_linked_pdf_basenames(os.path.join(folder, "library.bib"))
+    assert saved["quick"] and {b.lower() for b in saved["quick"].values()} <= linked
+
+    # The next run does not quarantine the renamed files as their own duplicates
+    monkeypatch.setattr(core, "_close_folder", close_folder)
+    tracker_mod._STORES.pop(os.path.abspath(folder))
+    core.process_folder(folder)
+    assert not os.path.exists(os.path.join(folder, "_duplicates"))
+
+
+@pytest.mark.parametrize("bib_doi, file_field, outcome", [
+    ("10.9/preprint", "file = {:Roe2021Fast.pdf:PDF},", "duplicate"),  # same paper, other DOI
+    ("", "file = {:Roe2021Fast.pdf:PDF},", "duplicate"),
+    ("10.1/new", "", "renamed"),  # DOI known but no PDF yet: link it
+    ("10.9/other", "", "renamed"),  # title match without a file is not a duplicate
+])
+def test_commit_checks_title_and_author_when_doi_is_not_in_bib(tmp_path, bib_doi, file_field,
+                                                                 outcome):
+    import refsync.core as core
+    from refsync.bib_utils import BibLibrary
+    from refsync.dedupe import Fingerprinter
+    bib = tmp_path / "library.bib"
+    bib.write_text("@article{Roe2021Fast,\n  title = {Fast Hashing},\n  author = {Roe, Jane},\n"
+                   f"  doi = {{{bib_doi}}},\n  {file_field}\n  year = {{2021}}\n}}\n")
+    pdf = str(tmp_path / "download.pdf")
+    _touch(pdf, b"%PDF-1.4 body")
+    item = {"DOI": "10.1/new", "title": ["Fast Hashing"], "author": [{"family": "Roe"}],
+            "issued": {"date-parts": [[2021]]}}
+    job = {"pdf_path": pdf, "fingerprinter": Fingerprinter(core.get_tracker_store(str(tmp_path))),
+           "log": [], "found_match": True, "candidate_title": "Fast Hashing", "item": item,
+           "entry": {"ID": "x", "ENTRYTYPE": "article", "title": "Fast Hashing",
+                     "author": "Roe, Jane", "doi": "10.1/new"}}
+    library = BibLibrary(str(bib))
+    assert core.commit_pdf(job, str(bib), library) == outcome
+    assert os.path.exists(tmp_path / "_duplicates") == (outcome == "duplicate")
@@ -0,0 +1,136 @@
+import hashlib
+import os
+from refsync.dedupe import Fingerprinter, compute_pdf_hash
+from refsync.tracker import TrackerStore
+
+
+def _write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+def test_compute_pdf_hash_matches_hashlib(tmp_path):
+    data = os.urandom(300_000)
+    p = _write(tmp_path / "a.pdf", data)
+    assert compute_pdf_hash(p) == hashlib.sha256(data).hexdigest()
+    blake = hashlib.blake2b(data).hexdigest()
+    assert compute_pdf_hash(p, algorithm="blake2b") == "blake2b:" + blake
+    assert compute_pdf_hash(_write(tmp_path / "empty.pdf", b"")) == hashlib.sha256(b"").hexdigest()
+
+
+def test_fingerprinter_full_hash_only_on_collision(tmp_path):
+    body = os.urandom(200_000)
+    tracker = TrackerStore(str(tmp_path), save_every=1000)
+    fp = Fingerprinter(tracker)
+    orig = _write(tmp_path / "orig.pdf", body)
+    new = str(tmp_path / "Doe2020Deep.pdf")
+    os.rename(orig, new)
+    fp.record(orig, new)
+    assert tracker.hash_basename(compute_pdf_hash(new)) is None  # never fully hashed
+
+    other = _write(tmp_path / "other.pdf", os.urandom(200_000))
+    assert fp.find_duplicate(other) is None
+    assert not any(k in c for c in tracker.as_dict()["hash_cache"].values() for k in ("sha256",))
+
+    copy = _write(tmp_path / "copy.pdf", body)
+    assert fp.find_duplicate(copy) == "Doe2020Deep.pdf"
+    # Same size and head/tail but different middle: not a duplicate
+    tweaked = bytearray(body)
+    tweaked[100_000] ^= 0xFF
+    assert fp.find_duplicate(_write(tmp_path / "tweaked.pdf", bytes(tweaked))) is None
+
+
+def test_fingerprinter_backfills_legacy_tracker(tmp_path):
+    body = os.urandom(1000)
+    _write(tmp_path / "Old2019Paper.pdf", body)
+    tracker = TrackerStore(str(tmp_path), save_every=1000)
+    tracker.mark_hash(hashlib.sha256(body).hexdigest(), "Old2019Paper.pdf")
+    fp = Fingerprinter(tracker)
+    assert fp.find_duplicate(_write(tmp_path / "dl.pdf", body)) == "Old2019Paper.pdf"
+    assert tracker.legacy_hashes() == []
+
+
+def test_global_index_finds_duplicates_across_folders(tmp_path):
+    from refsync.global_index import GlobalIndex
+    index = GlobalIndex(str(tmp_path / "index.sqlite"))
+    a, b = tmp_path / "a", tmp_path / "b"
+    a.mkdir()
+    b.mkdir()
+    body = os.urandom(150_000)
+
+    fp_a = Fingerprinter(TrackerStore(str(a), save_every=1000), global_index=index)
+    orig = _write(a / "orig.pdf", body)
+    filed = str(a / "Doe2020Deep.pdf")
+    os.rename(orig, filed)
+    fp_a.record(orig, filed, doi="10.1/x")
+
+    fp_b = Fingerprinter(TrackerStore(str(b), save_every=1000), global_index=index)
+    copy = _write(b / "copy.pdf", body)
+    assert fp_b.find_duplicate(copy) is None
+    assert fp_b.find_global_duplicate(copy) == (str(a), "Doe2020Deep.pdf", "10.1/x")
+    assert fp_b.find_global_duplicate(_write(b / "other.pdf", os.urandom(150_000))) is None
+    # The folder's own files are not reported as cross-folder duplicates
+    assert fp_a.find_global_duplicate(_write(a / "again.pdf", body)) is None
+
+    # Stale entries are dropped once the filed copy disappears
+    os.remove(filed)
+    assert fp_b.find_global_duplicate(copy) is None
+    assert index.lookup(fp_b.quick(copy)) == []
+
+
+def test_global_index_imports_legacy_tracker(tmp_path):
+    from refsync.global_index import GlobalIndex
+    from refsync.tracker import save_tracker
+    lib = tmp_path / "lib"
+    lib.mkdir()
+    body = os.urandom(90_000)
+    filed = _write(lib / "Roe2019Old.pdf", body)
+    save_tracker(str(lib), {"processed": ["Roe2019Old.pdf"],
+                            "hashes": {compute_pdf_hash(filed): "Roe2019Old.pdf"}})
+
+    index = GlobalIndex(str(tmp_path / "index.sqlite"))
+    assert index.import_folder(str(lib))
+    assert not index.import_folder(str(lib))  # unchanged tracker is not re-read
+
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    fp = Fingerprinter(TrackerStore(str(inbox), save_every=1000), global_index=index)
+    found = fp.find_global_duplicate(_write(inbox / "dl.pdf", body))
+    assert found[:2] == (str(lib), "Roe2019Old.pdf")
+
+
+def test_find_duplicate_leaves_tracker_hashes_alone(tmp_path):
+    body = os.urandom(200_000)
+    tracker = TrackerStore(str(tmp_path), save_every=1000)
+    fp = Fingerprinter(tracker)
+    orig = _write(tmp_path / "orig.pdf", body)
+    new = str(tmp_path / "Doe2020Deep.pdf")
+    os.rename(orig, new)
+    fp.record(orig, new)
+    assert fp.find_duplicate(_write(tmp_path / "copy.pdf", body)) == "Doe2020Deep.pdf"
+    assert tracker.as_dict().get("hashes", {}) == {}
+
+
+def test_concurrent_lookups_wait_for_legacy_backfill(tmp_path):
+    import threading
+    import time
+    bodies = [os.urandom(1000) for _ in range(3)]
+    tracker = TrackerStore(str(tmp_path), save_every=1000)
+    for i, body in enumerate(bodies):
+        _write(tmp_path / f"Old{i}.pdf", body)
+        tracker.mark_hash(hashlib.sha256(body).hexdigest(), f"Old{i}.pdf")
+    fp = Fingerprinter(tracker)
+    quick = fp.quick
+    fp.quick = lambda path: (time.sleep(0.05), quick(path))[1]
+    results = {}
+
+    def lookup(i):
+        results[i] = fp.find_duplicate(_write(tmp_path / f"dl{i}.pdf", bodies[i]))
+
+    threads = [threading.Thread(target=lookup, args=(i,)) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == {i: f"Old{i}.pdf" for i in range(3)}
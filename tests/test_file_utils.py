@@ -0,0 +1,47 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from refsync.dedupe import quarantine_file
+from refsync.file_utils import StemRegistry, build_unique_stem, get_stem_registry, rename_pdf
+
+
+def _touch(path):
+    with open(path, "wb") as f:
+        f.write(b"%PDF")
+    return str(path)
+
+
+def test_registry_reservations_are_unique_across_threads(tmp_path):
+    _touch(tmp_path / "Doe2020Deep.PDF")
+    reg = StemRegistry(str(tmp_path))
+    with ThreadPoolExecutor(8) as pool:
+        stems = list(pool.map(lambda _: reg.reserve("Doe2020Deep"), range(50)))
+    assert len(set(stems)) == 50 and "Doe2020Deep" not in stems
+    assert "doe2020deep_2" in {s.lower() for s in stems}
+
+
+def test_registry_notices_files_created_after_the_scan(tmp_path):
+    reg = StemRegistry(str(tmp_path))
+    _touch(tmp_path / "Roe2019.pdf")
+    assert reg.reserve("Roe2019") == "Roe2019_2"
+
+
+def test_rename_and_quarantine_keep_the_registry_current(tmp_path):
+    folder = str(tmp_path)
+    a = _touch(tmp_path / "a.pdf")
+    b = _touch(tmp_path / "b.pdf")
+    stem = build_unique_stem(folder, ("Doe", "2020"), ["Deep", "Learning"])
+    assert stem == "Doe2020Deep"
+    new_a, key = rename_pdf(a, (stem, "", ""))
+    assert os.path.basename(new_a) == "Doe2020Deep.pdf" and key == "Doe2020Deep"
+    assert "a" not in get_stem_registry(folder)
+    # The same title now gets one more word, without listing the folder again
+    assert build_unique_stem(folder, ("Doe", "2020"), ["Deep", "Learning"]) == "Doe2020DeepLearning"
+    new_b, _ = rename_pdf(b, ("Doe2020Deep", "", ""))
+    assert os.path.basename(new_b) == "Doe2020Deep_2.pdf"
+
+    dup_dir = str(tmp_path / "_duplicates")
+    first = quarantine_file(_touch(tmp_path / "c.pdf"), dup_dir, new_basename="Doe2020Deep.pdf")
+    second = quarantine_file(_touch(tmp_path / "d.pdf"), dup_dir, new_basename="Doe2020Deep.pdf")
+    assert os.path.basename(first) == "Doe2020Deep.pdf"
+    assert os.path.basename(second) == "Doe2020Deep_2.pdf"
+    assert "c" not in get_stem_registry(folder)
@@ -0,0 +1,50 @@
+from refsync import ref_client
+from refsync.identifiers import clean_doi, find_identifiers, is_valid_isbn
+
+
+def test_find_identifiers_in_running_text():
+    found = find_identifiers([
+        "Available online. doi: 10.1016/j.ejor.2020.01.002. Published by Elsevier",
+        "(see https://doi.org/10.1145/3292500.3330701)",
+        "arXiv:1706.03762v5 [cs.CL] 6 Dec 2017",
+        "https://doi.org/10.48550/arXiv.2101.00001",
+        "arXiv:hep-th/9901001 and arXiv:1713.00001",  # month 13 is not a valid arXiv ID
+        "ISBN 978-0-262-03384-8, ISBN 0-262-03384-3",  # the second check digit is wrong
+    ])
+    assert found == {
+        "doi": ["10.1016/j.ejor.2020.01.002", "10.1145/3292500.3330701"],
+        "arxiv": ["1706.03762", "2101.00001", "hep-th/9901001"],
+        "isbn": ["9780262033848"],
+    }
+
+
+def test_clean_doi_and_isbn_checksums():
+    sici = "10.1002/(SICI)1097-0258(199808)"
+    assert clean_doi("https://doi.org/" + sici + ".") == sici
+    assert clean_doi("doi:10.1000/abc),") == "10.1000/abc"
+    assert is_valid_isbn("0262033844") and not is_valid_isbn("0262033843")
+
+
+def test_match_identifiers_rejects_cited_dois(monkeypatch):
+    records = {
+        "10.1/cited": {"title": ["A Completely Different Paper"], "DOI": "10.1/cited"},
+        "10.1/own": {"title": ["Deep Learning for Inventory Management"], "DOI": "10.1/own"},
+    }
+    monkeypatch.setattr(ref_client, "crossref_work", lambda doi: records.get(doi))
+    evidence = ["", "Deep Learning for Inventory Management\nJohn Doe\nAbstract. We study ..."]
+    stats = {"requests": 0}
+    dois = {"doi": ["10.1/cited", "10.1/own"]}
+    title, item = ref_client.match_identifiers(dois, evidence, stats=stats)
+    assert title == "Deep Learning for Inventory Management"
+    assert item["_identifier"] == "doi:10.1/own"
+    assert stats["requests"] == 2
+    assert ref_client.match_identifiers(dois, evidence, budget=1) == (None, None)
+
+
+def test_match_identifiers_arxiv_without_published_doi(monkeypatch):
+    monkeypatch.setattr(ref_client, "semantic_scholar_paper", lambda pid: {
+        "title": "Attention Is All You Need", "authors": [{"name": "Ashish Vaswani"}], "year": 2017,
+        "externalIds": {"ArXiv": "1706.03762"}})
+    title, item = ref_client.match_identifiers({"arxiv": ["1706.03762"]},
+                                               ["Attention Is All You Need"])
+    assert item["DOI"] == "10.48550/arXiv.1706.03762" and item["author"][0]["family"] == "Vaswani"
@@ -0,0 +1,69 @@
+import gzip
+import json
+
+from refsync import ref_client
+from refsync.bib_utils import entry_from_crossref
+from refsync.cli import main
+from refsync.local_index import LocalIndex
+
+CROSSREF = {"DOI": "10.1000/ABC", "type": "journal-article",
+            "title": ["Deep Learning for Inventory Management"],
+            "author": [{"family": "Doe", "given": "John"}], "issued": {"date-parts": [[2020]]},
+            "container-title": ["Journal of Things"], "reference": [{"key": "dropped"}]}
+OPENALEX = {"id": "https://openalex.org/W1", "doi": "https://doi.org/10.1000/xyz",
+            "display_name": "Graph Methods for Vehicle Routing", "publication_year": 2019,
+            "type_crossref": "proceedings-article",
+            "authorships": [{"author": {"display_name": "Jane Roe"}}],
+            "primary_location": {"source": {"display_name": "Proc. of Routing"}},
+            "biblio": {"first_page": "10", "last_page": "20"}}
+
+
+def _build(tmp_path):
+    crossref = tmp_path / "crossref.jsonl"
+    crossref.write_text(json.dumps({"message": CROSSREF}) + "\n"
+                        + json.dumps({"title": ["No DOI"]}) + "\n")
+    openalex = tmp_path / "openalex.jsonl.gz"
+    with gzip.open(openalex, "wt") as f:
+        f.write(json.dumps(OPENALEX) + "\n")
+    path = tmp_path / "index.sqlite"
+    main(["index", "build", str(crossref), str(openalex), "--index", str(path)])
+    return LocalIndex(str(path))
+
+
+def test_build_and_search_snapshots(tmp_path):
+    index = _build(tmp_path)
+    assert len(index) == 2
+    item = index.by_doi("10.1000/abc")
+    assert item["title"] == CROSSREF["title"] and "reference" not in item
+    assert entry_from_crossref(item)["journal"] == "Journal of Things"
+
+    routing = index.search("graph methods for vehicle routing")[0]
+    assert routing["DOI"] == "10.1000/xyz" and routing["page"] == "10-20"
+    assert entry_from_crossref(routing)["ENTRYTYPE"] == "inproceedings"
+    # Inexact titles fall back to full-text search
+    assert index.search("deep learning inventory")[0]["DOI"] == "10.1000/abc"
+    assert index.search("unrelated words entirely") == []
+    index.close()
+
+
+def test_local_index_answers_before_network(tmp_path, monkeypatch):
+    index = _build(tmp_path)
+
+    def offline(*args):
+        raise AssertionError("network used")
+
+    monkeypatch.setitem(ref_client.PROVIDER_SEARCH, "crossref", offline)
+    monkeypatch.setattr(ref_client, "crossref_work", offline)
+    ref_client.configure_providers(["crossref"])
+    ref_client.configure_local_index(index)
+    try:
+        stats = {"requests": 0}
+        item = ref_client.best_metadata_match("Deep Learning for Inventory Management", stats=stats)
+        assert item["DOI"] == "10.1000/abc" and item["_title_match_flag"] and stats["requests"] == 0
+        title, item = ref_client.match_identifiers({"doi": ["10.1000/xyz"]},
+                                                   ["Graph methods for vehicle routing"])
+        assert item["DOI"] == "10.1000/xyz"
+    finally:
+        ref_client.configure_local_index(None)
+        ref_client.configure_providers(["crossref", "s2"])
+        index.close()
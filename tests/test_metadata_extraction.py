@@ -1,2 +1,58 @@
 def test_placeholder():
     assert 1 + 1 == 2
+
+
+def _sample_pdf(path):
+    import fitz
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 60), "Journal of Things, Vol 3 (2020) 1-20", fontsize=8)
+    page.insert_text((72, 110), "Deep Learning for Inventory Management", fontsize=18)
+    page.insert_text((72, 132), "under Supply Disruptions", fontsize=18)
+    page.insert_text((72, 170), "John Doe, Jane Roe", fontsize=11)
+    page.insert_text((72, 700), "Footer text far down the page", fontsize=10)
+    doc.set_xml_metadata(
+        '<x:xmpmeta xmlns:x="adobe:ns:meta/">'
+        '<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">'
+        '<rdf:Description xmlns:dc="http://purl.org/dc/elements/1.1/" '
+        'xmlns:prism="http://prismstandard.org/namespaces/basic/2.0/">'
+        '<dc:title><rdf:Alt><rdf:li xml:lang="x-default">Deep Learning for Inventory</rdf:li>'
+        '</rdf:Alt></dc:title>'
+        '<dc:creator><rdf:Seq><rdf:li>John Doe</rdf:li><rdf:li>Jane Roe</rdf:li>'
+        '</rdf:Seq></dc:creator>'
+        '<prism:doi>10.1000/xyz</prism:doi></rdf:Description></rdf:RDF></x:xmpmeta>')
+    doc.save(str(path))
+    return str(path)
+
+
+def test_read_pdf_layout_picks_largest_font_block_and_xmp(tmp_path):
+    from refsync.metadata_extraction import read_pdf_layout
+    info = read_pdf_layout(_sample_pdf(tmp_path / "s.pdf"))
+    assert info["layout_title"] == "Deep Learning for Inventory Management under Supply Disruptions"
+    assert ("under Supply Disruptions", 18.0) in info["lines"]
+    assert "Footer" not in info["first_page"]  # only the top of the page is read
+    assert info["title"] == "Deep Learning for Inventory"  # XMP fills in a missing info title
+    assert info["xmp"]["authors"] == ["John Doe", "Jane Roe"]
+    assert info["xmp"]["doi"] == "10.1000/xyz"
+
+
+def test_parse_xmp_tolerates_garbage():
+    from refsync.metadata_extraction import parse_xmp
+    assert parse_xmp("<not xml") == {"title": "", "authors": [], "doi": ""}
+
+
+def test_extract_first_page_reuses_cached_result(tmp_path, monkeypatch):
+    from refsync import metadata_extraction as me
+    pdf = _sample_pdf(tmp_path / "s.pdf")
+    me.configure_extract_cache(str(tmp_path / "cache"))
+    try:
+        first = me.extract_first_page(pdf, "layout", content_key="123:abc")
+        def reread(path):
+            raise AssertionError("re-read")
+
+        monkeypatch.setattr(me, "read_pdf_layout", reread)
+        again = me.extract_first_page(pdf, "layout", content_key="123:abc")
+        assert again == first and isinstance(again["lines"][0], tuple)
+        assert me.extract_cache_stats()["hits"] == 1
+    finally:
+        me.configure_extract_cache(None)
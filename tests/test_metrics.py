@@ -0,0 +1,27 @@
+from refsync import metrics
+
+
+def test_stages_and_counters_only_collected_when_enabled():
+    metrics.reset()
+    metrics.configure_metrics(False)
+    with metrics.stage("off"):
+        metrics.count("off")
+    assert metrics.snapshot() == {"stages": {}, "counters": {}}
+
+    metrics.configure_metrics(True)
+    try:
+        for ms in (1, 2, 3, 4, 100):
+            metrics.record("lookup", ms / 1000)
+        metrics.timed("extract")(lambda: None)()
+        metrics.count("bytes_hashed", 10)
+        metrics.count("bytes_hashed", 5)
+        snap = metrics.snapshot()
+        lookup = snap["stages"]["lookup"]
+        assert (lookup["count"], lookup["p50_ms"]) == (5, 3.0)
+        assert (lookup["p95_ms"], lookup["max_ms"]) == (100.0, 100.0)
+        assert snap["stages"]["extract"]["count"] == 1 and snap["counters"] == {"bytes_hashed": 15}
+        table = metrics.format_table(snap)
+        assert "lookup" in table and "bytes_hashed" in table
+    finally:
+        metrics.configure_metrics(False)
+        metrics.reset()
@@ -0,0 +1,43 @@
+from refsync.bib_utils import BibLibrary
+from refsync.near_dup import NearDuplicateIndex, first_author_surname
+
+
+def test_near_duplicates_survive_punctuation_ligatures_and_wording():
+    idx = NearDuplicateIndex(0.8)
+    idx.add(1, "a", "Multi-Agent Reinforcement Learning for Supply Chain Resilience", "Doe, John")
+    idx.add(2, "b", "A Survey of Graph Neural Networks", "Roe, Jane")
+    idx.add(3, "c", "Deep Learning Part 1: Foundations", "Poe, Al")
+
+    found = idx.candidates("Multiagent reinforcement learning for supply-chain resilience",
+                           "John Doe")
+    assert [v for _, v in found] == ["a"]
+    assert [v for _, v in idx.candidates("A survey of graph neural networks.", "")] == ["b"]
+    # Preprint wording with one extra word still matches at a lower threshold
+    assert idx.candidates("A Survey of Graph Neural Networks (Extended)", "", threshold=0.7)
+    # Different first author, different part number or unrelated title: no match
+    assert idx.candidates("A Survey of Graph Neural Networks", "Smith, Ann") == []
+    assert idx.candidates("Deep Learning Part 2: Foundations", "Poe, Al") == []
+    assert idx.candidates("Bayesian Optimization in Practice", "") == []
+
+    idx.remove(2)
+    assert idx.candidates("A survey of graph neural networks", "") == []
+
+
+def test_first_author_surname_formats():
+    assert first_author_surname("Müller, Jürgen and Doe, J.") == "muller"
+    assert first_author_surname("Jane van Roe and John Doe") == "roe"
+    assert first_author_surname("") == ""
+
+
+def test_library_find_similar_tracks_upserts(tmp_path):
+    bib = tmp_path / "library.bib"
+    bib.write_text("@article{Doe2020Deep,\n  title = {Deep Learning for Inventory Management},\n"
+                   "  author = {Doe, John},\n  file = {:Doe2020Deep.pdf:PDF}\n}\n")
+    lib = BibLibrary(str(bib))
+    found = lib.find_similar("Deep learning for inventory management.", "John Doe")
+    assert found[0][1]["ID"] == "Doe2020Deep"
+    lib.upsert({"ID": "Roe2021Graph", "ENTRYTYPE": "article",
+                "title": "Graph Methods for Routing Problems", "author": "Roe, Jane",
+                "doi": "10.1/x"})
+    found = lib.find_similar("Graph methods for routing problems", "Roe, J.")
+    assert found[0][1]["ID"] == "Roe2021Graph"
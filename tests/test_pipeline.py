@@ -0,0 +1,19 @@
+import time
+from refsync.pipeline import Pipeline
+
+
+def test_pipeline_yields_in_input_order_and_keeps_errors_per_item():
+    def extract(n):
+        time.sleep(0.01 * (5 - n))
+        if n == 2:
+            raise ValueError("bad pdf")
+        return n * 10
+
+    with Pipeline(jobs=4, window=3) as pipe:
+        results = []
+        for n, fut in pipe.run(range(5), extract, lambda x: x + 1):
+            try:
+                results.append((n, fut.result()))
+            except ValueError:
+                results.append((n, "error"))
+    assert results == [(0, 1), (1, 11), (2, "error"), (3, 31), (4, 41)]
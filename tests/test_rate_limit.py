@@ -0,0 +1,64 @@
+import time
+from refsync import ref_client
+from refsync.cache import DiskCache
+from refsync.rate_limit import TokenBucket, parse_retry_after
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("garbage") is None
+
+
+def test_token_bucket_adapts_to_headers():
+    bucket = TokenBucket(rate=100.0)
+    bucket.update_from_headers({"X-Rate-Limit-Limit": "50", "X-Rate-Limit-Interval": "1s"})
+    assert bucket.rate == 45.0 and bucket.burst == 50
+
+    bucket.update_from_headers({"Retry-After": "0.2"})
+    start = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - start >= 0.15
+
+
+class _Response:
+    def __init__(self, status_code, body, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._body = body
+
+    def json(self):
+        return self._body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise OSError(self.status_code)
+
+
+class _Session:
+    """Stands in for Crossref's requests session; the first request gets a 429."""
+
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        key = params["query.bibliographic"]
+        self.calls.append(key)
+        if len(self.calls) == 1:
+            return _Response(429, {}, {"Retry-After": "0"})
+        return _Response(200, {"message": {"items": [{"title": [key]}]}})
+
+
+def test_provider_requests_wait_on_limiter_retry_and_cache(monkeypatch):
+    monkeypatch.setattr(ref_client, "_cache", DiskCache(":memory:"))
+    monkeypatch.setattr(ref_client, "_cache_only", False)
+    provider = ref_client.PROVIDERS["crossref"]
+    session = _Session()
+    monkeypatch.setattr(provider, "_session", session)
+    monkeypatch.setattr(provider, "limiter", TokenBucket(rate=1000.0))
+    provider.limiter.pause(0.2)
+    start = time.monotonic()
+    result = ref_client.crossref_query("q1")
+    assert time.monotonic() - start >= 0.15
+    assert result["message"]["items"][0]["title"] == ["q1"] and session.calls == ["q1", "q1"]
+    assert ref_client.crossref_query("q1") == result and len(session.calls) == 2
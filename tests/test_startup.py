@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Dependencies that only the extract, lookup and bib-write stages need
+HEAVY = ("fitz", "pymupdf", "requests", "tenacity", "bibtexparser", "tkinter")
+
+
+def _heavy_modules_after(code: str) -> list[str]:
+    probe = code + f"\nimport sys\nprint(' '.join(m for m in {HEAVY!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, cwd=ROOT,
+                         check=True)
+    return out.stdout.splitlines()[-1].split() if out.stdout.strip() else []
+
+
+def test_cli_import_loads_no_heavy_dependencies():
+    assert _heavy_modules_after("import refsync.cli") == []
+
+
+def test_noop_and_rebuild_runs_load_no_heavy_dependencies(tmp_path):
+    bib = "@article{a,\n  title = {Some Title},\n  doi = {10.1/x},\n  file = {:a.pdf:PDF}\n}\n"
+    (tmp_path / "library.bib").write_text(bib, encoding="utf-8")
+    for extra in ([], ["--rebuild-tracker"]):
+        code = f"from refsync.cli import main\nmain({[str(tmp_path), '--no-cache'] + extra!r})"
+        assert _heavy_modules_after(code) == []
@@ -0,0 +1,154 @@
+from refsync import ref_client
+from refsync.title_candidates import plan_title_candidates
+
+
+def test_plan_prefers_large_font_multiline_title():
+    lines = [("Journal of Things, Vol 3", 8.0),
+             ("Deep learning for inventory management", 16.0),
+             ("under supply disruptions", 16.0),
+             ("John Doe, Jane Roe, A. Smith", 10.0)]
+    ranked = plan_title_candidates("", "", "", lines=lines, top_k=3)
+    assert ranked[0][0] == "Deep learning for inventory management under supply disruptions"
+    assert len({ref_client.normalize_title(t) for t, _ in ranked}) == len(ranked)
+
+
+def test_match_title_candidates_checks_all_hypotheses_and_budget(monkeypatch):
+    calls = []
+
+    def fake_items(title, author="", stats=None, accept=None):
+        calls.append(title)
+        stats["requests"] += 2
+        return [{"title": ["Deep Learning for Inventory Management under Supply Disruptions"]}]
+
+    monkeypatch.setattr(ref_client, "_provider_items", fake_items)
+    title, item = ref_client.match_title_candidates(
+        ["Deep learning for inventory management",
+         "Deep learning for inventory management under supply disruptions"])
+    assert title.endswith("supply disruptions") and item["_title_match_flag"]
+    assert len(calls) == 1
+
+    calls.clear()
+    candidates = ["a b c d e", "f g h i j", "k l m n o"]
+    assert ref_client.match_title_candidates(candidates, budget=4) == (None, None)
+    assert len(calls) == 2
+
+
+def test_provider_chain_short_circuits_and_hedges(monkeypatch):
+    import time
+    calls = []
+
+    def slow_crossref(title, author):
+        calls.append("crossref")
+        time.sleep(0.3)
+        return [{"title": ["Something else"]}]
+
+    def openalex(title, author):
+        calls.append("openalex")
+        return [{"title": [title]}]
+
+    def crossref(title, author):
+        calls.append("crossref")
+        return [{"title": [title]}]
+
+    monkeypatch.setitem(ref_client.PROVIDER_SEARCH, "crossref", crossref)
+    monkeypatch.setitem(ref_client.PROVIDER_SEARCH, "openalex", openalex)
+    ref_client.configure_providers(["crossref", "openalex"])
+    try:
+        assert ref_client.best_metadata_match("exact title here")["_title_match_flag"]
+        assert calls == ["crossref"]
+
+        calls.clear()
+        monkeypatch.setitem(ref_client.PROVIDER_SEARCH, "crossref", slow_crossref)
+        ref_client.configure_providers(["crossref", "openalex"], hedge_ms=50)
+        start = time.monotonic()
+        assert ref_client.best_metadata_match("exact title here")["_title_match_flag"]
+        assert time.monotonic() - start < 0.25 and calls == ["crossref", "openalex"]
+    finally:
+        ref_client.configure_providers(["crossref", "s2"])
+
+
+def test_hedge_pool_is_created_once_across_threads(monkeypatch):
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    created = []
+
+    class CountingPool(ThreadPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            created.append(self)
+            time.sleep(0.01)  # widen the race window
+            super().__init__(*args, **kwargs)
+    monkeypatch.setattr(ref_client, "ThreadPoolExecutor", CountingPool)
+    ref_client.shutdown_hedge_pool()
+    barrier = threading.Barrier(8)
+    pools = []
+
+    def worker():
+        barrier.wait()
+        pools.append(ref_client._get_hedge_pool())
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    try:
+        assert len(created) == 1 and all(p is created[0] for p in pools)
+    finally:
+        ref_client.shutdown_hedge_pool()
+    assert ref_client._hedge_pool is None
+
+
+def test_plan_ranks_layout_title_above_page_lines():
+    page = "Some Header Line Of A Journal\nA Study of Things in Places"
+    ranked = plan_title_candidates("", "", page,
+                                   layout_title="A Study of Things in Places and Times")
+    assert ranked[0][0] == "A Study of Things in Places and Times"
+
+
+def test_rank_items_scores_title_author_and_year():
+    def rec(title, family, year):
+        return {"title": [title], "author": [{"family": family}],
+                "issued": {"date-parts": [[year]]}}
+
+    items = [rec("Deep Learning for Inventory Control", "Roe", 2018),
+             rec("Deep Learning for Inventory Management: A Review", "Doe", 2020),
+             rec("Reinforcement Learning in Supply Chains", "Poe", 2020)]
+    query = ref_client.normalize_title("Deep Learning for Inventory Management: A Review")
+    ranked = ref_client.rank_items(items, [query])
+    assert ranked[0][2] is items[1] and ranked[0][0] > 0.95 and ranked[-1][0] < 0.05
+    # Author and year agreement raise a partial title match
+    short = ref_client.normalize_title("Deep Learning for Inventory Management")
+    plain = ref_client.rank_items(items, [short])[0][0]
+    agreed = ref_client.rank_items(items, [short], "John Doe", {2020})[0][0]
+    assert agreed > plain
+
+
+def test_matching_rejects_prefix_and_accepts_confident_near_match(monkeypatch):
+    record = {"title": ["A Survey on Graph Neural Networks for Recommendation"],
+              "author": [{"family": "Doe"}]}
+    monkeypatch.setattr(ref_client, "_provider_items", lambda *a, **kw: [dict(record)])
+    # A bare prefix of the record's title is no longer taken as a match
+    assert ref_client.best_metadata_match("Graph Neural Networks") is None
+
+    title, item = ref_client.match_title_candidates(
+        ["Survey on Graph Neural Networks for Recommendation", "Some Other Line"], "Jane Doe",
+        budget=1)
+    assert title == "Survey on Graph Neural Networks for Recommendation"
+    assert item["_title_match_flag"] and item["_confidence"] >= ref_client.ACCEPT_CONFIDENCE
+
+
+def test_confident_match_needs_the_same_part_numbers(monkeypatch):
+    title = "Deep Reinforcement Learning for Inventory Control: Part {}"
+    record = {"title": [title.format("II")], "author": [{"family": "Doe"}],
+              "issued": {"date-parts": [[2021]]}}
+    monkeypatch.setattr(ref_client, "_provider_items", lambda *a, **kw: [dict(record)])
+    query = ref_client.normalize_title(title.format("I"))
+    confidence = ref_client.rank_items([record], [query], "Jane Doe", {2021})[0][0]
+    assert confidence >= ref_client.ACCEPT_CONFIDENCE
+    assert ref_client.match_title_candidates([title.format("I")], "Jane Doe", budget=2,
+                                             years={2021}) == (None, None)
+    item = ref_client.best_metadata_match(title.format("I"), "Jane Doe", years={2021})
+    assert not item["_title_match_flag"]
+    # The same part with a word missing is still accepted early
+    near = "Reinforcement Learning for Inventory Control: Part II"
+    assert ref_client.match_title_candidates([near], "Jane Doe", budget=1, years={2021})[0] == near
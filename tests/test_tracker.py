@@ -0,0 +1,53 @@
+import json
+from refsync.tracker import TrackerStore, TRACKER_FILENAME
+
+
+def test_tracker_store_coalesces_saves(tmp_path):
+    store = TrackerStore(str(tmp_path), save_every=2, save_interval=3600)
+    store.mark_processed("Paper.pdf")
+    assert store.is_tracked("paper.PDF")
+    assert not (tmp_path / TRACKER_FILENAME).exists()
+    store.mark_hash("abc", "Doe2020Deep.pdf")
+    data = json.loads((tmp_path / TRACKER_FILENAME).read_text(encoding="utf-8"))
+    assert data == {"processed": ["Paper.pdf"], "hashes": {"abc": "Doe2020Deep.pdf"}}
+    assert TrackerStore(str(tmp_path)).hash_basename("abc") == "Doe2020Deep.pdf"
+
+
+def test_sqlite_tracker_migrates_legacy_json(tmp_path):
+    from refsync.tracker import SqliteTrackerStore
+    legacy = {"processed": ["Old.pdf"], "hashes": {"h1": "Doe2020Deep.pdf"}}
+    (tmp_path / ".bibsync-tracker.json").write_text(json.dumps(legacy), encoding="utf-8")
+    store = SqliteTrackerStore(str(tmp_path))
+    assert store.is_tracked("old.pdf") and store.hash_basename("h1") == "Doe2020Deep.pdf"
+    store.mark_processed("New.pdf")
+    store.set_outcome("New.pdf", "renamed")
+    store.close()
+
+    reopened = SqliteTrackerStore(str(tmp_path))
+    assert reopened.as_dict() == {"processed": ["Old.pdf", "New.pdf"],
+                                  "hashes": {"h1": "Doe2020Deep.pdf"}}
+    assert reopened.get_outcome("new.pdf") == ("renamed", "")
+    reopened.close()
+
+
+def test_backend_switch_closes_old_store_and_import_keeps_cached_store(tmp_path):
+    import sqlite3
+    import pytest
+    from refsync import tracker as tracker_mod
+    from refsync.global_index import GlobalIndex
+    folder = str(tmp_path / "lib")
+    (tmp_path / "lib").mkdir()
+    try:
+        old = tracker_mod.get_tracker_store(folder, backend="sqlite")
+        old.mark_quick("fp-old", "Old.pdf")
+        store = tracker_mod.get_tracker_store(folder, backend="json")
+        with pytest.raises(sqlite3.ProgrammingError):  # connection closed, not leaked
+            old.is_tracked("x.pdf")
+        store.mark_quick("fp-new", "New.pdf")
+        index = GlobalIndex(str(tmp_path / "index.sqlite"))
+        assert index.import_folder(folder)
+        assert tracker_mod.get_tracker_store(folder) is store
+        assert [hit[1] for hit in index.lookup("fp-new")] == ["New.pdf"]
+        index.close()
+    finally:
+        tracker_mod._STORES.pop(str(tmp_path / "lib"), None)
@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+import pytest
+from refsync.watch import PollingWatcher, Settler, watch
+
+
+def _write(path, data=b"%PDF-1.4\nbody\n%%EOF\n"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+def test_settler_waits_for_complete_stable_file(tmp_path):
+    s = Settler(settle=0.05)
+    partial = _write(tmp_path / "a.pdf", b"%PDF-1.4\nhalf")
+    done = _write(tmp_path / "b.pdf")
+    s.touch(partial)
+    s.touch(done)
+    assert s.ready() == []  # first sighting only records size/mtime
+    time.sleep(0.06)
+    assert s.ready() == [done]
+    assert len(s) == 1  # no %%EOF yet: still waiting
+    os.remove(partial)
+    assert s.ready() == [] and len(s) == 0
+
+
+def test_polling_watcher_reports_new_pdfs_outside_quarantine(tmp_path):
+    _write(tmp_path / "old.pdf")
+    w = PollingWatcher(str(tmp_path), ("_duplicates",), interval=0)
+    new = _write(tmp_path / "sub" / "new.pdf")
+    _write(tmp_path / "_duplicates" / "dup.pdf")
+    _write(tmp_path / ".hidden" / "x.pdf")
+    assert w.poll(0) == [new]
+    assert w.poll(0) == []
+
+
+@pytest.mark.parametrize("poll_interval", [None, 0.1])  # inotify where available, then polling
+def test_watch_processes_arriving_pdf(tmp_path, monkeypatch, poll_interval):
+    import refsync.watch as watch_mod
+    seen = []
+
+    def fake_process_pdf(pdf_path, bib_path, **kw):
+        seen.append((pdf_path, bib_path, kw["fingerprinter"] is not None))
+        return "renamed"
+    monkeypatch.setattr(watch_mod, "process_pdf", fake_process_pdf)
+
+    stop = threading.Event()
+    (tmp_path / "inbox").mkdir()
+    (tmp_path / "inbox" / "library.bib").write_text("")
+    t = threading.Thread(target=watch, args=(str(tmp_path),),
+                         kwargs=dict(settle=0.05, poll_interval=poll_interval, stop=stop))
+    t.start()
+    try:
+        time.sleep(0.2)
+        pdf = _write(tmp_path / "inbox" / "paper.pdf")
+        deadline = time.time() + 5
+        while not seen and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        stop.set()
+        t.join(5)
+    assert seen == [(pdf, os.path.join(str(tmp_path / "inbox"), "library.bib"), True)]
+
+
+def test_warm_folders_rescan_stems_after_files_leave(tmp_path, monkeypatch):
+    import refsync.watch as watch_mod
+    from refsync.file_utils import get_stem_registry
+    folder = str(tmp_path)
+    (tmp_path / "library.bib").write_text("")
+    old = _write(tmp_path / "Doe2020Deep.pdf")
+    assert get_stem_registry(folder).free_stem("Doe2020Deep") == "Doe2020Deep_2"
+    os.remove(old)  # deleted by the user while watch keeps running
+    free = []
+
+    def fake_process_pdf(pdf_path, bib_path, **kw):
+        free.append(get_stem_registry(folder).free_stem("Doe2020Deep"))
+    monkeypatch.setattr(watch_mod, "process_pdf", fake_process_pdf)
+    watch_mod.WarmFolders().process(_write(tmp_path / "new.pdf"))
+    assert free == ["Doe2020Deep"]
+
+
+def test_warm_folders_ignore_pdfs_outside_library_folders(tmp_path, monkeypatch):
+    import refsync.watch as watch_mod
+    seen = []
+
+    def fake_process_pdf(pdf_path, bib_path, **kw):
+        seen.append(pdf_path)
+        return "renamed"
+    monkeypatch.setattr(watch_mod, "process_pdf", fake_process_pdf)
+    (tmp_path / "library.bib").write_text("")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / ".refsync-tracker.json").write_text("{}")
+    folders = watch_mod.WarmFolders()
+    assert folders.process(_write(tmp_path / "figures" / "plot.pdf")) is None
+    assert folders.process(_write(tmp_path / "figures" / "deep" / "x.pdf")) is None
+    filed = [_write(tmp_path / "a.pdf"), _write(tmp_path / "sub" / "b.pdf")]
+    assert [folders.process(p) for p in filed] == ["renamed", "renamed"]
+    assert seen == filed
+    assert sorted(os.listdir(tmp_path / "figures")) == ["deep", "plot.pdf"]